@@ -0,0 +1,81 @@
+"""
+Compare the size and encoding and decoding times of a numeric-heavy payload
+as JSON and as MessagePack.
+
+Usage:
+
+    python benchmarks/body_formats.py [--rows=N] [--runs=N]
+"""
+
+import json
+from optparse import OptionParser
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rest_client.formats import decode_msgpack, encode_msgpack  # noqa
+
+
+def make_payload(rows, seed=1):
+    """
+    Page of report rows, mostly numbers like our reporting endpoints return
+    """
+    rand = random.Random(seed)
+    return {
+        'count': rows,
+        'next': None,
+        'results': [{
+            'id': index,
+            'campaign_id': rand.randint(1, 10 ** 6),
+            'impressions': rand.randint(0, 10 ** 7),
+            'clicks': rand.randint(0, 10 ** 4),
+            'spend': round(rand.uniform(0, 10 ** 4), 2),
+            'ctr': rand.random(),
+            'hourly': [rand.randint(0, 1000) for _ in range(24)],
+            'date': '2014-06-{:02d}'.format(index % 28 + 1),
+        } for index in xrange(rows)],
+    }
+
+
+def best_time(function, runs):
+    times = []
+    for _ in range(runs):
+        started = time.time()
+        function()
+        times.append(time.time() - started)
+    return min(times)
+
+
+def main(argv=None):
+    parser = OptionParser(usage='%prog [options]')
+    parser.add_option('--rows', type='int', default=10000)
+    parser.add_option('--runs', type='int', default=5)
+    options, _ = parser.parse_args(argv)
+
+    try:
+        import msgpack  # noqa
+    except ImportError:
+        print 'The msgpack package is needed to run this benchmark'
+        return 1
+
+    payload = make_payload(options.rows)
+    formats = (
+        ('json', json.dumps, json.loads),
+        ('msgpack', encode_msgpack, decode_msgpack),
+    )
+    print '{:<8} {:>12} {:>12} {:>12}'.format(
+        'format', 'bytes', 'encode ms', 'decode ms')
+    for name, encode, decode in formats:
+        body = encode(payload)
+        print '{:<8} {:>12} {:>12.1f} {:>12.1f}'.format(
+            name, len(body),
+            best_time(lambda: encode(payload), options.runs) * 1000,
+            best_time(lambda: decode(body), options.runs) * 1000)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Measure how long importing the client takes in a fresh interpreter.
+
+Usage:
+
+    python benchmarks/import_time.py [module] [--runs=N]
+"""
+
+from optparse import OptionParser
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEASURE = (
+    'import sys, time\n'
+    'started = time.time()\n'
+    'import {module}\n'
+    'print time.time() - started, "requests" in sys.modules\n'
+)
+
+
+def import_time(module='rest_client.client', cwd=ROOT):
+    """
+    Seconds taken to import `module` in a new interpreter, and whether that
+    imported `requests`
+    """
+    output = subprocess.check_output(
+        [sys.executable, '-c', MEASURE.format(module=module)], cwd=cwd)
+    seconds, requests_imported = output.split()
+    return float(seconds), requests_imported == 'True'
+
+
+def main(argv=None):
+    parser = OptionParser(usage='%prog [module] [options]')
+    parser.add_option('--runs', type='int', default=20)
+    options, args = parser.parse_args(argv)
+    module = args[0] if args else 'rest_client.client'
+
+    timings = sorted(import_time(module)[0]
+                     for _ in range(options.runs))
+    print '{}: min {:.1f} ms, median {:.1f} ms, max {:.1f} ms'.format(
+        module,
+        timings[0] * 1000,
+        timings[len(timings) // 2] * 1000,
+        timings[-1] * 1000,
+    )
+
+
+if __name__ == '__main__':
+    main()
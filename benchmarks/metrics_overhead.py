@@ -0,0 +1,65 @@
+"""
+Measure the overhead the metrics registry adds to every call.
+
+Usage:
+
+    python benchmarks/metrics_overhead.py [--calls=N]
+"""
+
+from optparse import OptionParser
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rest_client.client  # noqa
+from rest_client.client import Client  # noqa
+from rest_client.metrics import MetricsRegistry  # noqa
+from rest_client.transport import build_response  # noqa
+
+
+class StaticTransport(object):
+    """
+    Answer every request with the same response, without any I/O
+    """
+
+    def __init__(self):
+        self.response = build_response('http://bench/', 200, {}, '{}')
+
+    def send(self, method, url, **kwargs):
+        return self.response
+
+
+def per_call(function, calls):
+    started = time.time()
+    for _ in xrange(calls):
+        function()
+    return (time.time() - started) / calls
+
+
+def main(argv=None):
+    parser = OptionParser(usage='%prog [options]')
+    parser.add_option('--calls', type='int', default=20000)
+    options, _ = parser.parse_args(argv)
+
+    rest_client.client.ENDPOINTS = {'bench__point': 'bench/point/'}
+    registry = MetricsRegistry()
+    plain = Client('http://bench/', transport=StaticTransport())
+    measured = Client('http://bench/', transport=StaticTransport(),
+                      metrics=registry)
+
+    observe = per_call(
+        lambda: registry.observe('bench__point', 'GET', 0.01, 200, 0, 2),
+        options.calls)
+    without = per_call(plain.bench.point, options.calls)
+    with_metrics = per_call(measured.bench.point, options.calls)
+
+    print 'MetricsRegistry.observe: {:.2f} us'.format(observe * 1e6)
+    print 'call without metrics:    {:.2f} us'.format(without * 1e6)
+    print 'call with metrics:       {:.2f} us (+{:.2f} us)'.format(
+        with_metrics * 1e6, (with_metrics - without) * 1e6)
+
+
+if __name__ == '__main__':
+    main()
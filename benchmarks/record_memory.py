@@ -0,0 +1,96 @@
+"""
+Compare the memory held by a decoded list response as dicts, as
+`__slots__` records and as columns, and the time taken to convert it.
+
+Usage:
+
+    python benchmarks/record_memory.py [--rows=N] [--runs=N]
+"""
+
+from array import array
+import json
+from optparse import OptionParser
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rest_client.records import Columns, compact, Record  # noqa
+
+
+def make_items(rows, seed=1):
+    """
+    Items like the ones our workers cache: ids, numbers and a few strings
+    out of a small set of values
+    """
+    rand = random.Random(seed)
+    return json.loads(json.dumps([{
+        'id': index,
+        'campaign_id': rand.randint(1, 10 ** 6),
+        'name': 'Creative {}'.format(index),
+        'status': rand.choice(['active', 'paused', 'archived']),
+        'impressions': rand.randint(0, 10 ** 7),
+        'clicks': rand.randint(0, 10 ** 4),
+        'spend': round(rand.uniform(0, 10 ** 4), 2),
+        'ctr': rand.random(),
+    } for index in xrange(rows)]))
+
+
+def deep_size(value, seen=None):
+    """
+    Bytes held by `value` and every object it references, each counted once
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(key, seen) + deep_size(item, seen)
+                    for key, item in value.iteritems())
+    elif isinstance(value, (list, tuple)):
+        size += sum(deep_size(item, seen) for item in value)
+    elif isinstance(value, Record):
+        size += sum(deep_size(getattr(value, key), seen) for key in value)
+    elif isinstance(value, Columns):
+        size += sum(deep_size(value.column(field), seen)
+                    for field in value._fields)
+    elif isinstance(value, array):
+        pass
+    return size
+
+
+def best_time(function, runs):
+    times = []
+    for _ in range(runs):
+        started = time.time()
+        function()
+        times.append(time.time() - started)
+    return min(times)
+
+
+def main(argv=None):
+    parser = OptionParser(usage='%prog [options]')
+    parser.add_option('--rows', type='int', default=100000)
+    parser.add_option('--runs', type='int', default=3)
+    options, _ = parser.parse_args(argv)
+
+    items = make_items(options.rows)
+    dicts_size = deep_size(items)
+    print '{:<8} {:>12} {:>8} {:>12}'.format(
+        'mode', 'bytes', 'ratio', 'convert ms')
+    print '{:<8} {:>12} {:>8.2f} {:>12}'.format('dicts', dicts_size, 1, '-')
+    for mode in ('records', 'columns'):
+        converted, _ = compact(items, mode)
+        size = deep_size(converted)
+        print '{:<8} {:>12} {:>8.2f} {:>12.1f}'.format(
+            mode, size, float(size) / dicts_size,
+            best_time(lambda: compact(items, mode), options.runs) * 1000)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
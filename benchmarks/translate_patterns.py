@@ -0,0 +1,56 @@
+"""
+Measure how fast url patterns are translated into url templates.
+
+Usage:
+
+    python benchmarks/translate_patterns.py [--patterns=N] [--runs=N]
+"""
+
+from optparse import OptionParser
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rest_client.management.patterns import translate  # noqa
+
+
+# Typical shapes of url patterns, formatted with a counter so every
+# generated pattern is different
+SHAPES = (
+    r'^api/^v1/things{0}/$',
+    r'^api/^v1/things{0}/(?P<pk>[^/]+)/$',
+    r'^api/^v1/bakery{0}/bake/(?P<thing_id>\d+)/and-then/(?P<slug>[-\w]+)/$',
+    r'^api/^v1/archive{0}/(?P<year>(19|20)\d{{2}})/(?P<month>[0-9]{{2}})/$',
+    r'^api/^v1/things{0}/(?P<pk>\d+)/(?:edit/)?$',
+    r'^api/^v1/things{0}\.(?P<format>[a-z0-9]+)/?$',
+)
+
+
+def generate_patterns(count):
+    return [SHAPES[index % len(SHAPES)].format(index)
+            for index in xrange(count)]
+
+
+def translate_all(patterns):
+    started = time.time()
+    for pattern in patterns:
+        translate(pattern)
+    return time.time() - started
+
+
+def main(argv=None):
+    parser = OptionParser(usage='%prog [options]')
+    parser.add_option('--patterns', type='int', default=50000)
+    parser.add_option('--runs', type='int', default=5)
+    options, _ = parser.parse_args(argv)
+
+    patterns = generate_patterns(options.patterns)
+    best = min(translate_all(patterns) for _ in range(options.runs))
+    print '{} patterns translated in {:.3f} s ({:.1f} us per pattern)'.format(
+        len(patterns), best, best / len(patterns) * 1e6)
+
+
+if __name__ == '__main__':
+    main()
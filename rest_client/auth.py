@@ -0,0 +1,166 @@
+"""
+Authorization with tokens that expire.
+
+A static Authorization header stops working when its token expires: every
+request in flight then fails with a 401 and every caller re-authenticates
+at once. `TokenProvider` caches the token, replaces it in the background
+before it expires and makes sure concurrent callers share a single refresh.
+"""
+
+import os
+import threading
+import time
+
+
+class TokenRefreshError(ValueError):
+    """
+    Raised when fetching a token failed. The original exception is kept in
+    `error`.
+    """
+
+    def __init__(self, error):
+        super(TokenRefreshError, self).__init__(
+            'Fetching a token failed: {!r}'.format(error))
+        self.error = error
+
+
+class TokenProvider(object):
+    """
+    Supply the Authorization header of a Client from tokens which expire.
+
+    `fetch()` returns `(token, expires_in)`: a new token and the seconds it
+    is valid for, or None if it doesn't expire. It is either passed in or
+    implemented by a subclass. The header is `'<scheme> <token>'`, or just
+    the token when `scheme` is empty.
+
+    Once less than `refresh_margin` seconds of validity are left, the next
+    request starts a refresh in a background thread and keeps using the
+    current token meanwhile. Requests only wait when there is no valid
+    token, and then all of them wait for the same refresh. A failed
+    background refresh is tried again after `retry_interval` seconds.
+
+    When the API rejects a token with a 401, the Client calls `invalidate`:
+    the first caller rejected with a token refreshes it and the others wait
+    for that refresh instead of starting their own.
+    """
+
+    def __init__(self, fetch=None, refresh_margin=60.0, scheme='Bearer',
+                 retry_interval=5.0):
+        if fetch is not None:
+            self.fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.scheme = scheme
+        self.retry_interval = retry_interval
+
+        self.refreshes = 0
+        self.failures = 0
+
+        self._authorization = None
+        self._expires = None
+        self._retry_at = 0
+        self._reset_state()
+
+    def _reset_state(self):
+        # The token stays valid in a forked process, only the
+        # synchronization state is replaced
+        self._changed = threading.Condition(threading.Lock())
+        self._refreshing = False
+        self._finished = 0
+        self._error = None
+        self._pid = os.getpid()
+
+    def fetch(self):
+        raise NotImplementedError
+
+    def _expired(self):
+        return self._authorization is None or (
+            self._expires is not None and time.time() >= self._expires)
+
+    @property
+    def authorization(self):
+        """
+        Value of the Authorization header, waiting for a token only when
+        the current one is missing or expired.
+        """
+        if self._pid != os.getpid():
+            self._reset_state()
+        with self._changed:
+            if not self._expired():
+                now = time.time()
+                if (self._expires is not None and not self._refreshing and
+                        now >= self._expires - self.refresh_margin and
+                        now >= self._retry_at):
+                    self._refreshing = True
+                    thread = threading.Thread(target=self._refresh_early)
+                    thread.daemon = True
+                    thread.start()
+                return self._authorization
+        return self._wait_for_token()
+
+    def invalidate(self, authorization):
+        """
+        Report that the API rejected `authorization` and return the value
+        to replay the request with. Only the first report of a given token
+        refreshes it.
+        """
+        if self._pid != os.getpid():
+            self._reset_state()
+        with self._changed:
+            if self._authorization == authorization:
+                self._expires = 0
+        return self._wait_for_token()
+
+    def _wait_for_token(self):
+        with self._changed:
+            finished = self._finished
+            while self._expired():
+                if not self._refreshing:
+                    self._refreshing = True
+                    break
+                self._changed.wait()
+                if self._finished != finished and self._error is not None:
+                    # The refresh this caller waited for failed
+                    raise self._error
+            else:
+                return self._authorization
+        return self._refresh()
+
+    def _refresh(self):
+        """
+        Fetch a new token. The caller must have set `_refreshing`.
+        """
+        try:
+            token, expires_in = self.fetch()
+        except Exception as exc:
+            error = TokenRefreshError(exc)
+            with self._changed:
+                self.failures += 1
+                self._error = error
+                self._refreshing = False
+                self._finished += 1
+                self._changed.notify_all()
+            raise error
+
+        authorization = '{} {}'.format(self.scheme, token) if self.scheme \
+            else token
+        with self._changed:
+            self.refreshes += 1
+            self._authorization = authorization
+            self._expires = None if expires_in is None else \
+                time.time() + expires_in
+            self._error = None
+            self._refreshing = False
+            self._finished += 1
+            self._changed.notify_all()
+        return authorization
+
+    def _refresh_early(self):
+        try:
+            self._refresh()
+        except TokenRefreshError:
+            # The current token is used until it expires
+            self._retry_at = time.time() + self.retry_interval
+
+    def __call__(self, request):
+        request.headers['Authorization'] = self.authorization
+        return request
@@ -0,0 +1,148 @@
+"""
+Client side load balancing between several base urls.
+"""
+
+import os
+import random
+import threading
+import time
+
+
+class HostPool(object):
+    """
+    Keep track of the health and latency of a list of base urls.
+
+    Requests go to the better of two randomly picked healthy hosts ("power
+    of two choices"), scoring each by the exponentially weighted moving
+    average of its latency times its requests in flight. Hosts that have
+    not answered yet are assumed as fast as the others on average (or
+    `initial_latency` seconds when none has), so they get tried without
+    winning every pick while their requests pile up. A failure counts as a
+    latency of at least `failure_latency` seconds, and at least twice the
+    current average, so failing fast doesn't make a host look good.
+
+    After `max_failures` consecutive failures a host is ejected for
+    `cooldown` seconds. When every host is ejected they are all used again
+    rather than failing without trying.
+    """
+
+    def __init__(self, base_urls, decay=0.3, max_failures=3, cooldown=10.0,
+                 initial_latency=0.1, failure_latency=1.0, seed=None):
+        if isinstance(base_urls, basestring):
+            base_urls = [base_urls]
+        if not base_urls:
+            raise ValueError('At least one base url is needed')
+        self.base_urls = list(base_urls)
+        # Identifies the hosts whatever their order, so clients balancing
+        # between the same replicas share cached responses
+        self.group = ' '.join(sorted(self.base_urls))
+        self.decay = decay
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.initial_latency = initial_latency
+        self.failure_latency = failure_latency
+
+        self.latency = dict((url, 0.0) for url in self.base_urls)
+        self.in_flight = dict((url, 0) for url in self.base_urls)
+        self.failures = dict((url, 0) for url in self.base_urls)
+        self.ejected_until = dict((url, 0) for url in self.base_urls)
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        # Requests in flight were the parent process' ones
+        self.in_flight = dict((url, 0) for url in self.base_urls)
+        # Otherwise every child process would pick the same hosts
+        self._random.jumpahead(os.getpid())
+        self._pid = os.getpid()
+
+    def expected_latency(self, base_url):
+        latency = self.latency[base_url]
+        if latency:
+            return latency
+        known = [value for value in self.latency.values() if value]
+        if not known:
+            return self.initial_latency
+        return sum(known) / len(known)
+
+    def score(self, base_url):
+        return (self.expected_latency(base_url) *
+                (self.in_flight[base_url] + 1))
+
+    def healthy(self):
+        now = time.time()
+        hosts = [url for url in self.base_urls
+                 if self.ejected_until[url] <= now]
+        return hosts or list(self.base_urls)
+
+    def attempt_order(self):
+        """
+        Base urls in the order they should be tried for a request: the
+        chosen one first and then the rest of the healthy ones as failover.
+        """
+        if self._pid != os.getpid():
+            self._after_fork()
+        if len(self.base_urls) == 1:
+            return self.base_urls
+        with self._lock:
+            hosts = self.healthy()
+            if len(hosts) > 1:
+                first, second = self._random.sample(hosts, 2)
+                chosen = min(first, second, key=self.score)
+            else:
+                chosen = hosts[0]
+            rest = sorted((url for url in hosts if url != chosen),
+                          key=self.score)
+        return [chosen] + rest
+
+    def stats(self):
+        """
+        Per base url statistics: the moving average of its `latency` in
+        seconds, its requests `in_flight`, its consecutive `failures` and
+        whether it is `ejected`, and until when (`ejected_until`, 0 if it
+        never was)
+        """
+        if self._pid != os.getpid():
+            self._after_fork()
+        now = time.time()
+        with self._lock:
+            return dict((url, {
+                'latency': self.latency[url],
+                'in_flight': self.in_flight[url],
+                'failures': self.failures[url],
+                'ejected': self.ejected_until[url] > now,
+                'ejected_until': self.ejected_until[url],
+            }) for url in self.base_urls)
+
+    def start(self, base_url):
+        with self._lock:
+            self.in_flight[base_url] += 1
+
+    def success(self, base_url, latency):
+        with self._lock:
+            self.in_flight[base_url] -= 1
+            self.failures[base_url] = 0
+            previous = self.latency[base_url]
+            if previous:
+                latency = previous + self.decay * (latency - previous)
+            self.latency[base_url] = latency
+
+    def cancel(self, base_url):
+        """
+        End a request which failed for reasons unrelated to the host
+        """
+        with self._lock:
+            self.in_flight[base_url] -= 1
+
+    def failure(self, base_url):
+        with self._lock:
+            self.in_flight[base_url] -= 1
+            self.failures[base_url] += 1
+            self.latency[base_url] = max(
+                2 * self.expected_latency(base_url), self.failure_latency)
+            if self.failures[base_url] >= self.max_failures:
+                self.ejected_until[base_url] = time.time() + self.cooldown
+                self.failures[base_url] = 0
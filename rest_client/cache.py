@@ -0,0 +1,258 @@
+"""
+Response cache shared by every process of a host.
+
+Pre-fork servers run many copies of the same client, each of which would
+otherwise fetch the same resources from the API. `SharedCache` keeps GET
+responses in a SQLite database file so that any process on the host can
+answer from it without touching the network.
+"""
+
+from collections import namedtuple
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import urllib
+import urlparse
+
+
+CachedResponse = namedtuple('CachedResponse', (
+    'status_code', 'headers', 'content', 'expires', 'etag', 'last_modified'
+))
+
+# Statuses whose responses are stored
+CACHEABLE_STATUSES = (200, 203)
+
+# Request headers changing the response of an API, part of the cache key
+KEY_HEADERS = ('Accept',)
+
+MAX_AGE = re.compile(r'(?:^|,)\s*max-age\s*=\s*(\d+)', re.IGNORECASE)
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS responses ('
+    ' key TEXT PRIMARY KEY, status INTEGER, headers TEXT, content BLOB,'
+    ' size INTEGER, expires REAL, etag TEXT, last_modified TEXT,'
+    ' accessed REAL)',
+    'CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)',
+    # Running total of the stored bytes, to avoid summing them on each write
+    'CREATE TABLE IF NOT EXISTS usage (size INTEGER)',
+    'INSERT INTO usage SELECT 0 WHERE NOT EXISTS (SELECT * FROM usage)',
+    'CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses'
+    ' BEGIN UPDATE usage SET size = size + NEW.size; END',
+    'CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses'
+    ' BEGIN UPDATE usage SET size = size - OLD.size; END',
+)
+
+
+def cache_key(path, headers=None, authorization=None, hosts=''):
+    """
+    Key of a GET request: the `hosts` it is sent to (see `HostPool.group`),
+    its path with the query arguments sorted, the request headers in
+    `KEY_HEADERS` and a digest of the credentials, so different APIs and
+    users never share responses.
+    """
+    url_parts = list(urlparse.urlsplit(path))
+    url_parts[3] = urllib.urlencode(sorted(urlparse.parse_qsl(url_parts[3])))
+    key = [hosts, urlparse.urlunsplit(url_parts)]
+    headers = headers or {}
+    for name in KEY_HEADERS:
+        key.append(headers.get(name, ''))
+    if authorization:
+        key.append(hashlib.sha1(authorization).hexdigest())
+    return '\n'.join(key)
+
+
+def freshness(headers, default_ttl):
+    """
+    Seconds a response can be used for without revalidating it, following
+    its Cache-Control header, or None when it must not be stored.
+    """
+    cache_control = headers.get('Cache-Control', '')
+    directives = cache_control.lower()
+    if 'no-store' in directives:
+        return None
+    if 'no-cache' in directives:
+        return 0
+    max_age = MAX_AGE.search(cache_control)
+    if max_age is not None:
+        return int(max_age.group(1))
+    return default_ttl
+
+
+def conditional_headers(cached):
+    """
+    Headers asking the server to confirm a stale response is still valid
+    """
+    headers = {}
+    if cached.etag is not None:
+        headers['If-None-Match'] = cached.etag
+    if cached.last_modified is not None:
+        headers['If-Modified-Since'] = cached.last_modified
+    return headers
+
+
+class SharedCache(object):
+    """
+    GET response cache stored in the SQLite database at `path`.
+
+    Every process using the same path shares the cached responses. The
+    database is in write-ahead logging mode so readers don't block each
+    other or the writer, and writers wait up to `busy_timeout` seconds for
+    one another before giving up with `sqlite3.OperationalError`, which the
+    client treats as a miss. Reads never wait for writers.
+
+    Responses are fresh for the max-age of their Cache-Control header, or
+    `default_ttl` seconds without one: by default they are then only stored
+    to be revalidated, like an HTTP cache does. Stale responses with an ETag or a
+    Last-Modified header are kept so they can be revalidated with a
+    conditional request. Once the bodies add up to more than `max_size`
+    bytes the least recently used responses are evicted.
+    """
+
+    # Seconds between updates of the last access time of a response, so
+    # most hits don't need to write
+    ACCESS_RESOLUTION = 1.0
+
+    def __init__(self, path, max_size=64 * 1024 * 1024, default_ttl=0,
+                 busy_timeout=0.1):
+        self.path = path
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        """
+        Connection of the current thread. SQLite connections can't be used
+        from other threads or processes, so a new one is opened after a fork.
+        """
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            import sqlite3
+
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout,
+                                         isolation_level=None)
+            connection.text_factory = str
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with connection:
+                for statement in SCHEMA:
+                    connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    def get(self, key):
+        """
+        Return the `CachedResponse` stored under `key`, fresh or stale, or
+        None.
+        """
+        row = self.connection.execute(
+            'SELECT status, headers, content, expires, etag, last_modified,'
+            ' accessed FROM responses WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[6] > self.ACCESS_RESOLUTION:
+            self._touch(key, now)
+        return CachedResponse(row[0], json.loads(row[1]), str(row[2]),
+                              row[3], row[4], row[5])
+
+    def _touch(self, key, now):
+        """
+        Update the last access time of a response if no other process is
+        writing, as it only matters for eviction
+        """
+        import sqlite3
+
+        connection = self.connection
+        connection.execute('PRAGMA busy_timeout = 0')
+        try:
+            connection.execute(
+                'UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            connection.execute('PRAGMA busy_timeout = {:d}'.format(
+                int(self.busy_timeout * 1000)))
+
+    def set(self, key, status_code, headers, content, default_ttl=None):
+        """
+        Store a response, unless its status or headers forbid it. Without a
+        Cache-Control max-age it is fresh for `default_ttl` seconds, or the
+        cache's `default_ttl` if None.
+        """
+        if status_code not in CACHEABLE_STATUSES:
+            return
+        if default_ttl is None:
+            default_ttl = self.default_ttl
+        ttl = freshness(headers, default_ttl)
+        if ttl is None:
+            return
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not ttl and etag is None and last_modified is None:
+            return
+        content = content or ''
+        if len(content) > self.max_size:
+            return
+
+        now = time.time()
+        connection = self.connection
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+            connection.execute(
+                'INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, status_code, json.dumps(dict(headers)),
+                 buffer(content), len(content), now + ttl, etag,
+                 last_modified, now)
+            )
+            self._evict(connection)
+
+    def _evict(self, connection):
+        excess = connection.execute(
+            'SELECT size FROM usage').fetchone()[0] - self.max_size
+        if excess <= 0:
+            return
+        keys = []
+        for key, size in connection.execute(
+                'SELECT key, size FROM responses ORDER BY accessed'):
+            keys.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany('DELETE FROM responses WHERE key = ?', keys)
+
+    def refresh(self, key, headers, default_ttl=None):
+        """
+        Make a stored response fresh again after the server confirmed it is
+        still valid with a 304 response carrying `headers`.
+        """
+        if default_ttl is None:
+            default_ttl = self.default_ttl
+        ttl = freshness(headers, default_ttl)
+        if ttl is None:
+            self.delete(key)
+            return
+        now = time.time()
+        self.connection.execute(
+            'UPDATE responses SET expires = ?, accessed = ? WHERE key = ?',
+            (now + ttl, now, key)
+        )
+
+    def delete(self, key):
+        self.connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+
+    def clear(self):
+        self.connection.execute('DELETE FROM responses')
+
+    def size(self):
+        """
+        Bytes of response bodies stored
+        """
+        return self.connection.execute('SELECT size FROM usage').fetchone()[0]
@@ -1,19 +1,145 @@
+import base64
 from functools import partial
+import importlib
 import json
 import re
-import urllib
+import threading
+import time
 import urlparse
 
-import requests
-from requests.auth import AuthBase, HTTPBasicAuth
+from .auth import TokenRefreshError
+from .balancing import HostPool
+from .converters import convert
+from .formats import (
+    decode_msgpack, encode_msgpack, is_msgpack, MSGPACK, MSGPACK_ACCEPT
+)
+from .hedging import IDEMPOTENT_METHODS
+from .lazy import LazyEndpoints
+from .response import LazyResponse
+from .transport import RequestsTransport
 
-from .endpoints import ENDPOINTS
 
+def _load_table(name, namespaces=None):
+    """
+    Read the `name` table of the endpoints module, or of the shards of the
+    given namespaces (all of them by default) when the generated package
+    is sharded. Returns None for namespaces of a package that isn't.
+    """
+    from . import endpoints
+    shards = getattr(endpoints, 'SHARDS', None)
+    if shards is None:
+        if namespaces is not None:
+            return None
+        return getattr(endpoints, name, {})
+    if namespaces is None:
+        namespaces = shards.keys()
+    table = {}
+    for namespace in namespaces:
+        if namespace in shards:
+            module = importlib.import_module(
+                '.endpoint_shards.' + shards[namespace], __package__)
+            table.update(getattr(module, name, {}))
+    return table
+
+
+ENDPOINTS = LazyEndpoints(
+    partial(_load_table, 'ENDPOINTS'),
+    lambda namespace: _load_table('ENDPOINTS', [namespace])
+)
+
+# Descriptors of the url arguments of each endpoint, see `converters`
+CONVERTERS = LazyEndpoints(
+    partial(_load_table, 'CONVERTERS'),
+    lambda namespace: _load_table('CONVERTERS', [namespace])
+)
+
+# Fields of the items of list endpoints declared at generation, see `records`
+LAYOUTS = LazyEndpoints(
+    partial(_load_table, 'LAYOUTS'),
+    lambda namespace: _load_table('LAYOUTS', [namespace])
+)
+
+# What the views of the endpoints told the generator: the `methods` they
+# allow, the `idempotent` ones and the `max_age` of their responses
+METADATA = LazyEndpoints(
+    partial(_load_table, 'METADATA'),
+    lambda namespace: _load_table('METADATA', [namespace])
+)
 
 JSON_HEADERS = {'Content-type': 'application/json'}
 
+# Header used to tell the server how many milliseconds are left before the
+# caller gives up on the request
+DEADLINE_HEADER = 'X-Request-Deadline-Ms'
+
+# Query argument listing the fields a response should be limited to, see
+# `rest_client.drf.SparseFieldsMixin`
+FIELDS_PARAM = 'fields'
+
+# Statuses meaning that another instance of the server may do better
+FAILOVER_STATUSES = (502, 503, 504)
+
+
+class DeadlineExceeded(ValueError):
+    pass
+
+
+class MethodNotAllowed(ValueError):
+    """
+    Raised before sending a request with a method the view of the endpoint
+    doesn't allow, according to the endpoint metadata.
+    """
+
+
+class ApiError(ValueError):
+    """
+    Raised when the API answers with an error HTTP status.
+    """
+
+    def __init__(self, url, response):
+        super(ApiError, self).__init__(
+            'Url: {}, HTTP Status: {}, Response: {}'.format(
+                url,
+                response.status_code,
+                response.content
+            ))
+        self.url = url
+        self.status_code = response.status_code
+        self.response = response
+
+
+class Deadline(object):
+    """
+    Absolute point in time after which a call is no longer useful.
+
+    A single instance can be shared between several calls (e.g. all the
+    requests made while walking a paginated resource) so all of them are
+    bound by the same time budget.
+    """
+
+    def __init__(self, seconds):
+        self.expires_at = time.time() + seconds
+
+    def remaining(self):
+        return self.expires_at - time.time()
+
+    def cap(self, timeout):
+        """
+        Return `timeout` (None, a number or a (connect, read) tuple) limited
+        to the time remaining before the deadline.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded('Deadline exceeded')
+        if isinstance(timeout, tuple):
+            return tuple(remaining if value is None else min(value, remaining)
+                         for value in timeout)
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
 
-class HTTPAuthorizationHeaderAuth(AuthBase):
+
+class HTTPAuthorizationHeaderAuth(object):
 
     def __init__(self, authorization):
         self.authorization = authorization
@@ -23,6 +149,23 @@ class HTTPAuthorizationHeaderAuth(AuthBase):
         return request
 
 
+def body_size(data):
+    if data is None:
+        return 0
+    if isinstance(data, dict):
+        import urllib
+        data = urllib.urlencode(data)
+    return len(data)
+
+
+def basic_authorization(username, password):
+    """
+    Value of the Authorization header for HTTP Basic authentication
+    """
+    credentials = '{}:{}'.format(username, password).encode('latin1')
+    return 'Basic ' + base64.b64encode(credentials)
+
+
 class ApiChunk(object):
     """
     Abstractions of an Api endpoint or an Api midpoint.
@@ -38,35 +181,34 @@ class ApiChunk(object):
     resources are invoked.
     """
 
-    def __init__(self, base_url, auth, name, verify, headers):
+    def __init__(self, client, name):
+        self.client = client
         self.name = name
-        self.base_url = base_url
-        self.auth = auth
-        self.verify = verify
-        self.headers = headers
 
     def __getattr__(self, name):
         if name.startswith('__'):
             return object.__getattribute__(self, name)
         else:
             new_name = '__'.join([self.name, name])
-            return ApiChunk(
-                self.base_url, self.auth, new_name, self.verify, self.headers
-            )
+            return ApiChunk(self.client, new_name)
 
-    def __url(self, *args, **kwargs):
+    def __path(self, *args, **kwargs):
         """
-        Construct the url
+        Construct the url path, relative to the base url
         """
-        return urlparse.urljoin(
-            self.base_url,
-            ENDPOINTS[self.name].format(*args, **kwargs)
-        )
+        return ENDPOINTS[self.name].format(*args, **kwargs)
 
-    def __get_request(self, method):
-        if self.auth is None:
-            return getattr(requests.api, method)
-        return partial(getattr(requests.api, method), auth=self.auth)
+    def __request_options(self, timeout=None):
+        """
+        Headers and timeout for a request to this endpoint.
+        """
+        headers = dict(JSON_HEADERS)
+        if self.client._msgpack:
+            headers['Accept'] = MSGPACK_ACCEPT
+        headers.update(self.client._headers)
+        if timeout is None:
+            timeout = self.client._timeout_for(self.name)
+        return headers, timeout
 
     def __call__(self, *args, **kwargs):
         """
@@ -80,69 +222,139 @@ class ApiChunk(object):
         (as an opposite to the __setattr__ syntax).
 
         Another extra argument `http_body` can be used. Its value will be
-        encoded as JSON and sent as the request body.
+        encoded as JSON and sent as the request body (or as MessagePack, see
+        `Client`).
+
+        `http_timeout` overrides the timeout configured on the Client for
+        this call and `http_deadline` (seconds or a `Deadline` instance)
+        bounds the total time the call is allowed to take.
+
+        A list of names as the `fields` argument asks the server to only
+        include those fields in the response (see `rest_client.drf`).
+
+        `http_priority` is the priority class of the call when the Client
+        has a scheduler (see `rest_client.scheduling`).
+
+        `http_lazy` overrides the `lazy_responses` setting of the Client for
+        this call: when true a `LazyResponse` is returned instead of the
+        decoded JSON body.
+
+        `http_decode` overrides the `decode` setting of the Client for this
+        call: 'records' or 'columns' to get the items of a list response in
+        a compact form (see `rest_client.records`), None for dicts.
+
+        `http_paginate` returns a generator of the items of every page of a
+        paginated list endpoint instead of the first page: 'sequential'
+        follows the next links, 'parallel' fetches up to `http_window`
+        pages at once when they can be computed from the first one, and
+        yields them in order unless `http_ordered` is false (see
+        `rest_client.pagination`).
         """
+        http_paginate = kwargs.pop('http_paginate', None)
+        if http_paginate:
+            from .pagination import paginate
+            window = kwargs.pop('http_window', 8)
+            ordered = kwargs.pop('http_ordered', True)
+            return paginate(self, args, kwargs, http_paginate, window,
+                            ordered)
 
         # Look for a 'http_method' to use
         http_method = kwargs.pop('http_method', 'get')
         http_body = kwargs.pop('http_body', None)
-
-        request = self.__get_request(http_method)
+        http_timeout = kwargs.pop('http_timeout', None)
+        http_deadline = kwargs.pop('http_deadline', None)
+        http_lazy = kwargs.pop('http_lazy', self.client._lazy_responses)
+        http_priority = kwargs.pop('http_priority', None)
+        http_decode = kwargs.pop('http_decode', self.client._decode)
 
         # Regular expression to split both types of parameters
         url_kwarg_keys = re.findall('{([^}]*)}', ENDPOINTS[self.name])
         url_kwargs = dict((key, kwargs.pop(key, None))
                           for key in url_kwarg_keys)
+        converters = CONVERTERS.get(self.name)
+        if converters:
+            for key, descriptor in converters.items():
+                if key in url_kwargs:
+                    url_kwargs[key] = convert(descriptor, key,
+                                              url_kwargs[key])
 
         # Construct the url
-        url = self.__url(*args, **url_kwargs)
+        path = self.__path(*args, **url_kwargs)
 
         # Append extra parameters
-        url_parts = list(urlparse.urlparse(url))
+        import urllib
+        url_parts = list(urlparse.urlparse(path))
         query = dict(urlparse.parse_qsl(url_parts[4]))  # URL params
         query.update(kwargs)
+        fields = query.get(FIELDS_PARAM)
+        if isinstance(fields, (list, tuple, set, frozenset)):
+            query[FIELDS_PARAM] = ','.join(fields)
         url_parts[4] = urllib.urlencode(query)
 
-        url = urlparse.urlunparse(url_parts)
-        # Append headers passed to the Client
-        JSON_HEADERS.update(self.headers)
-        request_kwargs = {'url': url, 'verify': self.verify,
-                          'headers': JSON_HEADERS}
-        if http_body is not None:
+        path = urlparse.urlunparse(url_parts)
+        headers, timeout = self.__request_options(http_timeout)
+        request_kwargs = {'verify': self.client._verify, 'headers': headers,
+                          'timeout': timeout}
+        binary_body = http_body is not None and self.client._msgpack_accepted
+        if binary_body:
+            request_kwargs['data'] = encode_msgpack(http_body)
+            headers['Content-type'] = MSGPACK
+        elif http_body is not None:
             request_kwargs['data'] = json.dumps(http_body)
 
-        response = request(**request_kwargs)
+        request_kwargs['priority'] = http_priority
+        response = self.client._dispatch(self.name, http_method, path,
+                                         http_deadline, **request_kwargs)
+        if binary_body and response.status_code == 415:
+            # The server doesn't parse MessagePack after all
+            self.client._msgpack_accepted = False
+            headers['Content-type'] = JSON_HEADERS['Content-type']
+            request_kwargs['data'] = json.dumps(http_body)
+            response = self.client._dispatch(self.name, http_method, path,
+                                             http_deadline, **request_kwargs)
         if response.status_code >= 400:
-            raise ValueError('Url: {}, HTTP Status: {}, Response: {}'.format(
-                url,
-                response.status_code,
-                response.content
-            ))
-
-        response_json = response.json()
+            raise ApiError(response.url, response)
+
+        if http_lazy:
+            return LazyResponse(response.status_code, response.headers,
+                                response.content)
+        if self.client._msgpack and is_msgpack(response.headers):
+            self.client._msgpack_accepted = True
+            response_json = decode_msgpack(response.content)
+        else:
+            response_json = response.json()
+        if http_decode is not None:
+            return self.client._compact(self.name, response_json, http_decode)
         return response_json
 
     def __setattr__(self, name, value):
         """
         Used to produce a POST request. Value will contain a dictionary with
         the arguments to encode.
+
+        With a `write_behind` queue on the Client the request is queued and
+        sent in the background instead.
         """
-        if name in ('name', 'base_url', 'auth', 'verify', 'headers'):
+        if name in ('client', 'name'):
             self.__dict__[name] = value
             return
 
-        request = self.__get_request('post')
-
         last_chunk = self.__getattr__(name)
-        url = last_chunk.__url()
+        path = last_chunk.__path()
+        headers, timeout = last_chunk.__request_options()
 
-        response = request(url, data=value, headers=JSON_HEADERS)
-        if response.status_code >= 400:
-            raise ValueError('Url: {}, HTTP Status: {}, Response: {}'.format(
-                url,
-                response.status_code,
-                response.content
-            ))
+        def write():
+            response = self.client._dispatch(
+                last_chunk.name, 'post', path, data=value,
+                verify=self.client._verify, headers=headers, timeout=timeout
+            )
+            if response.status_code >= 400:
+                raise ApiError(response.url, response)
+
+        if self.client._write_behind is None:
+            write()
+        else:
+            self.client._write_behind.submit(last_chunk.name, value, write)
 
 
 class Client(object):
@@ -162,25 +374,356 @@ class Client(object):
     methods = ('post', 'patch', 'put', 'delete', 'get', 'head', 'options')
 
     def __init__(self, base_url, username=None, password=None,
-                 authorization=None, verify=True, headers={}):
+                 authorization=None, verify=True, headers={}, timeout=None,
+                 timeouts=None, hedging=None, transport=None,
+                 lazy_responses=False, metrics=None, cache=None,
+                 write_behind=None, msgpack=False, scheduler=None,
+                 token_provider=None, decode=None):
         """
-        :param base_url: Base url used to build API requests
+        :param base_url: Base url used to build API requests, or a list of
+            equivalent base urls to balance requests between
         :param username: Username used to authenticate
         :param password: Password used to authenticate
         :param authorization: Token used as an Authorization HTTP header
         :param verify: The SSL cert verification
         :param custom_headers: Headers to be included in a response
+        :param timeout: Default timeout, in seconds, for every request. Either
+            a number or a (connect, read) tuple
+        :param timeouts: Dictionary of timeouts overriding the default one
+            for a namespace ('shutters') or an endpoint name
+            ('shutters__shutterscreative_list'). The most specific one wins
+        :param hedging: Optional `HedgingPolicy` used to send a duplicate of
+            slow GET, HEAD and OPTIONS requests
+        :param transport: Object performing the HTTP requests, see
+            `rest_client.transport`. Defaults to `RequestsTransport`
+        :param lazy_responses: Return `LazyResponse` objects, which decode
+            the JSON body only when it is accessed, instead of the decoded
+            body
+        :param metrics: Optional `MetricsRegistry` recording requests, errors,
+            bytes and latencies per endpoint name and method
+        :param cache: Optional `SharedCache` answering GET requests from
+            responses stored by any process of the host
+        :param write_behind: Optional `WriteBehindQueue` sending the POST
+            requests of assignments (`client.x.y = {...}`) in the background
+        :param msgpack: Ask for MessagePack responses, which need the
+            `msgpack` package, falling back to JSON with servers that don't
+            support it. Once the server has answered with MessagePack,
+            `http_body` is sent as MessagePack too
+        :param scheduler: Optional `PriorityScheduler` deciding which calls
+            get a connection first, by their `http_priority`
+        :param token_provider: `TokenProvider` supplying expiring tokens as
+            the Authorization HTTP header, instead of `username` and
+            `password` or `authorization`
+        :param decode: 'records' or 'columns' to decode the items of list
+            responses into compact `__slots__` records or a column table
+            instead of dicts, see `rest_client.records`
         """
         self._base_url = base_url
+        self._hosts = HostPool(base_url)
+        if token_provider is not None and (
+                username is not None or password is not None or
+                authorization is not None):
+            raise ValueError('token_provider can\'t be combined with other '
+                             'credentials')
         if username is not None and password is not None:
-            self._auth = HTTPBasicAuth(username, password)
+            self._auth = HTTPAuthorizationHeaderAuth(
+                basic_authorization(username, password))
+        elif token_provider is not None:
+            self._auth = token_provider
         elif authorization is not None:
             self._auth = HTTPAuthorizationHeaderAuth(authorization)
         else:
             self._auth = None
+        self._tokens = token_provider
+        if decode is not None:
+            from .records import MODES
+            if decode not in MODES:
+                raise ValueError('Unknown decode mode {}'.format(decode))
+        self._decode = decode
+        # Layouts of the endpoints not declared at generation, inferred from
+        # their first response
+        self._layouts = {}
         self._verify = verify
         self._headers = headers
+        self._timeout = timeout
+        self._timeouts = timeouts or {}
+        self._hedging = hedging
+        self._transport = transport or RequestsTransport()
+        self._lazy_responses = lazy_responses
+        self._metrics = metrics
+        self._cache = cache
+        self._write_behind = write_behind
+        if msgpack:
+            # Fail early rather than on the first response
+            import msgpack  # noqa
+        self._msgpack = bool(msgpack)
+        self._msgpack_accepted = False
+        self._scheduler = scheduler
+
+    def _timeout_for(self, name):
+        """
+        Look up the timeout of an endpoint name, falling back to its
+        enclosing namespaces and finally to the Client default.
+        """
+        parts = name.split('__')
+        while parts:
+            key = '__'.join(parts)
+            if key in self._timeouts:
+                return self._timeouts[key]
+            parts.pop()
+        return self._timeout
+
+    def _dispatch(self, name, method, path, deadline=None, priority=None,
+                  **kwargs):
+        """
+        Send a request for the endpoint `name`, answering GET requests from
+        the cache when one is set and the stored response is still fresh.
+        Stale responses are revalidated with a conditional request.
+
+        Responses served from the cache aren't recorded in the metrics, as
+        no request was made. Responses without caching headers are kept
+        for the `max_age` of their view when known from the endpoint
+        metadata, and for the cache's `default_ttl` otherwise. Errors of
+        the cache, e.g. when other processes keep it locked, make lookups
+        misses and leave responses unstored.
+
+        Methods the metadata doesn't list for the endpoint raise
+        `MethodNotAllowed` without sending anything.
+        """
+        metadata = METADATA.get(name) or {}
+        methods = metadata.get('methods')
+        if methods is not None and method.lower() not in methods:
+            raise MethodNotAllowed('{} doesn\'t allow {}, only {}'.format(
+                name, method.upper(), ', '.join(methods).upper()))
+        if self._scheduler is not None and priority is None:
+            # Attempts may be sent from other threads, the priority of
+            # this one is looked up now
+            priority = self._scheduler.current()
+        kwargs['priority'] = priority
+        if self._cache is None or method.lower() != 'get':
+            return self._request(name, method, path, deadline, **kwargs)
+
+        import sqlite3
+        from .cache import cache_key, conditional_headers
+        key = cache_key(path, kwargs.get('headers'),
+                        self._auth and self._auth.authorization,
+                        self._hosts.group)
+        try:
+            cached = self._cache.get(key)
+        except sqlite3.Error:
+            # A busy cache is a miss rather than an error of the call
+            cached = None
+        if cached is not None:
+            if cached.expires > time.time():
+                return self._cached_response(path, cached)
+            kwargs['headers'] = dict(kwargs.get('headers') or {},
+                                     **conditional_headers(cached))
+
+        response = self._request(name, method, path, deadline, **kwargs)
+        default_ttl = metadata.get('max_age')
+        if cached is not None and response.status_code == 304:
+            try:
+                self._cache.refresh(key, response.headers, default_ttl)
+            except sqlite3.Error:
+                pass
+            return self._cached_response(path, cached)
+        try:
+            self._cache.set(key, response.status_code, response.headers,
+                            response.content, default_ttl)
+        except sqlite3.Error:
+            pass
+        return response
+
+    def _compact(self, name, data, mode):
+        """
+        Decode the items of a list response in `mode`, with the layout of
+        the endpoint `name`
+        """
+        from .records import compact
+        layout = self._layouts.get(name) or LAYOUTS.get(name)
+        data, fields = compact(data, mode, layout)
+        if fields is not None:
+            self._layouts[name] = fields
+        return data
+
+    def _cached_response(self, path, cached):
+        from .transport import build_response
+        return build_response(
+            urlparse.urljoin(self._hosts.base_urls[0], path),
+            cached.status_code, cached.headers, cached.content
+        )
+
+    def _request(self, name, method, path, deadline=None, priority=None,
+                 **kwargs):
+        """
+        Send a request for the endpoint `name`, hedging it if enabled.
+
+        When a deadline (seconds or a `Deadline` instance) is given, every
+        attempt has its timeout capped to whatever is left of it, and the
+        remaining time is sent to the server so it can drop work that is
+        already too late.
+        """
+        if deadline is not None and not isinstance(deadline, Deadline):
+            deadline = Deadline(deadline)
+        send = partial(self._send, method, path, deadline, priority=priority,
+                       idempotent=self._idempotent(name, method), **kwargs)
+        if self._hedging is not None and method.lower() in IDEMPOTENT_METHODS:
+            send = partial(self._hedging.send, name, send)
+        if self._metrics is None:
+            return send()
+
+        started = time.time()
+        try:
+            response = send()
+        except Exception:
+            self._metrics.observe(name, method.upper(), time.time() - started)
+            raise
+        self._metrics.observe(
+            name, method.upper(), time.time() - started, response.status_code,
+            body_size(kwargs.get('data')), len(response.content or '')
+        )
+        return response
+
+    def _idempotent(self, name, method):
+        """
+        Whether a request can be sent again safely: GET, HEAD and OPTIONS
+        requests, and those the endpoint metadata lists as idempotent (e.g.
+        the PUT of a Django REST framework update)
+        """
+        method = method.lower()
+        if method in IDEMPOTENT_METHODS:
+            return True
+        metadata = METADATA.get(name)
+        return metadata is not None and method in metadata.get(
+            'idempotent', ())
+
+    def _send(self, method, path, deadline, headers, timeout, priority=None,
+              idempotent=None, **kwargs):
+        """
+        Try the base urls in turn until one of them answers.
+
+        Idempotent requests fail over to the next base url on any error and
+        on 502, 503 and 504 responses. Other requests only fail over when
+        connecting timed out, as otherwise the server may have processed
+        them already.
+
+        With a scheduler, every attempt waits for a slot of its priority
+        class, for no longer than the deadline allows.
+
+        With a token provider, a request rejected with a 401 is replayed
+        once with the token that replaces the rejected one.
+        """
+        scheduler = self._scheduler
+        tokens = self._tokens
+        if idempotent is None:
+            idempotent = method.lower() in IDEMPOTENT_METHODS
+        base_urls = self._hosts.attempt_order()
+        for attempt, base_url in enumerate(base_urls, 1):
+            last_attempt = attempt == len(base_urls)
+            if deadline is not None:
+                timeout = deadline.cap(timeout)
+                headers = dict(headers)
+                headers[DEADLINE_HEADER] = str(
+                    int(deadline.remaining() * 1000))
+
+            url = urlparse.urljoin(base_url, path)
+            auth = self._auth
+            if tokens is not None:
+                # The exact token sent is needed to report it if rejected
+                auth = HTTPAuthorizationHeaderAuth(tokens.authorization)
+            if scheduler is not None and not scheduler.acquire(
+                    priority, deadline and deadline.remaining()):
+                raise DeadlineExceeded(
+                    'Deadline exceeded waiting for a connection')
+            started = time.time()
+            self._hosts.start(base_url)
+            try:
+                response = self._transport.send(
+                    method, url, auth=auth, headers=headers,
+                    timeout=timeout, **kwargs
+                )
+                if response.status_code == 401 and tokens is not None:
+                    response.close()
+                    auth = HTTPAuthorizationHeaderAuth(
+                        tokens.invalidate(auth.authorization))
+                    response = self._transport.send(
+                        method, url, auth=auth, headers=headers,
+                        timeout=timeout, **kwargs
+                    )
+            except Exception as exc:
+                from requests.exceptions import ConnectTimeout
+                if isinstance(exc, TokenRefreshError):
+                    # Not a failure of the host
+                    self._hosts.cancel(base_url)
+                    raise
+                self._hosts.failure(base_url)
+                if last_attempt or not (idempotent or
+                                        isinstance(exc, ConnectTimeout)):
+                    raise
+                continue
+            finally:
+                if scheduler is not None:
+                    scheduler.release()
+
+            if response.status_code in FAILOVER_STATUSES:
+                self._hosts.failure(base_url)
+                if idempotent and not last_attempt:
+                    response.close()
+                    continue
+            else:
+                self._hosts.success(base_url, time.time() - started)
+            return response
+
+    def host_stats(self):
+        """
+        Latency, requests in flight, failures and ejection state of each
+        base url, as used to balance requests, see `HostPool.stats`
+        """
+        return self._hosts.stats()
+
+    def warmup(self, connections=1, probes=(), probe_method='options',
+               background=False):
+        """
+        Pre-open `connections` pooled connections to every base url so the
+        first requests don't pay for DNS resolution and TCP and TLS
+        handshakes.
+
+        A `probe_method` request is also sent to every base url for each of
+        the endpoint names in `probes`, which can't take url arguments.
+        Warming up is best effort and failures are ignored.
+
+        With `background=True` the work is done in a daemon thread, which is
+        returned so the caller can `join` it.
+        """
+        for name in probes:
+            if '{' in ENDPOINTS[name]:
+                raise ValueError(
+                    '{} needs url arguments and can\'t be probed'.format(name))
+        if background:
+            thread = threading.Thread(
+                target=self.warmup,
+                args=(connections, probes, probe_method)
+            )
+            thread.daemon = True
+            thread.start()
+            return thread
+
+        warmup = getattr(self._transport, 'warmup', None)
+        headers = dict(JSON_HEADERS)
+        headers.update(self._headers)
+        for base_url in self._hosts.base_urls:
+            try:
+                if warmup is not None:
+                    warmup(base_url, connections, self._verify)
+                for name in probes:
+                    self._transport.send(
+                        probe_method,
+                        urlparse.urljoin(base_url, ENDPOINTS[name]),
+                        auth=self._auth, headers=headers,
+                        verify=self._verify, timeout=self._timeout_for(name)
+                    ).close()
+            except Exception:
+                continue
 
     def __getattr__(self, name):
-        return ApiChunk(self._base_url, self._auth, name, self._verify,
-                        self._headers)
+        return ApiChunk(self, name)
@@ -0,0 +1,49 @@
+"""
+Local validation and coercion of url arguments.
+
+The generator keeps, for every url argument of an endpoint, a descriptor
+of the regular expression the server matches it against: one of the names
+in `CONVERTER_PATTERNS` or the regular expression itself. Arguments that
+could never match are rejected before any request is sent.
+"""
+
+import re
+
+
+CONVERTER_PATTERNS = {
+    'int': r'\d+',
+    'slug': r'[-a-zA-Z0-9_]+',
+    'str': r'[^/]+',
+}
+
+_compiled = {}
+
+
+def converter_regex(descriptor):
+    regex = _compiled.get(descriptor)
+    if regex is None:
+        pattern = CONVERTER_PATTERNS.get(descriptor, descriptor)
+        regex = _compiled[descriptor] = re.compile(
+            '(?:{})\\Z'.format(pattern), re.UNICODE)
+    return regex
+
+
+def convert(descriptor, name, value):
+    """
+    Return `value` as it has to appear in the url, raising ValueError if it
+    can't match the server side pattern for the argument `name`.
+    """
+    if descriptor == 'int' and isinstance(value, (int, long)):
+        if isinstance(value, bool) or value < 0:
+            raise ValueError('Invalid value {!r} for {}: expected a '
+                             'non-negative integer'.format(value, name))
+        return str(value)
+
+    if value is None:
+        raise ValueError('Missing value for {}'.format(name))
+    if not isinstance(value, basestring):
+        value = unicode(value)
+    if not converter_regex(descriptor).match(value):
+        raise ValueError('Invalid value {!r} for {}: must match {}'.format(
+            value, name, CONVERTER_PATTERNS.get(descriptor, descriptor)))
+    return value
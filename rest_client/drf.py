@@ -0,0 +1,75 @@
+"""
+Server side support for the client's options, for Django REST framework
+APIs.
+
+The renderer and parser only have the attributes and methods Django REST
+framework looks up, so this module can be imported without it.
+"""
+
+from .formats import decode_msgpack, encode_msgpack, MSGPACK
+
+
+# Query argument of the fields to include, see `rest_client.client`
+FIELDS_PARAM = 'fields'
+
+
+class SparseFieldsMixin(object):
+    """
+    Serializer mixin leaving out the fields not listed in the `fields` query
+    argument, a comma separated list of names, so clients only pay for
+    serializing, transferring and decoding the fields they use:
+
+        class ThingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+            ...
+
+    Every field is included when the argument is missing. Unknown names are
+    ignored.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(SparseFieldsMixin, self).__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+        query = getattr(request, 'query_params', request.GET)
+        requested = query.get(FIELDS_PARAM)
+        if not requested:
+            return
+        requested = set(name.strip() for name in requested.split(','))
+        for name in list(self.fields):
+            if name not in requested:
+                self.fields.pop(name)
+
+
+class MessagePackRenderer(object):
+    """
+    Renderer answering clients created with `Client(msgpack=True)` in
+    MessagePack. Add it to the DEFAULT_RENDERER_CLASSES setting, after the
+    JSON renderer so other clients still get JSON.
+    """
+
+    media_type = MSGPACK
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return ''
+        return encode_msgpack(data)
+
+
+class MessagePackParser(object):
+    """
+    Parser of MessagePack request bodies, to add to the
+    DEFAULT_PARSER_CLASSES setting.
+    """
+
+    media_type = MSGPACK
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return decode_msgpack(stream.read())
+        except Exception as exc:
+            from rest_framework.exceptions import ParseError
+            raise ParseError('MessagePack parse error - {}'.format(exc))
@@ -1 +1,2 @@
 ENDPOINTS = {}
+CONVERTERS = {}
@@ -0,0 +1,70 @@
+"""
+Encoding and decoding of request and response bodies.
+
+JSON is always available. MessagePack is more compact and faster to encode
+and decode, particularly for numbers, and is used when the `msgpack`
+package is installed and both sides agree on it.
+"""
+
+import json
+
+
+JSON = 'application/json'
+MSGPACK = 'application/x-msgpack'
+
+# Media types MessagePack bodies are known by
+MSGPACK_TYPES = (MSGPACK, 'application/msgpack')
+
+# Accept header preferring MessagePack but still accepting JSON from servers
+# which don't support it
+MSGPACK_ACCEPT = '{}, {};q=0.9'.format(MSGPACK, JSON)
+
+
+def media_type(headers):
+    """
+    Media type of the Content-Type header, without its parameters
+    """
+    value = headers.get('Content-Type') or ''
+    return value.split(';', 1)[0].strip().lower()
+
+
+def is_msgpack(headers):
+    return media_type(headers) in MSGPACK_TYPES
+
+
+def _encode_extra(value):
+    """
+    Encode the values JSON encoders of Django REST framework support but
+    MessagePack doesn't
+    """
+    import datetime
+    import decimal
+    import uuid
+
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError('{!r} can\'t be encoded as MessagePack'.format(value))
+
+
+def encode_msgpack(data):
+    import msgpack
+    return msgpack.packb(data, use_bin_type=True, default=_encode_extra)
+
+
+def decode_msgpack(content):
+    if not content:
+        return None
+    import msgpack
+    return msgpack.unpackb(content, raw=False)
+
+
+def decode(content, headers):
+    """
+    Decode a body according to its Content-Type header, as JSON unless it
+    is MessagePack.
+    """
+    if is_msgpack(headers):
+        return decode_msgpack(content)
+    return json.loads(content) if content else None
@@ -0,0 +1,387 @@
+"""
+Concurrent execution of chained API calls.
+
+A workflow fetching an object, then its children, then related lookups is
+a graph of calls: some take arguments from the results of others while
+the rest are independent. `CallGraph` records the calls with references to
+the results they need, then runs every call as soon as its inputs are
+known, the independent ones concurrently:
+
+    graph = CallGraph()
+    campaign = graph.call(client.campaigns.campaign_detail, pk=42)
+    advertiser = graph.call(client.advertisers.advertiser_detail,
+                            pk=campaign['advertiser'])
+    creatives = graph.map(client.creatives.creative_detail,
+                          campaign['creatives'], pk=ITEM)
+    results = graph.run(workers=8)
+    results[advertiser], results[creatives]
+
+Identical GET calls (same endpoint and arguments once resolved) are only
+sent once per run, and their result is shared.
+"""
+
+import heapq
+from operator import itemgetter
+import Queue
+import threading
+
+from .hedging import IDEMPOTENT_METHODS
+
+
+class GraphError(ValueError):
+    """
+    Raised by `CallGraph.run` when some calls failed. `errors` maps them to
+    their exception and `results` holds the results of the calls which
+    didn't fail nor depend on a failed one.
+    """
+
+    def __init__(self, errors, results):
+        super(GraphError, self).__init__(
+            '{} calls failed, first error: {!r}'.format(
+                len(errors), next(iter(errors.values()))))
+        self.errors = errors
+        self.results = results
+
+
+class Ref(object):
+    """
+    Reference to the result of a call, or to a part of it: `ref['key']`
+    refers to an item of the result and `ref.apply(function)` to what
+    `function` returns for it.
+    """
+
+    __slots__ = ('node', 'getters')
+
+    def __init__(self, node, getters=()):
+        self.node = node
+        self.getters = getters
+
+    def __getitem__(self, key):
+        return Ref(self.node, self.getters + (itemgetter(key),))
+
+    def apply(self, function):
+        return Ref(self.node, self.getters + (function,))
+
+    def __iter__(self):
+        # Would otherwise iterate forever through __getitem__
+        raise TypeError('References can\'t be iterated, see CallGraph.map')
+
+    def resolve(self, results, item=None):
+        value = item if self.node is None else results[self.node]
+        for getter in self.getters:
+            value = getter(value)
+        return value
+
+
+# Placeholder for the item of the list a `CallGraph.map` call is made for
+ITEM = Ref(None)
+
+
+def _references(value):
+    """
+    Calls the references found in arguments depend on
+    """
+    if isinstance(value, Ref):
+        if value.node is not None:
+            yield value.node
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            for node in _references(item):
+                yield node
+    elif isinstance(value, dict):
+        for item in value.values():
+            for node in _references(item):
+                yield node
+
+
+def _resolve(value, results, item=None):
+    if isinstance(value, Ref):
+        return value.resolve(results, item)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_resolve(element, results, item)
+                           for element in value)
+    if isinstance(value, dict):
+        return dict((key, _resolve(element, results, item))
+                    for key, element in value.items())
+    return value
+
+
+def _freeze(value):
+    """
+    Hashable equivalent of resolved arguments
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(element) for element in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(element))
+                            for key, element in value.items()))
+    hash(value)
+    return value
+
+
+class Call(Ref):
+    """
+    Call of an endpoint in a `CallGraph`, also a reference to its result.
+    With `over`, the endpoint is called for every item of that list and the
+    result is the list of results.
+    """
+
+    __slots__ = ('chunk', 'args', 'kwargs', 'over', 'dependencies',
+                 'index')
+
+    def __init__(self, chunk, args, kwargs, over, index):
+        super(Call, self).__init__(self)
+        self.chunk = chunk
+        self.args = args
+        self.kwargs = kwargs
+        self.over = over
+        self.index = index
+        self.dependencies = set(_references((args, kwargs, over)))
+
+    def key(self, args, kwargs):
+        """
+        Identity of a call with resolved arguments, or None if it must not
+        be shared with identical calls
+        """
+        method = kwargs.get('http_method', 'get')
+        if method.lower() not in IDEMPOTENT_METHODS:
+            return None
+        try:
+            return (id(self.chunk.client), self.chunk.name, _freeze(args),
+                    _freeze(kwargs))
+        except TypeError:
+            return None
+
+    def __repr__(self):
+        return '<Call {} {}>'.format(self.index, self.chunk.name)
+
+
+class _Task(object):
+    """
+    A single request of a call: the only one of a plain call or the one of
+    an item of a map
+    """
+
+    __slots__ = ('node', 'position', 'args', 'kwargs', 'key')
+
+    def __init__(self, node, position, args, kwargs):
+        self.node = node
+        self.position = position
+        self.args = args
+        self.kwargs = kwargs
+        self.key = node.key(args, kwargs)
+
+
+_STOP = object()
+
+
+class CallGraph(object):
+    """
+    Calls to run together, each one as soon as the results it references
+    are available.
+    """
+
+    def __init__(self):
+        self.nodes = []
+
+    def call(self, chunk, *args, **kwargs):
+        """
+        Add a call of the endpoint `chunk` (e.g. `client.things.thing_list`)
+        with arguments which can be references to other results, including
+        within lists and dictionaries such as `http_body`.
+        """
+        return self._add(chunk, args, kwargs, None)
+
+    def map(self, chunk, over, *args, **kwargs):
+        """
+        Add a call of `chunk` for every item of the list `over` refers to.
+        `ITEM` in the arguments stands for the item, e.g. `pk=ITEM['id']`.
+        """
+        return self._add(chunk, args, kwargs, over)
+
+    def _add(self, chunk, args, kwargs, over):
+        node = Call(chunk, args, kwargs, over, len(self.nodes))
+        for dependency in node.dependencies:
+            if (dependency.index >= len(self.nodes) or
+                    self.nodes[dependency.index] is not dependency):
+                raise ValueError(
+                    '{!r} belongs to another graph'.format(dependency))
+        self.nodes.append(node)
+        return node
+
+    def _heights(self):
+        """
+        Length of the longest chain of calls starting at each call, to
+        start the ones on the critical path first
+        """
+        heights = [1] * len(self.nodes)
+        for node in reversed(self.nodes):
+            for dependency in node.dependencies:
+                heights[dependency.index] = max(heights[dependency.index],
+                                                heights[node.index] + 1)
+        return heights
+
+    def run(self, workers=8):
+        """
+        Run every call over `workers` threads sharing the clients' pools,
+        and return a dictionary of the result of each call. Raises
+        `GraphError` if some failed; the calls depending on them are then
+        not made. Calls without an `http_priority` have the scheduler
+        priority of the calling thread.
+        """
+        return _Run(self, workers).execute()
+
+
+class _Run(object):
+
+    def __init__(self, graph, workers):
+        self.graph = graph
+        self.workers = workers
+        self.heights = graph._heights()
+        self.dependents = dict((node, []) for node in graph.nodes)
+        self.waiting = {}
+        for node in graph.nodes:
+            self.waiting[node] = len(node.dependencies)
+            for dependency in node.dependencies:
+                self.dependents[dependency].append(node)
+
+        self.results = {}
+        self.errors = {}
+        # Partial results of maps and how many of their items are left
+        self.partial = {}
+        self.remaining = {}
+        # Tasks ready to start, the most urgent first
+        self.ready = []
+        # Tasks sent or waiting for an identical one, by key
+        self.inflight = {}
+        self.shared = {}
+        self.running = 0
+
+    def execute(self):
+        tasks = Queue.Queue()
+        done = Queue.Queue()
+        threads = []
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._work, args=(tasks, done))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        try:
+            for node in self.graph.nodes:
+                if not node.dependencies:
+                    self._start(node)
+            while True:
+                self._dispatch(tasks)
+                if not self.running:
+                    break
+                task, value, error = done.get()
+                self.running -= 1
+                self._complete(task, value, error)
+        finally:
+            for _ in threads:
+                tasks.put(_STOP)
+
+        if self.errors:
+            raise GraphError(self.errors, self.results)
+        return self.results
+
+    def _work(self, tasks, done):
+        while True:
+            task = tasks.get()
+            if task is _STOP:
+                return
+            try:
+                value = task.node.chunk(*task.args, **task.kwargs)
+            except Exception as exc:
+                done.put((task, None, exc))
+            else:
+                done.put((task, value, None))
+
+    def _start(self, node):
+        """
+        Turn a call whose dependencies are done into tasks
+        """
+        try:
+            if node.over is None:
+                items = [None]
+            else:
+                items = list(_resolve(node.over, self.results))
+            tasks = [
+                _Task(node, position,
+                      _resolve(node.args, self.results, item),
+                      self._prioritize(
+                          node, _resolve(node.kwargs, self.results, item)))
+                for position, item in enumerate(items)
+            ]
+        except Exception as exc:
+            return self._fail(node, exc)
+
+        if node.over is not None:
+            self.partial[node] = [None] * len(tasks)
+            self.remaining[node] = len(tasks)
+            if not tasks:
+                return self._finish(node, [])
+        priority = -self.heights[node.index]
+        for task in tasks:
+            heapq.heappush(self.ready, (priority, node.index, task.position,
+                                        task))
+
+    def _prioritize(self, node, kwargs):
+        """
+        Give a call the priority of the thread running the graph, as the
+        workers sending it have their own
+        """
+        scheduler = node.chunk.client._scheduler
+        if scheduler is not None and kwargs.get('http_priority') is None:
+            kwargs['http_priority'] = scheduler.current()
+        return kwargs
+
+    def _dispatch(self, tasks):
+        while self.ready and self.running < self.workers:
+            task = heapq.heappop(self.ready)[-1]
+            if task.node in self.errors:
+                # Another item of the same map failed
+                continue
+            if task.key is not None:
+                if task.key in self.shared:
+                    self._complete(task, self.shared[task.key], None)
+                    continue
+                if task.key in self.inflight:
+                    self.inflight[task.key].append(task)
+                    continue
+                self.inflight[task.key] = [task]
+            self.running += 1
+            tasks.put(task)
+
+    def _complete(self, task, value, error):
+        if task.key is not None and task.key in self.inflight:
+            if error is None:
+                self.shared[task.key] = value
+            duplicates = self.inflight.pop(task.key)
+        else:
+            duplicates = [task]
+        for duplicate in duplicates:
+            node = duplicate.node
+            if node in self.errors:
+                continue
+            if error is not None:
+                self._fail(node, error)
+            elif node.over is None:
+                self._finish(node, value)
+            else:
+                self.partial[node][duplicate.position] = value
+                self.remaining[node] -= 1
+                if not self.remaining[node]:
+                    self._finish(node, self.partial.pop(node))
+
+    def _finish(self, node, value):
+        self.results[node] = value
+        for dependent in self.dependents[node]:
+            self.waiting[dependent] -= 1
+            if not self.waiting[dependent]:
+                self._start(dependent)
+
+    def _fail(self, node, error):
+        # Dependents are left waiting forever, and so never started
+        self.errors[node] = error
+        self.partial.pop(node, None)
@@ -0,0 +1,145 @@
+"""
+Hedged requests for idempotent calls.
+
+When a response takes longer than most responses to the same endpoint
+usually do, a duplicate request is sent and whichever answers first is used.
+This trades a small amount of extra load for a much shorter latency tail.
+"""
+
+from collections import deque
+import os
+import Queue
+import threading
+import time
+
+
+IDEMPOTENT_METHODS = ('get', 'head', 'options')
+
+
+class HedgingPolicy(object):
+    """
+    Decide when a duplicate request is worth sending.
+
+    The hedge delay for an endpoint name is the given percentile of its
+    recently observed latencies, clamped between `min_delay` and
+    `max_delay`. Until enough samples have been collected `initial_delay`
+    is used.
+
+    The extra load is capped by `budget`: every request earns `budget`
+    tokens (up to `burst`) and every hedge spends one, so with the default
+    of 0.05 hedges never add more than 5% of extra requests.
+    """
+
+    def __init__(self, percentile=95, initial_delay=0.1, min_delay=0.005,
+                 max_delay=1.0, budget=0.05, burst=10, window=200,
+                 min_samples=20):
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.burst = burst
+        self.window = window
+        self.min_samples = min_samples
+
+        self.hedges = 0
+        self.requests = 0
+
+        self._latencies = {}
+        self._tokens = float(burst)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def delay(self, name):
+        latencies = sorted(self._latencies.get(name, ()))
+        if len(latencies) < self.min_samples:
+            return self.initial_delay
+        index = int(len(latencies) * self.percentile / 100.0)
+        delay = latencies[min(index, len(latencies) - 1)]
+        return min(max(delay, self.min_delay), self.max_delay)
+
+    def record(self, name, latency):
+        with self._lock:
+            if name not in self._latencies:
+                self._latencies[name] = deque(maxlen=self.window)
+            self._latencies[name].append(latency)
+
+    def _start(self):
+        if self._pid != os.getpid():
+            # Forked while another thread may have held the lock, which
+            # would then never be released in this process
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self._tokens + self.budget, self.burst)
+
+    def _take_token(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedges += 1
+            return True
+
+    def send(self, name, send):
+        """
+        Perform `send()` (a callable returning a response) hedging it if
+        the response is slow.
+
+        Once a response is used the other attempt, if still in flight, is
+        left to finish on its own thread and its response is closed and
+        discarded. An exception is only raised when every attempt failed.
+        """
+        self._start()
+        results = Queue.Queue()
+        state = {'done': False, 'pending': 0}
+        lock = threading.Lock()
+
+        def attempt():
+            started = time.time()
+            try:
+                result = (send(), None)
+            except Exception as exc:
+                result = (None, exc)
+            else:
+                self.record(name, time.time() - started)
+            with lock:
+                state['pending'] -= 1
+                discard = state['done']
+                if not discard:
+                    results.put(result)
+            if discard and result[0] is not None:
+                result[0].close()
+
+        def launch():
+            with lock:
+                state['pending'] += 1
+            thread = threading.Thread(target=attempt)
+            thread.daemon = True
+            thread.start()
+
+        launch()
+        try:
+            response, exc = results.get(timeout=self.delay(name))
+        except Queue.Empty:
+            if self._take_token():
+                launch()
+            response, exc = results.get()
+
+        while exc is not None:
+            with lock:
+                # The other attempt may have answered since this one failed
+                if not state['pending'] and results.empty():
+                    break
+            response, exc = results.get()
+
+        with lock:
+            state['done'] = True
+        while not results.empty():
+            late_response, _ = results.get_nowait()
+            if late_response is not None:
+                late_response.close()
+        if exc is not None:
+            raise exc
+        return response
@@ -0,0 +1,99 @@
+"""
+Helpers to defer work from import time to first use.
+"""
+
+# Namespace of the endpoints which are in none, sharded together
+ROOT_NAMESPACE = ''
+
+
+def namespace_of(name):
+    """
+    Top-level namespace of an endpoint name, or `ROOT_NAMESPACE`
+    """
+    if '__' not in name:
+        return ROOT_NAMESPACE
+    return name.split('__', 1)[0]
+
+
+class LazyEndpoints(dict):
+    """
+    Dictionary of endpoints filled by calling `loader` the first time it is
+    read, so importing the client doesn't evaluate the whole endpoints
+    table of the generated package.
+
+    When a `shard_loader` is given, looking up a single endpoint only loads
+    the endpoints of its top-level namespace (or those outside of any
+    namespace, with `ROOT_NAMESPACE`): `shard_loader(namespace)`
+    returns them, or None when the package isn't sharded and the whole
+    table has to be loaded instead. Listing the endpoints still loads all
+    of them.
+    """
+
+    def __init__(self, loader, shard_loader=None):
+        super(LazyEndpoints, self).__init__()
+        self._loader = loader
+        self._loaded = False
+        self._shard_loader = shard_loader
+        self._shards = set()
+
+    def _load(self):
+        if not self._loaded:
+            self.update(self._loader())
+            self._loaded = True
+
+    def _load_key(self, key):
+        if self._loaded or dict.__contains__(self, key):
+            return
+        if self._shard_loader is None:
+            return self._load()
+        namespace = namespace_of(key)
+        if namespace in self._shards:
+            return
+        shard = self._shard_loader(namespace)
+        if shard is None:
+            self._shard_loader = None
+            return self._load()
+        self.update(shard)
+        # Only marked once updated, so other threads never see a loaded
+        # namespace without its endpoints
+        self._shards.add(namespace)
+
+    def __getitem__(self, key):
+        self._load_key(key)
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        self._load_key(key)
+        return dict.__contains__(self, key)
+
+    def __iter__(self):
+        self._load()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._load()
+        return dict.__len__(self)
+
+    def __repr__(self):
+        self._load()
+        return dict.__repr__(self)
+
+    def get(self, key, default=None):
+        self._load_key(key)
+        return dict.get(self, key, default)
+
+    def keys(self):
+        self._load()
+        return dict.keys(self)
+
+    def items(self):
+        self._load()
+        return dict.items(self)
+
+    def values(self):
+        self._load()
+        return dict.values(self)
+
+    def iteritems(self):
+        self._load()
+        return dict.iteritems(self)
@@ -0,0 +1,314 @@
+"""
+Load generator for generated API client packages.
+
+Drives requests through the regular `Client` code path of a generated
+package, following a scenario file, and reports throughput, error rates and
+latency histograms per endpoint.
+
+Usage:
+
+    python -m rest_client.loadgen my_api_client http://localhost:8000/ \\
+        scenario.json --concurrency=20 --duration=60
+
+A scenario file looks like:
+
+    {
+        "endpoints": [
+            {
+                "name": "users__user_detail",
+                "weight": 5,
+                "params": {"pk": {"randint": [1, 1000]}}
+            },
+            {
+                "name": "users__user_list",
+                "weight": 1,
+                "params": {"page": {"choice": [1, 2, 3]}}
+            }
+        ]
+    }
+
+Parameter values are sent as they are unless they are one of the
+generators `{"randint": [a, b]}`, `{"uniform": [a, b]}`,
+`{"choice": [...]}` or `{"sequence": start}`.
+"""
+
+from bisect import bisect_right
+import importlib
+import itertools
+import json
+from optparse import OptionParser
+import random
+import sys
+import threading
+import time
+
+from .metrics import Histogram, LATENCY_BUCKETS
+
+
+def make_generator(spec, rand):
+    """
+    Return a callable producing values for a scenario parameter
+    """
+    if isinstance(spec, dict) and len(spec) == 1:
+        kind, args = spec.items()[0]
+        if kind == 'randint':
+            return lambda: rand.randint(*args)
+        if kind == 'uniform':
+            return lambda: rand.uniform(*args)
+        if kind == 'choice':
+            return lambda: rand.choice(args)
+        if kind == 'sequence':
+            counter = itertools.count(args)
+            return lambda: next(counter)
+    return lambda: spec
+
+
+class EndpointScenario(object):
+
+    def __init__(self, name, weight=1, params=None, method='get',
+                 rand=random):
+        self.name = name
+        self.weight = weight
+        self.method = method
+        self.params = dict(
+            (key, make_generator(spec, rand))
+            for key, spec in (params or {}).items()
+        )
+
+    def call(self, client):
+        chunk = reduce(getattr, self.name.split('__'), client)
+        kwargs = dict((key, generate()) for key, generate
+                      in self.params.items())
+        if self.method != 'get':
+            kwargs['http_method'] = self.method
+        return chunk(**kwargs)
+
+
+def load_scenario(path, endpoints, seed=None):
+    """
+    Read a scenario file, checking that every endpoint name exists
+    """
+    rand = random.Random(seed)
+    with open(path) as scenario_file:
+        data = json.load(scenario_file)
+    scenario = []
+    for entry in data['endpoints']:
+        if entry['name'] not in endpoints:
+            raise ValueError('Unknown endpoint {}'.format(entry['name']))
+        scenario.append(EndpointScenario(
+            entry['name'], entry.get('weight', 1), entry.get('params'),
+            entry.get('method', 'get'), rand
+        ))
+    return scenario
+
+
+class Pacer(object):
+    """
+    Spread requests evenly to keep a global request rate
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_slot = time.time()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.time()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class EndpointStats(object):
+
+    def __init__(self):
+        self.latencies = Histogram()
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def record(self, latency, error=None):
+        with self.lock:
+            self.latencies.observe(latency)
+            if error is not None:
+                self.errors[error] = self.errors.get(error, 0) + 1
+
+    @property
+    def requests(self):
+        return self.latencies.count
+
+    @property
+    def error_count(self):
+        return sum(self.errors.values())
+
+
+def error_label(exc):
+    status_code = getattr(exc, 'status_code', None)
+    if status_code is not None:
+        return str(status_code)
+    return exc.__class__.__name__
+
+
+class LoadGenerator(object):
+    """
+    Run a scenario against a client from `concurrency` threads, optionally
+    limited to `rate` requests per second, until `duration` seconds have
+    passed or `requests` requests have been made.
+    """
+
+    def __init__(self, client, scenario, concurrency=10, rate=None,
+                 duration=None, requests=None, seed=None):
+        if duration is None and requests is None:
+            raise ValueError('Either a duration or a number of requests '
+                             'is needed')
+        self.client = client
+        self.scenario = scenario
+        self.concurrency = concurrency
+        self.pacer = Pacer(rate) if rate else None
+        self.duration = duration
+        self.requests = requests
+        self.random = random.Random(seed)
+        self.cumulative_weights = []
+        total = 0
+        for entry in scenario:
+            total += entry.weight
+            self.cumulative_weights.append(total)
+        self.stats = dict((entry.name, EndpointStats())
+                          for entry in scenario)
+        self.elapsed = None
+
+    def choose(self):
+        point = self.random.random() * self.cumulative_weights[-1]
+        return self.scenario[bisect_right(self.cumulative_weights, point)]
+
+    def worker(self, counter, stop_at):
+        while True:
+            if self.requests is not None and next(counter) >= self.requests:
+                return
+            if stop_at is not None and time.time() >= stop_at:
+                return
+            if self.pacer is not None:
+                self.pacer.wait()
+            entry = self.choose()
+            started = time.time()
+            try:
+                entry.call(self.client)
+            except Exception as exc:
+                self.stats[entry.name].record(time.time() - started,
+                                              error_label(exc))
+            else:
+                self.stats[entry.name].record(time.time() - started)
+
+    def run(self):
+        counter = itertools.count()
+        started = time.time()
+        stop_at = started + self.duration if self.duration else None
+        threads = [threading.Thread(target=self.worker,
+                                    args=(counter, stop_at))
+                   for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.time() - started
+        return self.stats
+
+
+def format_millis(seconds):
+    if seconds is None:
+        return '-'
+    if seconds == float('inf'):
+        return 'inf'
+    return '{:.1f}'.format(seconds * 1000)
+
+
+def format_report(stats, elapsed):
+    header = '{:<40} {:>9} {:>7} {:>9} {:>8} {:>8} {:>8}'
+    row = '{:<40} {:>9} {:>6.1f}% {:>9.1f} {:>8} {:>8} {:>8}'
+    lines = [header.format('endpoint', 'requests', 'errors', 'req/s',
+                           'p50 ms', 'p90 ms', 'p99 ms')]
+    for name in sorted(stats):
+        endpoint = stats[name]
+        latencies = endpoint.latencies
+        lines.append(row.format(
+            name,
+            endpoint.requests,
+            100.0 * endpoint.error_count / max(endpoint.requests, 1),
+            endpoint.requests / elapsed,
+            format_millis(latencies.percentile(50)),
+            format_millis(latencies.percentile(90)),
+            format_millis(latencies.percentile(99)),
+        ))
+    for name in sorted(stats):
+        endpoint = stats[name]
+        lines.append('')
+        lines.append(name)
+        if endpoint.errors:
+            lines.append('  errors: ' + ', '.join(
+                '{}={}'.format(label, count)
+                for label, count in sorted(endpoint.errors.items())))
+        bounds = LATENCY_BUCKETS + (float('inf'),)
+        for bound, count in zip(bounds, endpoint.latencies.counts):
+            if count:
+                lines.append('  <= {:>8} ms {:>9}'.format(
+                    format_millis(bound), count))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = OptionParser(
+        usage='%prog generated_package base_url scenario.json [options]')
+    parser.add_option('--concurrency', type='int', default=10,
+                      help='Number of concurrent workers')
+    parser.add_option('--rate', type='float',
+                      help='Target requests per second for all workers')
+    parser.add_option('--duration', type='float',
+                      help='Seconds to run for')
+    parser.add_option('--requests', type='int',
+                      help='Total number of requests to make')
+    parser.add_option('--username')
+    parser.add_option('--password')
+    parser.add_option('--authorization',
+                      help='Value of the Authorization header')
+    parser.add_option('--timeout', type='float',
+                      help='Timeout of every request, in seconds')
+    parser.add_option('--replay',
+                      help='Serve responses from a file recorded by '
+                           'RecordingTransport instead of the network')
+    parser.add_option('--seed', type='int',
+                      help='Seed for endpoint and parameter choices')
+    options, args = parser.parse_args(argv)
+    if len(args) != 3:
+        parser.error('generated_package, base_url and scenario are required')
+    if options.duration is None and options.requests is None:
+        options.duration = 10
+
+    package, base_url, scenario_path = args
+    client_module = importlib.import_module(package + '.client')
+
+    transport = None
+    if options.replay:
+        from .transport import ReplayTransport
+        transport = ReplayTransport(options.replay)
+
+    client = client_module.Client(
+        base_url, username=options.username, password=options.password,
+        authorization=options.authorization, timeout=options.timeout,
+        transport=transport
+    )
+    scenario = load_scenario(scenario_path, client_module.ENDPOINTS,
+                             options.seed)
+    generator = LoadGenerator(
+        client, scenario, concurrency=options.concurrency,
+        rate=options.rate, duration=options.duration,
+        requests=options.requests, seed=options.seed
+    )
+    stats = generator.run()
+    print format_report(stats, generator.elapsed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,100 +8,18 @@ Inspired by django-extensions management command `show_urls`
 https://github.com/django-extensions/django-extensions
 """
 
-import ast
-from distutils import core
-import imp
-import inspect
-import json
 from optparse import make_option
 import os
-import re
 import shutil
 
-from django.core.exceptions import ViewDoesNotExist
-from django.core.urlresolvers import RegexURLPattern, RegexURLResolver
 from django.core.management.base import BaseCommand, CommandError
 
-from rest_client import unparse
-
-
-def extract_info_from_urlpatterns(urlpatterns, url_base='', name_base='',
-                                  skip_namespaces=[]):
-    """
-    Obtain information about every pattern on input URL patterns
-
-    Iterates over urlpatterns list. If it finds an include, it recurses
-    into it. Found patterns are returned in a list of 3-tuples structure.
-    The 3-tuples includes view (callback), url and name information.
-    """
-    info = []
-    for urlpattern in urlpatterns:
-        try:
-            if isinstance(urlpattern, RegexURLPattern):
-                if not urlpattern.name:
-                    raise ValueError(
-                        '{} urlpattern doesn\'t have a name'.format(
-                            urlpattern._regex
-                        )
-                    )
-
-                name = urlpattern.name
-                if name_base:
-                    name = name_base + ':' + urlpattern.name
-
-                info.append((urlpattern.callback,
-                            url_base + urlpattern.regex.pattern,
-                            name))
-
-            elif (isinstance(urlpattern, RegexURLResolver) or
-                  hasattr(urlpattern, 'url_patterns')):
-
-                if urlpattern.namespace in skip_namespaces:
-                    continue
-
-                patterns = urlpattern.url_patterns
-
-                if name_base and urlpattern.namespace:
-                    namespace = name_base + ':' + urlpattern.namespace
-                elif name_base:
-                    namespace = name_base
-                elif urlpattern.namespace:
-                    namespace = urlpattern.namespace
-
-                info.extend(
-                    extract_info_from_urlpatterns(
-                        urlpatterns=patterns,
-                        url_base=url_base + urlpattern.regex.pattern,
-                        name_base=namespace,
-                        skip_namespaces=skip_namespaces
-                    )
-                )
-            else:
-                raise TypeError('{} does not appear to be a '
-                                'urlpattern object'.format(urlpattern))
-
-        except (ViewDoesNotExist, ImportError, ValueError) as exc:
-            print 'Skipping ... {}'.format(exc.message)
-            continue
-    return info
-
-
-def clean_patterns(urls_data):
-    ret = []
-    for _, pattern, name in urls_data:
-        pattern = re.sub(r'\(\?P<', '{', pattern)
-
-        # Remove number ranges
-        pattern = re.sub(r'\[\d-\d\]', '', pattern)
-        pattern = re.sub(r'>(\\[^/]+)?', '}', pattern)
-        pattern = filter(lambda c: c not in '+^$()[]', pattern)
-        pattern = re.sub('//', '/', pattern)
-
-        name = re.sub('-', '_', name)
-        name = re.sub(':', '__', name)
-
-        ret.append((name, pattern))
-    return ret
+from rest_client.management import generation
+from rest_client.management.generation import (  # noqa
+    clean_converters, clean_name, clean_patterns, extract_converters,
+    extract_info_from_urlpatterns, GENERATOR_ONLY, translate_patterns
+)
+from rest_client.management.profiling import PhaseProfiler
 
 
 class Command(BaseCommand):
@@ -122,6 +40,22 @@ class Command(BaseCommand):
             default='',
             help='Base url to prefix to all urls'
         ),
+        make_option(
+            '--profile',
+            action='store_true',
+            dest='profile',
+            default=False,
+            help='Report wall time and allocations of every phase'
+        ),
+        make_option(
+            '--profile_dump',
+            action='store',
+            dest='profile_dump',
+            default='',
+            help='Run every phase under cProfile and dump the stats of the '
+                 'slowest one to this file (implies --profile). The stats '
+                 'of run_setup are those of its setup.py subprocess'
+        ),
     )
 
     def __init__(self, *args, **kwargs):
@@ -134,75 +68,68 @@ class Command(BaseCommand):
                 'python manage.py generate_api_client '
                 'root_urls.py package_name package_version '
                 '[package_namespace] [--skip_namespaces=namespace_to_skip,..] '
-                '[--url_base=my_custom_url_prefix/]'
+                '[--url_base=my_custom_url_prefix/] '
+                '[--profile] [--profile_dump=slowest_phase.prof]'
             )
 
         root_module_path, name, version = args[:3]
         skip_namespaces = options.pop('skip_namespaces', '').split(',')
         url_base = options.pop('url_base', '')
-
-        if len(args) > 3:
-            namespace = args[3].replace('.', os.path.sep)
-            full_package = os.path.join(namespace, name)
-            base_package = namespace.split(os.path.sep)[0]
-        else:
-            full_package = name
-            base_package = name
-
-        conf = {
-            'NAME': name,
-            'VERSION': version,
-            'FULL_PACKAGE': full_package,
-            'BASE_PACKAGE': base_package,
-            'SKIP_NAMESPACES': skip_namespaces,
-            'URL_BASE': url_base
-        }
-
-        root_module_name = (
-            os.path.splitext(
-                root_module_path.replace('./', '')
-            )[0].replace('/', '.'))
-        root_urls_module = imp.load_source(root_module_name, root_module_path)
-
-        base_dir = self.create_client_package_base_dir()
-        self.copy_base_client_library(base_dir, conf)
-        self.write_endpoints(root_urls_module, base_dir, conf)
-        setup_file = self.copy_setup(base_dir, conf)
-        self.replace_macros(setup_file, conf)
-        self.run_setup(base_dir)
+        profile_dump = options.pop('profile_dump', '')
+        profiler = PhaseProfiler(enabled=options.pop('profile', False),
+                                 cprofile=bool(profile_dump))
+
+        namespace = args[3] if len(args) > 3 else None
+        conf = generation.make_conf(name, version, namespace,
+                                    skip_namespaces, url_base)
+
+        with profiler.phase('load_source'):
+            root_urls_module = generation.load_urls_module(
+                root_module_path)
+
+        with profiler.phase('copy_base_client_library'):
+            base_dir = self.create_client_package_base_dir()
+            self.copy_base_client_library(base_dir, conf)
+        skipped = []
+        skipped_namespaces = []
+        with profiler.phase('extract_info_from_urlpatterns'):
+            urls_data = self.extract_urls_data(root_urls_module, conf,
+                                               skipped, skipped_namespaces)
+        with profiler.phase('clean_patterns'):
+            endpoints, converters = translate_patterns(urls_data, skipped)
+            endpoints = dict(endpoints)
+            layouts = generation.extract_layouts(urls_data, endpoints)
+            metadata = generation.extract_metadata(urls_data, endpoints)
+        with profiler.phase('write_endpoints'):
+            self.write_endpoints_module(base_dir, conf, endpoints, converters,
+                                        layouts, metadata)
+        with profiler.phase('replace_macros'):
+            setup_file = self.copy_setup(base_dir, conf)
+            self.replace_macros(setup_file, conf)
+        with profiler.phase('run_setup'):
+            self.run_setup(base_dir,
+                           profiler.subprocess_profile('run_setup'))
+
+        if profiler.enabled:
+            self.stdout.write(profiler.report())
+            self.stdout.write('Patterns: {} processed, {} skipped'.format(
+                len(endpoints), len(skipped)))
+            if skipped_namespaces:
+                self.stdout.write('Namespaces skipped: {}'.format(
+                    ', '.join(skipped_namespaces)))
+        if profile_dump:
+            phase = profiler.dump_slowest(profile_dump)
+            self.stdout.write('cProfile stats of {} written to {}'.format(
+                phase, profile_dump))
 
     def replace_macros(self, setup_path, conf):
-        class MacroReplacer(ast.NodeTransformer):
-            def visit_Str(self, node):
-                if node.s.startswith('__') and node.s.endswith('__'):
-                    conf_key = re.sub('__', '', node.s)
-                    conf_value = conf.get(conf_key, conf_key)
-                    return ast.Str(conf_value)
-                else:
-                    return ast.Str(node.s)
-        with open(setup_path, 'r') as setup_file:
-            setup_content = setup_file.read()
-        original_setup = ast.parse(setup_content)
-        modified_setup = MacroReplacer().visit(original_setup)
-        with open(setup_path, 'w') as setup_file:
-            unparse.Unparser(modified_setup, setup_file)
-
-    def run_setup(self, base_dir):
-        previous_path = os.getcwd()
-        os.chdir(base_dir)
-        core.run_setup('setup.py', ['sdist'])
-        os.chdir(previous_path)
+        generation.replace_macros(setup_path, conf)
+
+    def run_setup(self, base_dir, profile_path=None):
+        generation.run_setup(base_dir, profile_path)
 
     def copy_setup(self, base_dir, conf):
-        setup_path = os.path.join(
-            base_dir, conf['FULL_PACKAGE'], 'setup_template.py')
-        destination = os.path.join(base_dir, 'setup.py')
-        shutil.copy(setup_path, destination)
-        shutil.copy(
-            os.path.join(base_dir, conf['FULL_PACKAGE'], 'MANIFEST.in'),
-            base_dir
-        )
-        return destination
+        return generation.copy_setup(base_dir, conf)
 
     def create_client_package_base_dir(self):
         base_dir_path = '_rest_client_build'
@@ -210,40 +137,34 @@ class Command(BaseCommand):
             os.makedirs(base_dir_path)
         return base_dir_path
 
+    def base_client_library_path(self):
+        return generation.base_client_library_path()
+
     def copy_base_client_library(self, base_dir, conf):
-        module = __import__('rest_client')
-        init_path = inspect.getsourcefile(module)
-        module_path = os.path.sep.join(init_path.split(os.path.sep)[:-1])
-        shutil.rmtree(base_dir)
-        shutil.copytree(
-            module_path, os.path.join(base_dir, conf['FULL_PACKAGE'])
-        )
-
-        partial_package = base_dir
-        for level in conf['FULL_PACKAGE'].split(os.path.sep):
-            partial_package = os.path.join(partial_package, level)
-            init_file_path = os.path.join(partial_package, '__init__.py')
-            with open(init_file_path, 'w+') as init_file:
-                init_file.write('from pkgutil import extend_path\n'
-                                '__path__ = extend_path(__path__, __name__)\n')
+        """
+        Copy the runtime modules of rest_client as the client package
+        """
+        if os.path.exists(base_dir):
+            # Our own build directory, possibly from a version of the
+            # command which didn't mark it
+            shutil.rmtree(base_dir)
+        generation.copy_base_client_library(base_dir, conf)
+
+    def extract_urls_data(self, root_urls_module, conf, skipped=None,
+                          skipped_namespaces=None):
+        return generation.extract_urls_data(root_urls_module, conf, skipped,
+                                            skipped_namespaces)
 
     def write_endpoints(self, root_urls_module, base_dir, conf):
-        urls = root_urls_module.urlpatterns
-        urls_data = extract_info_from_urlpatterns(
-            urlpatterns=urls,
-            url_base=conf['URL_BASE'],
-            name_base='',
-            skip_namespaces=conf['SKIP_NAMESPACES']
-        )
-        clean_urls = clean_patterns(urls_data)
-        ENDPOINTS = dict(clean_urls)
-
-        endpoints_path = os.path.join(
-            base_dir, conf['FULL_PACKAGE'], 'endpoints.py'
-        )
-
-        with open(endpoints_path, 'w+') as output_module:
-            output_module.write('ENDPOINTS = ')
-            output_module.write(json.dumps(ENDPOINTS, sort_keys=True,
-                                           indent=4, separators=(',', ': ')))
-            output_module.write('\n')
+        urls_data = self.extract_urls_data(root_urls_module, conf)
+        endpoints, converters = translate_patterns(urls_data)
+        endpoints = dict(endpoints)
+        self.write_endpoints_module(
+            base_dir, conf, endpoints, converters,
+            generation.extract_layouts(urls_data, endpoints),
+            generation.extract_metadata(urls_data, endpoints))
+
+    def write_endpoints_module(self, base_dir, conf, endpoints, converters,
+                               layouts=None, metadata=None):
+        generation.write_endpoints_module(base_dir, conf, endpoints,
+                                          converters, layouts, metadata)
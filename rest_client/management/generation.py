@@ -0,0 +1,649 @@
+"""
+Generation of client packages from Django url confs, usable as a library.
+
+Every function takes its input and output paths explicitly and nothing
+depends on the current directory, so several packages can be generated
+from the same process, or in parallel with `generate_clients`:
+
+    generate_clients([
+        {'urls_module': 'billing/urls.py', 'name': 'billing_client',
+         'version': '1.2.0', 'output_dir': 'build/billing'},
+        {'urls_module': 'billing/urls.py', 'name': 'billing_client',
+         'version': '1.3.0', 'output_dir': 'build/billing-next',
+         'skip_namespaces': ['internal']},
+    ])
+
+The `generate_api_client` management command is built on top of it.
+"""
+
+import ast
+from collections import namedtuple
+import importlib
+import imp
+import inspect
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+from django.core.exceptions import ViewDoesNotExist
+from django.core.urlresolvers import RegexURLPattern, RegexURLResolver
+
+from rest_client import unparse
+from rest_client.lazy import namespace_of
+from rest_client.management.patterns import translate, UntranslatablePattern
+
+
+# Parts of rest_client only needed to generate client packages, which are
+# left out of the generated packages
+GENERATOR_ONLY = (
+    'management', 'unparse.py', 'setup_template.py', 'MANIFEST.in', 'drf.py',
+    '*.pyc',
+)
+
+# File marking an output directory as written by the generator, and so safe
+# to replace
+BUILD_MARKER = '.rest_client_build'
+
+# Endpoints, converters, layouts and metadata of an url conf, ready to be
+# written into client packages. Only made of plain data, so it can be sent
+# to other processes.
+UrlTables = namedtuple('UrlTables', ('endpoints', 'converters', 'skipped',
+                                     'layouts', 'metadata',
+                                     'skipped_namespaces'))
+
+# Methods of a view which can be retried without changing the outcome, and
+# the Django REST framework actions making PUT and DELETE idempotent
+SAFE_METHODS = ('get', 'head', 'options')
+IDEMPOTENT_ACTIONS = {'put': 'update', 'delete': 'destroy'}
+
+# Cache-Control arguments of the cache_control decorator meaning responses
+# must not be reused without revalidation
+UNCACHED_DIRECTIVES = ('no_cache', 'no_store', 'private')
+
+# Levels of nested decorators searched for caching settings
+DECORATOR_DEPTH = 6
+
+
+def extract_info_from_urlpatterns(urlpatterns, url_base='', name_base='',
+                                  skip_namespaces=[], skipped=None,
+                                  skipped_namespaces=None):
+    """
+    Obtain information about every pattern on input URL patterns
+
+    Iterates over urlpatterns list. If it finds an include, it recurses
+    into it. Found patterns are returned in a list of 3-tuples structure.
+    The 3-tuples includes view (callback), url and name information.
+
+    The reasons why patterns or includes were skipped are appended to the
+    `skipped` list, and the namespaces left out because of
+    `skip_namespaces` to the `skipped_namespaces` list, when given.
+    """
+    info = []
+    for urlpattern in urlpatterns:
+        try:
+            if isinstance(urlpattern, RegexURLPattern):
+                if not urlpattern.name:
+                    raise ValueError(
+                        '{} urlpattern doesn\'t have a name'.format(
+                            urlpattern._regex
+                        )
+                    )
+
+                name = urlpattern.name
+                if name_base:
+                    name = name_base + ':' + urlpattern.name
+
+                info.append((urlpattern.callback,
+                            url_base + urlpattern.regex.pattern,
+                            name))
+
+            elif (isinstance(urlpattern, RegexURLResolver) or
+                  hasattr(urlpattern, 'url_patterns')):
+
+                if urlpattern.namespace in skip_namespaces:
+                    if skipped_namespaces is not None:
+                        skipped_namespaces.append(urlpattern.namespace)
+                    continue
+
+                patterns = urlpattern.url_patterns
+
+                if name_base and urlpattern.namespace:
+                    namespace = name_base + ':' + urlpattern.namespace
+                elif name_base:
+                    namespace = name_base
+                elif urlpattern.namespace:
+                    namespace = urlpattern.namespace
+
+                info.extend(
+                    extract_info_from_urlpatterns(
+                        urlpatterns=patterns,
+                        url_base=url_base + urlpattern.regex.pattern,
+                        name_base=namespace,
+                        skip_namespaces=skip_namespaces,
+                        skipped=skipped,
+                        skipped_namespaces=skipped_namespaces
+                    )
+                )
+            else:
+                raise TypeError('{} does not appear to be a '
+                                'urlpattern object'.format(urlpattern))
+
+        except (ViewDoesNotExist, ImportError, ValueError) as exc:
+            print 'Skipping ... {}'.format(exc.message)
+            if skipped is not None:
+                skipped.append(exc.message)
+            continue
+    return info
+
+
+def clean_name(name):
+    name = re.sub('-', '_', name)
+    return re.sub(':', '__', name)
+
+
+def translate_patterns(urls_data, skipped=None):
+    """
+    Translate url patterns into the client's endpoints and converters in a
+    single pass.
+
+    Patterns that can't be expressed as an url template are left out, and
+    the reason appended to the `skipped` list when given.
+    """
+    endpoints = []
+    converters = {}
+    for _, pattern, name in urls_data:
+        try:
+            template, pattern_converters = translate(pattern)
+        except UntranslatablePattern as exc:
+            print 'Skipping ... {}'.format(exc.message)
+            if skipped is not None:
+                skipped.append(exc.message)
+            continue
+        name = clean_name(name)
+        endpoints.append((name, template))
+        if pattern_converters:
+            converters[name] = pattern_converters
+    return endpoints, converters
+
+
+def view_layout(callback):
+    """
+    Fields of the items a view returns, from the `Meta.fields` of its
+    Django REST framework serializer class, or None if not declared
+    """
+    view_class = (getattr(callback, 'cls', None) or
+                  getattr(callback, 'view_class', None))
+    serializer_class = getattr(view_class, 'serializer_class', None)
+    fields = getattr(getattr(serializer_class, 'Meta', None), 'fields', None)
+    if (isinstance(fields, (list, tuple)) and fields and
+            all(isinstance(field, basestring) for field in fields)):
+        return list(fields)
+    return None
+
+
+def extract_layouts(urls_data, endpoints):
+    """
+    Layouts of the items of the endpoints whose views declare their
+    fields, see `rest_client.records`
+    """
+    layouts = {}
+    for callback, _, name in urls_data:
+        name = clean_name(name)
+        if name in endpoints:
+            fields = view_layout(callback)
+            if fields is not None:
+                layouts[name] = fields
+    return layouts
+
+
+def _closure_values(function, depth=DECORATOR_DEPTH, seen=None):
+    """
+    Values captured by a function and by the functions it captures, which
+    is where decorators keep their arguments
+    """
+    seen = set() if seen is None else seen
+    function = getattr(function, 'im_func', function)
+    if depth <= 0 or id(function) in seen:
+        return
+    seen.add(id(function))
+    for cell in getattr(function, 'func_closure', None) or ():
+        try:
+            value = cell.cell_contents
+        except ValueError:
+            # Empty cell
+            continue
+        yield value
+        if callable(value) and not inspect.isclass(value):
+            for nested in _closure_values(value, depth - 1, seen):
+                yield nested
+
+
+def view_class(callback):
+    """
+    Class of a class-based view: set on the view function by Django REST
+    framework and Django >= 1.9, only captured by it in older Django
+    versions
+    """
+    cls = (getattr(callback, 'cls', None) or
+           getattr(callback, 'view_class', None))
+    if cls is not None:
+        return cls
+    for value in _closure_values(callback, depth=1):
+        if inspect.isclass(value) and hasattr(value, 'http_method_names'):
+            return value
+    return None
+
+
+def view_methods(callback, cls):
+    """
+    HTTP methods a view handles and the name of the handler of each
+    """
+    actions = getattr(callback, 'actions', None)
+    if actions:
+        # A viewset, bound to its actions by a router
+        handlers = dict(actions)
+    else:
+        handlers = dict((method, method)
+                        for method in getattr(cls, 'http_method_names', ())
+                        if hasattr(cls, method))
+    if 'get' in handlers:
+        handlers.setdefault('head', handlers['get'])
+    if hasattr(cls, 'options'):
+        handlers.setdefault('options', 'options')
+    return handlers
+
+
+def cache_max_age(functions):
+    """
+    Seconds responses can be cached for according to the cache_page or
+    cache_control decorators of the view `functions`, 0 if they must not
+    be, or None without such decorators
+    """
+    for function in functions:
+        for value in _closure_values(function):
+            if hasattr(value, 'cache_timeout'):
+                # The middleware of cache_page
+                return int(value.cache_timeout)
+            if isinstance(value, dict):
+                if any(value.get(name) for name in UNCACHED_DIRECTIVES):
+                    return 0
+                if 'max_age' in value:
+                    return int(value['max_age'])
+    return None
+
+
+def is_idempotent(callback, cls, handlers, method):
+    """
+    Whether a method of a view can be retried safely: safe methods, and
+    PUT and DELETE when they are the update and destroy of Django REST
+    framework rather than custom handlers
+    """
+    if method in SAFE_METHODS:
+        return True
+    action = IDEMPOTENT_ACTIONS.get(method)
+    if action is None:
+        return False
+    if getattr(callback, 'actions', None):
+        return handlers[method] == action
+    return hasattr(cls, action)
+
+
+def view_metadata(callback):
+    """
+    What the client needs to know about a view: `methods` it allows,
+    `idempotent` ones that can be retried safely and `max_age`, the
+    seconds its responses can be cached for. Anything which can't be
+    found out is left out.
+    """
+    metadata = {}
+    cls = view_class(callback)
+    functions = [callback]
+    handlers = view_methods(callback, cls) if cls is not None else None
+    if handlers:
+        metadata['methods'] = sorted(handlers)
+        metadata['idempotent'] = sorted(
+            method for method in handlers
+            if is_idempotent(callback, cls, handlers, method))
+        if 'get' in handlers:
+            functions.append(getattr(cls, handlers['get'], None))
+        functions.append(getattr(cls, 'dispatch', None))
+    max_age = cache_max_age(function for function in functions
+                            if function is not None)
+    if max_age is not None:
+        metadata['max_age'] = max_age
+    return metadata
+
+
+def extract_metadata(urls_data, endpoints):
+    """
+    Metadata of the views of the endpoints, see `view_metadata`
+    """
+    metadata = {}
+    for callback, _, name in urls_data:
+        name = clean_name(name)
+        if name in endpoints:
+            endpoint_metadata = view_metadata(callback)
+            if endpoint_metadata:
+                metadata[name] = endpoint_metadata
+    return metadata
+
+
+def clean_patterns(urls_data):
+    return translate_patterns(urls_data)[0]
+
+
+def extract_converters(pattern):
+    """
+    Map every named group of a url pattern to a converter descriptor: the
+    name of a known converter or the group's regular expression.
+    """
+    return translate(pattern)[1]
+
+
+def clean_converters(urls_data):
+    return translate_patterns(urls_data)[1]
+
+
+def shard_endpoints(endpoints):
+    """
+    Group endpoints by their top-level namespace, those in none together
+    under `ROOT_NAMESPACE`
+    """
+    shards = {}
+    for name, template in endpoints.items():
+        namespace = namespace_of(name)
+        shards.setdefault(namespace, {})[name] = template
+    return shards
+
+
+def shard_module_name(namespace, taken):
+    """
+    Name of a valid module, not in `taken`, to hold a namespace's endpoints
+    """
+    name = base_name = '_' + re.sub(r'\W', '_', namespace or 'root')
+    suffix = 1
+    while name in taken:
+        suffix += 1
+        name = '{}_{}'.format(base_name, suffix)
+    return name
+
+
+def write_tables(path, **tables):
+    with open(path, 'w+') as output_module:
+        for index, name in enumerate(sorted(tables)):
+            if index:
+                output_module.write('\n\n')
+            output_module.write(name + ' = ')
+            output_module.write(json.dumps(tables[name], sort_keys=True,
+                                           indent=4, separators=(',', ': ')))
+            output_module.write('\n')
+
+
+def make_conf(name, version, namespace=None, skip_namespaces=(),
+              url_base=''):
+    """
+    Settings of a client package, also used to fill in its setup.py
+    """
+    if namespace:
+        namespace = namespace.replace('.', os.path.sep)
+        full_package = os.path.join(namespace, name)
+        base_package = namespace.split(os.path.sep)[0]
+    else:
+        full_package = name
+        base_package = name
+    return {
+        'NAME': name,
+        'VERSION': version,
+        'FULL_PACKAGE': full_package,
+        'BASE_PACKAGE': base_package,
+        'SKIP_NAMESPACES': list(skip_namespaces),
+        'URL_BASE': url_base
+    }
+
+
+def load_urls_module(urls_module):
+    """
+    Return the url conf module given as a module, a dotted module name or
+    the path of its source file.
+    """
+    if not isinstance(urls_module, basestring):
+        return urls_module
+    if urls_module.endswith('.py'):
+        module_name = os.path.splitext(
+            urls_module.replace('./', ''))[0].replace('/', '.')
+        return imp.load_source(module_name, urls_module)
+    return importlib.import_module(urls_module)
+
+
+def extract_urls_data(urls_module, conf, skipped=None,
+                      skipped_namespaces=None):
+    return extract_info_from_urlpatterns(
+        urlpatterns=urls_module.urlpatterns,
+        url_base=conf['URL_BASE'],
+        name_base='',
+        skip_namespaces=conf['SKIP_NAMESPACES'],
+        skipped=skipped,
+        skipped_namespaces=skipped_namespaces
+    )
+
+
+def parse_urls(urls_module, skip_namespaces=(), url_base=''):
+    """
+    Read the endpoints and converters of an url conf into `UrlTables`
+    """
+    conf = make_conf(None, None, skip_namespaces=skip_namespaces,
+                     url_base=url_base)
+    skipped = []
+    skipped_namespaces = []
+    urls_data = extract_urls_data(load_urls_module(urls_module), conf,
+                                  skipped, skipped_namespaces)
+    endpoints, converters = translate_patterns(urls_data, skipped)
+    endpoints = dict(endpoints)
+    return UrlTables(endpoints, converters, skipped,
+                     extract_layouts(urls_data, endpoints),
+                     extract_metadata(urls_data, endpoints),
+                     skipped_namespaces)
+
+
+def base_client_library_path():
+    module = __import__('rest_client')
+    init_path = inspect.getsourcefile(module)
+    return os.path.sep.join(init_path.split(os.path.sep)[:-1])
+
+
+def copy_base_client_library(base_dir, conf):
+    """
+    Copy the runtime modules of rest_client as the client package, replacing
+    the contents of `base_dir`. Only empty directories and those written by
+    a previous generation can be replaced.
+    """
+    module_path = base_client_library_path()
+    if os.path.exists(base_dir):
+        if (os.listdir(base_dir) and
+                not os.path.exists(os.path.join(base_dir, BUILD_MARKER))):
+            raise ValueError(
+                '{} is not empty and was not written by a previous '
+                'generation, refusing to replace it'.format(base_dir))
+        shutil.rmtree(base_dir)
+    shutil.copytree(
+        module_path, os.path.join(base_dir, conf['FULL_PACKAGE']),
+        ignore=shutil.ignore_patterns(*GENERATOR_ONLY)
+    )
+    open(os.path.join(base_dir, BUILD_MARKER), 'w').close()
+
+    partial_package = base_dir
+    for level in conf['FULL_PACKAGE'].split(os.path.sep):
+        partial_package = os.path.join(partial_package, level)
+        init_file_path = os.path.join(partial_package, '__init__.py')
+        with open(init_file_path, 'w+') as init_file:
+            init_file.write('from pkgutil import extend_path\n'
+                            '__path__ = extend_path(__path__, __name__)\n')
+
+
+def write_endpoints_module(base_dir, conf, endpoints, converters,
+                           layouts=None, metadata=None):
+    """
+    Write the endpoints of every top-level namespace, and those in none,
+    into a module of the endpoint_shards package, and an endpoints module
+    indexing them, so clients only load the namespaces they use.
+    """
+    layouts = layouts or {}
+    metadata = metadata or {}
+    package_path = os.path.join(base_dir, conf['FULL_PACKAGE'])
+    shards_path = os.path.join(package_path, 'endpoint_shards')
+    if os.path.exists(shards_path):
+        shutil.rmtree(shards_path)
+    os.makedirs(shards_path)
+    open(os.path.join(shards_path, '__init__.py'), 'w').close()
+
+    index = {}
+    for namespace, shard in sorted(shard_endpoints(endpoints).items()):
+        module_name = shard_module_name(namespace, index.values())
+        index[namespace] = module_name
+        shard_converters = dict(
+            (name, converters[name]) for name in shard
+            if name in converters
+        )
+        shard_layouts = dict(
+            (name, layouts[name]) for name in shard if name in layouts
+        )
+        shard_metadata = dict(
+            (name, metadata[name]) for name in shard if name in metadata
+        )
+        write_tables(
+            os.path.join(shards_path, module_name + '.py'),
+            ENDPOINTS=shard, CONVERTERS=shard_converters,
+            LAYOUTS=shard_layouts, METADATA=shard_metadata
+        )
+    write_tables(os.path.join(package_path, 'endpoints.py'), SHARDS=index)
+
+
+def copy_setup(base_dir, conf):
+    module_path = base_client_library_path()
+    setup_path = os.path.join(module_path, 'setup_template.py')
+    destination = os.path.join(base_dir, 'setup.py')
+    shutil.copy(setup_path, destination)
+    shutil.copy(os.path.join(module_path, 'MANIFEST.in'), base_dir)
+    return destination
+
+
+def replace_macros(setup_path, conf):
+    class MacroReplacer(ast.NodeTransformer):
+        def visit_Str(self, node):
+            if node.s.startswith('__') and node.s.endswith('__'):
+                conf_key = re.sub('__', '', node.s)
+                conf_value = conf.get(conf_key, conf_key)
+                return ast.Str(conf_value)
+            else:
+                return ast.Str(node.s)
+    with open(setup_path, 'r') as setup_file:
+        setup_content = setup_file.read()
+    original_setup = ast.parse(setup_content)
+    modified_setup = MacroReplacer().visit(original_setup)
+    with open(setup_path, 'w') as setup_file:
+        unparse.Unparser(modified_setup, setup_file)
+
+
+def run_setup(base_dir, profile_path=None):
+    """
+    Build the source distribution into `base_dir`/dist, in another process
+    so the current directory of this one doesn't change. With
+    `profile_path`, that process runs under cProfile and dumps its stats
+    there.
+    """
+    command = [sys.executable]
+    if profile_path is not None:
+        command.extend(['-m', 'cProfile', '-o', profile_path])
+    command.extend(['setup.py', '--quiet', 'sdist'])
+    subprocess.check_call(command, cwd=base_dir)
+
+
+def build_package(tables, output_dir, conf, sdist=True, layouts=None):
+    """
+    Write a client package for already parsed `UrlTables` into
+    `output_dir`, replacing its contents, and build its source distribution
+    into `output_dir`/dist unless `sdist` is false.
+
+    `layouts` maps endpoint names to the fields of their items, overriding
+    those found in the serializers of the views.
+    """
+    copy_base_client_library(output_dir, conf)
+    write_endpoints_module(output_dir, conf, tables.endpoints,
+                           tables.converters,
+                           dict(tables.layouts, **(layouts or {})),
+                           tables.metadata)
+    replace_macros(copy_setup(output_dir, conf), conf)
+    if sdist:
+        run_setup(output_dir)
+    return output_dir
+
+
+def generate_client(urls_module, name, version, output_dir, namespace=None,
+                    skip_namespaces=(), url_base='', sdist=True,
+                    layouts=None):
+    """
+    Generate the client package `name` for an url conf (a module, a dotted
+    module name or the path of its source file) into `output_dir`.
+    """
+    tables = parse_urls(urls_module, skip_namespaces, url_base)
+    conf = make_conf(name, version, namespace, skip_namespaces, url_base)
+    return build_package(tables, output_dir, conf, sdist, layouts)
+
+
+# Url tables of a batch, inherited by or sent once to every worker process
+_batch_tables = {}
+
+
+def _init_worker(tables):
+    _batch_tables.clear()
+    _batch_tables.update(tables)
+
+
+def _build_job(args):
+    key, output_dir, conf, sdist, layouts = args
+    return build_package(_batch_tables[key], output_dir, conf, sdist, layouts)
+
+
+def generate_clients(jobs, processes=None, sdist=True):
+    """
+    Generate several client packages, or versions of a package, in a pool
+    of `processes` processes (one per CPU by default).
+
+    `jobs` are dictionaries of `generate_client` arguments. Each url conf is
+    only parsed once, in this process, for all the jobs using it with the
+    same `skip_namespaces` and `url_base`. Returns the output directories in
+    the order of `jobs`.
+    """
+    output_dirs = [os.path.abspath(job['output_dir']) for job in jobs]
+    if len(set(output_dirs)) != len(output_dirs):
+        raise ValueError('Every job needs its own output directory')
+
+    tables = {}
+    work = []
+    for job, output_dir in zip(jobs, output_dirs):
+        skip_namespaces = tuple(job.get('skip_namespaces', ()))
+        url_base = job.get('url_base', '')
+        urls_module = job['urls_module']
+        if not isinstance(urls_module, basestring):
+            urls_module = urls_module.__name__
+        key = (urls_module, skip_namespaces, url_base)
+        if key not in tables:
+            tables[key] = parse_urls(job['urls_module'], skip_namespaces,
+                                     url_base)
+        conf = make_conf(job['name'], job['version'], job.get('namespace'),
+                         skip_namespaces, url_base)
+        work.append((key, output_dir, conf, sdist, job.get('layouts')))
+
+    if processes == 1:
+        _init_worker(tables)
+        return [_build_job(args) for args in work]
+    pool = multiprocessing.Pool(processes, _init_worker, (tables,))
+    try:
+        return pool.map(_build_job, work)
+    finally:
+        pool.close()
+        pool.join()
@@ -0,0 +1,222 @@
+"""
+Translation of Django url regular expressions into url templates.
+
+`translate` turns a pattern like `^things/(?P<pk>\d+)/(?:edit/)?$` into the
+template `things/{pk}/` used by the client, plus the regular expression of
+every named group (see `rest_client.converters`).
+
+Patterns made of literals, unquantified named groups and optional literals
+are translated with a few whole-pattern operations. Other patterns are
+split into tokens by a single precompiled regular expression, so runs of
+literal characters are handled in one step. Constructs which have no
+template equivalent (alternations, unnamed groups, wildcards outside named
+groups, optional named groups...) raise `UntranslatablePattern` instead of
+producing a wrong template.
+"""
+
+import re
+
+
+class UntranslatablePattern(ValueError):
+    pass
+
+
+TOKENS = re.compile(r'''
+    (?P<literal>[^\\()\[\]?*+{}^$|.]+)
+  | (?P<named>\(\?P<(?P<name>\w+)>)
+  | (?P<group>\((?:\?:)?)
+  | (?P<special_group>\(\?.?)
+  | (?P<close>\))
+  | (?P<class>\[\^?\]?(?:\\.|[^\]\\])*\])
+  | (?P<escape>\\.)
+  | (?P<quantifier>(?:[?*+]|\{\d+(?:,\d*)?\})\??)
+  | (?P<anchor>[\^$])
+  | (?P<other>.)
+''', re.VERBOSE | re.DOTALL)
+
+# Escapes standing for a single literal character
+LITERAL_ESCAPES = frozenset('./-_~:@!&=,;%#\'"<> ')
+
+# Escapes that only assert a position, removed like ^ and $
+ANCHOR_ESCAPES = frozenset('AZb')
+
+REPETITION = re.compile(r'\{(\d+)')
+
+DOUBLE_SLASH = re.compile('//+')
+
+# Literal characters of a url pattern, which need no escaping
+LITERAL = r'[^\\()\[\]?*+{}|.^$]'
+
+# Regular expression of a named group, which can hold groups one level
+# deep. Written as unrolled loops so failing to match doesn't backtrack
+GROUP_REGEX = r'[^()\\]*(?:(?:\\.|\([^()\\]*(?:\\.[^()\\]*)*\))[^()\\]*)*'
+
+# Named groups, with their name and regular expression, and optional
+# literal characters or non-capturing groups of them
+TEMPLATE_PARTS = re.compile(
+    r'\(\?P<(\w+)>({0})\)|(?:\(\?:{1}*\)|{1})\?'.format(GROUP_REGEX, LITERAL),
+    re.DOTALL)
+
+# Patterns only made of literals, anchors, unquantified named groups and
+# optional literals, the vast majority, are translated with a few string
+# operations instead of token by token
+SIMPLE_PATTERN = re.compile(r'''(?:
+    [^\\()\[\]?*+{{}}|.]+(?![^\\()\[\]?*+{{}}|.])(?:(?<![$^])\?)?
+  | \\[{2}]
+  | \(\?P<\w+>{0}\)
+  | \(\?:{1}*\)\?
+)*\Z'''.format(GROUP_REGEX, LITERAL, re.escape(''.join(LITERAL_ESCAPES))),
+    re.VERBOSE | re.DOTALL)
+
+# Common url argument regular expressions and the converter names the
+# client knows them by (see rest_client.converters)
+KNOWN_CONVERTERS = {
+    r'\d+': 'int',
+    r'[0-9]+': 'int',
+    r'[-\w]+': 'slug',
+    r'[\w-]+': 'slug',
+    r'[-a-zA-Z0-9_]+': 'slug',
+    r'[^/]+': 'str',
+}
+
+
+def _apply_quantifier(parts, quantifier, pattern):
+    """
+    Apply a quantifier to the last piece of template in `parts`, taking the
+    shortest form that matches: optional pieces are dropped, `+` keeps one
+    repetition and `{n}` / `{n,m}` keep n.
+    """
+    if not parts:
+        raise UntranslatablePattern(
+            'Nothing to repeat in {}'.format(pattern))
+    last, has_argument = parts.pop()
+    if len(quantifier) > 1 and quantifier.endswith('?'):
+        # Lazy quantifiers match the same urls
+        quantifier = quantifier[:-1]
+    if quantifier in ('?', '*'):
+        if has_argument:
+            raise UntranslatablePattern(
+                'Optional url argument in {}'.format(pattern))
+        return
+    if quantifier == '+':
+        parts.append((last, has_argument))
+        return
+    times = int(REPETITION.match(quantifier).group(1))
+    if has_argument and times != 1:
+        raise UntranslatablePattern(
+            'Repeated url argument in {}'.format(pattern))
+    parts.append((last * times, has_argument))
+
+
+def translate(pattern):
+    """
+    Return the url template and the named group regular expressions of a
+    Django url pattern, raising `UntranslatablePattern` when it can't be
+    expressed as a template.
+    """
+    if SIMPLE_PATTERN.match(pattern):
+        return _translate_simple(pattern)
+    return _translate_tokens(pattern)
+
+
+def _translate_simple(pattern):
+    # Literals, then the name and regular expression of a named group, or
+    # None for optional literals
+    parts = TEMPLATE_PARTS.split(pattern)
+    converters = {}
+    for index in xrange(1, len(parts), 3):
+        name = parts[index]
+        if name is None:
+            parts[index] = ''
+        else:
+            regex = parts[index + 1]
+            converters[name] = KNOWN_CONVERTERS.get(regex, regex)
+            parts[index] = '{' + name + '}'
+        parts[index + 1] = ''
+    # Only escapes of literal characters are left
+    template = ''.join(parts).replace('^', '').replace('$', '').replace(
+        '\\', '')
+    if '//' in template:
+        template = DOUBLE_SLASH.sub('/', template)
+    return template, converters
+
+
+def _translate_tokens(pattern):
+    converters = {}
+    # Stack of lists of (template piece, has url argument). A piece is
+    # whatever a following quantifier would apply to.
+    stack = [[]]
+    # For each open named group: its name, where its regex starts and the
+    # group depth it was opened at
+    named = []
+    depth = 0
+
+    for match in TOKENS.finditer(pattern):
+        kind = match.lastgroup
+        text = match.group()
+
+        if named and depth > named[-1][2]:
+            # Inside a named group, only its end matters
+            if kind in ('named', 'group', 'special_group'):
+                depth += 1
+            elif kind == 'close':
+                depth -= 1
+                if depth == named[-1][2]:
+                    name, start, _ = named.pop()
+                    regex = pattern[start:match.start()]
+                    converters[name] = KNOWN_CONVERTERS.get(regex, regex)
+                    stack[-1].append(('{' + name + '}', True))
+            continue
+
+        if kind == 'literal':
+            parts = stack[-1]
+            if len(text) > 1:
+                # A quantifier only applies to the last character
+                parts.append((text[:-1], False))
+            parts.append((text[-1], False))
+        elif kind == 'named':
+            named.append((match.group('name'), match.end(), depth))
+            depth += 1
+        elif kind == 'group':
+            if text == '(':
+                raise UntranslatablePattern(
+                    'Unnamed group in {}'.format(pattern))
+            stack.append([])
+            depth += 1
+        elif kind == 'close':
+            if len(stack) == 1:
+                raise UntranslatablePattern(
+                    'Unbalanced parenthesis in {}'.format(pattern))
+            parts = stack.pop()
+            depth -= 1
+            stack[-1].append((''.join(part for part, _ in parts),
+                              any(argument for _, argument in parts)))
+        elif kind == 'escape':
+            char = text[1]
+            if char in LITERAL_ESCAPES:
+                stack[-1].append((char, False))
+            elif char not in ANCHOR_ESCAPES:
+                raise UntranslatablePattern(
+                    'Wildcard {} in {}'.format(text, pattern))
+        elif kind == 'class':
+            # Only classes matching a single character can be a literal
+            members = text[1:-1]
+            if len(members) == 2 and members[0] == '\\':
+                members = members[1]
+            if len(members) != 1 or members == '^':
+                raise UntranslatablePattern(
+                    'Character class {} in {}'.format(text, pattern))
+            stack[-1].append((members, False))
+        elif kind == 'quantifier':
+            _apply_quantifier(stack[-1], text, pattern)
+        elif kind == 'anchor':
+            continue
+        else:
+            raise UntranslatablePattern(
+                'Unsupported {} in {}'.format(text, pattern))
+
+    if len(stack) != 1 or named:
+        raise UntranslatablePattern(
+            'Unbalanced parenthesis in {}'.format(pattern))
+    template = ''.join(part for part, _ in stack[0])
+    return DOUBLE_SLASH.sub('/', template), converters
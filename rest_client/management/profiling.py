@@ -0,0 +1,106 @@
+"""
+Wall time and allocation profiling of the phases of client generation.
+"""
+
+from contextlib import contextmanager
+import cProfile
+import gc
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+
+class PhaseProfiler(object):
+    """
+    Measure the phases run inside `phase(name)` blocks.
+
+    For every phase it records the wall time, the net number of objects
+    tracked by the garbage collector (a proxy for allocations that stay
+    alive, counted after a collection) and how much the peak resident
+    memory grew. With
+    `cprofile=True` every phase also runs under cProfile so the profile of
+    the slowest one can be dumped afterwards. Work done by a subprocess is
+    profiled by running it under cProfile too, writing to the path
+    `subprocess_profile(phase)` returns.
+
+    When disabled, phases run without any measuring.
+    """
+
+    def __init__(self, enabled=False, cprofile=False):
+        self.enabled = enabled or cprofile
+        self.cprofile = cprofile
+        self.phases = []
+        self.profiles = {}
+        self.subprocess_profiles = {}
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        gc.collect()
+        objects = len(gc.get_objects())
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        profile = cProfile.Profile() if self.cprofile else None
+        started = time.time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                self.profiles[name] = profile
+            elapsed = time.time() - started
+            gc.collect()
+            self.phases.append((
+                name,
+                elapsed,
+                len(gc.get_objects()) - objects,
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - max_rss,
+            ))
+
+    def subprocess_profile(self, name):
+        """
+        Path a subprocess run in the phase `name` should write its cProfile
+        stats to, which are then those of the phase, or None when not
+        profiling
+        """
+        if not self.cprofile:
+            return None
+        handle, path = tempfile.mkstemp(suffix='.prof')
+        os.close(handle)
+        self.subprocess_profiles[name] = path
+        return path
+
+    def slowest(self):
+        return max(self.phases, key=lambda phase: phase[1])[0]
+
+    def dump_slowest(self, path):
+        """
+        Write the cProfile stats of the slowest phase to `path`, returning
+        the name of the phase
+        """
+        name = self.slowest()
+        if name in self.subprocess_profiles:
+            # Only the wait for the subprocess ran in this one
+            shutil.copyfile(self.subprocess_profiles[name], path)
+        else:
+            self.profiles[name].dump_stats(path)
+        for profile_path in self.subprocess_profiles.values():
+            os.remove(profile_path)
+        self.subprocess_profiles = {}
+        return name
+
+    def report(self):
+        lines = ['{:<32} {:>10} {:>12} {:>14}'.format(
+            'phase', 'wall ms', 'net objects', 'max RSS +KB')]
+        for name, seconds, objects, max_rss in self.phases:
+            lines.append('{:<32} {:>10.1f} {:>12} {:>14}'.format(
+                name, seconds * 1000, objects, max_rss))
+        lines.append('{:<32} {:>10.1f}'.format(
+            'total', sum(phase[1] for phase in self.phases) * 1000))
+        return '\n'.join(lines)
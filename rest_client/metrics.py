@@ -0,0 +1,274 @@
+"""
+Lightweight request metrics and latency statistics.
+"""
+
+from bisect import bisect_left
+import os
+import threading
+
+
+# Upper bounds, in seconds, of the latency histogram buckets. Anything
+# slower lands in an extra overflow bucket.
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class Histogram(object):
+    """
+    Fixed-memory histogram of latencies.
+
+    Percentiles are estimated as the upper bound of the bucket they fall in,
+    which is accurate enough for reporting and costs a single `bisect` per
+    observation.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percentile):
+        if not self.count:
+            return None
+        target = self.count * percentile / 100.0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                if index < len(self.buckets):
+                    return self.buckets[index]
+                return float('inf')
+        return float('inf')
+
+    def mean(self):
+        if not self.count:
+            return None
+        return self.total / self.count
+
+
+def status_class(status_code):
+    return '{}xx'.format(status_code // 100)
+
+
+class EndpointMetrics(object):
+    """
+    Counters and latency histogram of one endpoint and method, only ever
+    updated from a single thread.
+    """
+
+    __slots__ = ('requests', 'errors', 'bytes_sent', 'bytes_received',
+                 'latency')
+
+    def __init__(self, buckets):
+        self.requests = 0
+        self.errors = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = Histogram(buckets)
+
+    def observe(self, latency, error, bytes_sent, bytes_received):
+        self.requests += 1
+        if error is not None:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+        self.latency.observe(latency)
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'errors': dict(self.errors),
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'latency_counts': list(self.latency.counts),
+            'latency_sum': self.latency.total,
+        }
+
+
+def _copy(values):
+    return dict(values, errors=dict(values['errors']),
+                latency_counts=list(values['latency_counts']))
+
+
+def _merge(total, values, sign=1):
+    for field in ('requests', 'bytes_sent', 'bytes_received', 'latency_sum'):
+        total[field] += sign * values[field]
+    for error, count in values['errors'].items():
+        total['errors'][error] = total['errors'].get(error, 0) + sign * count
+    total['latency_counts'] = [
+        current + sign * count
+        for current, count in zip(total['latency_counts'],
+                                  values['latency_counts'])
+    ]
+
+
+class MetricsRegistry(object):
+    """
+    Per endpoint and method request metrics of a Client.
+
+    Every thread records into its own set of counters so recording never
+    takes a lock; `snapshot` adds up the counters of all threads. The
+    counters of threads which have ended are folded into a single total,
+    so short-lived threads (e.g. those of `CallGraph.run` or parallel
+    pagination) don't make the registry grow. `reset`
+    doesn't touch them either, it remembers the current totals and later
+    snapshots only count what happened since.
+
+    Errors are counted by status class ('4xx', '5xx') or as 'network' when
+    no response was received.
+
+    A registry created before the process forks starts from zero in the
+    child process, which only counts its own requests.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._reset_state()
+
+    def _reset_state(self):
+        self._local = threading.local()
+        # Counters of the live threads, with their thread
+        self._shards = []
+        # Added up counters of the threads which have ended
+        self._ended = {}
+        self._lock = threading.Lock()
+        self._baseline = {}
+        self._pid = os.getpid()
+
+    def _shard(self):
+        if self._pid != os.getpid():
+            self._reset_state()
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._fold_ended()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _fold_ended(self):
+        """
+        Move the counters of the threads which have ended into `_ended`.
+        Must be called with the lock held.
+        """
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+                continue
+            for key, metrics in shard.items():
+                values = metrics.as_dict()
+                if key in self._ended:
+                    _merge(self._ended[key], values)
+                else:
+                    self._ended[key] = values
+        self._shards = live
+
+    def observe(self, endpoint, method, latency, status_code=None,
+                bytes_sent=0, bytes_received=0):
+        """
+        Record a request. A `status_code` of None means no response was
+        received.
+        """
+        shard = self._shard()
+        key = (endpoint, method)
+        metrics = shard.get(key)
+        if metrics is None:
+            metrics = shard[key] = EndpointMetrics(self.buckets)
+        if status_code is None:
+            error = 'network'
+        elif status_code >= 400:
+            error = status_class(status_code)
+        else:
+            error = None
+        metrics.observe(latency, error, bytes_sent, bytes_received)
+
+    def _totals(self):
+        if self._pid != os.getpid():
+            self._reset_state()
+        with self._lock:
+            self._fold_ended()
+            shards = [shard for _, shard in self._shards]
+            totals = dict((key, _copy(values))
+                          for key, values in self._ended.items())
+        for shard in shards:
+            for key, metrics in shard.items():
+                values = metrics.as_dict()
+                if key in totals:
+                    _merge(totals[key], values)
+                else:
+                    totals[key] = values
+        return totals
+
+    def snapshot(self):
+        """
+        Metrics since the last reset, keyed by (endpoint, method)
+        """
+        totals = self._totals()
+        for key, baseline in self._baseline.items():
+            if key in totals:
+                _merge(totals[key], baseline, sign=-1)
+                totals[key]['errors'] = dict(
+                    (error, count)
+                    for error, count in totals[key]['errors'].items()
+                    if count
+                )
+        return totals
+
+    def reset(self):
+        self._baseline = self._totals()
+
+    def exposition(self, prefix='rest_client'):
+        """
+        Snapshot in the Prometheus text exposition format
+        """
+        snapshot = self.snapshot()
+        keys = sorted(snapshot)
+        lines = []
+
+        def labels(endpoint, method, **extra):
+            pairs = [('endpoint', endpoint), ('method', method)]
+            pairs.extend(sorted(extra.items()))
+            return '{' + ','.join('{}="{}"'.format(name, value)
+                                  for name, value in pairs) + '}'
+
+        for field, metric in (('requests', 'requests_total'),
+                              ('bytes_sent', 'bytes_sent_total'),
+                              ('bytes_received', 'bytes_received_total')):
+            lines.append('# TYPE {}_{} counter'.format(prefix, metric))
+            for endpoint, method in keys:
+                lines.append('{}_{}{} {}'.format(
+                    prefix, metric, labels(endpoint, method),
+                    snapshot[(endpoint, method)][field]))
+
+        lines.append('# TYPE {}_errors_total counter'.format(prefix))
+        for endpoint, method in keys:
+            errors = snapshot[(endpoint, method)]['errors']
+            for error in sorted(errors):
+                lines.append('{}_errors_total{} {}'.format(
+                    prefix, labels(endpoint, method, **{'class': error}),
+                    errors[error]))
+
+        metric = prefix + '_request_duration_seconds'
+        lines.append('# TYPE {} histogram'.format(metric))
+        for endpoint, method in keys:
+            values = snapshot[(endpoint, method)]
+            cumulative = 0
+            bounds = [repr(bound) for bound in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, values['latency_counts']):
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(
+                    metric, labels(endpoint, method, le=bound), cumulative))
+            lines.append('{}_sum{} {!r}'.format(
+                metric, labels(endpoint, method), values['latency_sum']))
+            lines.append('{}_count{} {}'.format(
+                metric, labels(endpoint, method), cumulative))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,151 @@
+"""
+Iteration over the items of paginated list endpoints.
+
+Django REST framework list endpoints answer with pages like
+`{'count': 1234, 'next': '...?page=2', 'previous': None, 'results': [...]}`.
+Following `next` one page at a time waits for a round trip per page. When
+the endpoint uses page number or limit/offset pagination, the query
+arguments of every page can instead be computed from the first one and its
+`count`, and the pages fetched concurrently.
+"""
+
+import Queue
+import threading
+import urlparse
+
+from .client import Deadline
+
+
+SEQUENTIAL = 'sequential'
+PARALLEL = 'parallel'
+MODES = (SEQUENTIAL, PARALLEL)
+
+# Query arguments of limit/offset pagination, as named by DRF
+LIMIT_PARAM = 'limit'
+OFFSET_PARAM = 'offset'
+
+
+def next_params(page):
+    """
+    Query arguments of the url of the page after `page`, or None if it is
+    the last one
+    """
+    url = page.get('next')
+    if not url:
+        return None
+    return dict(urlparse.parse_qsl(urlparse.urlsplit(url).query))
+
+
+def page_params(page, params):
+    """
+    Query arguments of every page after the first one, given the first
+    page and the arguments of the second one, or None when the pagination
+    style (e.g. cursors) doesn't allow computing them.
+    """
+    count = page.get('count')
+    size = len(page['results'])
+    if not isinstance(count, (int, long)) or not size:
+        return None
+    if OFFSET_PARAM in params:
+        limit = int(params.get(LIMIT_PARAM, size))
+        offset = int(params[OFFSET_PARAM])
+        return [dict(params, **{OFFSET_PARAM: str(start)})
+                for start in xrange(offset, count, limit)]
+    # Page number pagination: the argument of the second page is 2
+    names = [name for name, value in params.items() if value == '2']
+    if len(names) != 1:
+        return None
+    pages = (count + size - 1) // size
+    return [dict(params, **{names[0]: str(number)})
+            for number in xrange(2, pages + 1)]
+
+
+def paginate(chunk, args, kwargs, mode=SEQUENTIAL, window=8, ordered=True):
+    """
+    Generator of the items of every page of the list endpoint `chunk`,
+    called with `args` and `kwargs` for the first page.
+
+    In parallel mode, up to `window` pages are fetched at once. With
+    `ordered=False` the items of a page are yielded as soon as it arrives
+    instead of in page order. No more pages are requested once the caller
+    stops iterating. Errors are raised when the page they happened on is
+    reached (or as soon as they happen when unordered).
+    """
+    if mode not in MODES:
+        raise ValueError('Unknown pagination mode {}'.format(mode))
+    return _items(chunk, args, kwargs, mode, window, ordered)
+
+
+def _items(chunk, args, kwargs, mode, window, ordered):
+    kwargs = dict(kwargs, http_lazy=False)
+    scheduler = chunk.client._scheduler
+    if scheduler is not None and kwargs.get('http_priority') is None:
+        # Pages are fetched from other threads, which don't have the
+        # priority of this one
+        kwargs['http_priority'] = scheduler.current()
+    deadline = kwargs.get('http_deadline')
+    if deadline is not None and not isinstance(deadline, Deadline):
+        # A single time budget for every page
+        kwargs['http_deadline'] = Deadline(deadline)
+
+    page = chunk(*args, **kwargs)
+    for item in page['results']:
+        yield item
+    params = next_params(page)
+    if params is None:
+        return
+
+    pages = page_params(page, params) if mode == PARALLEL else None
+    if pages is None:
+        # Follow the next links
+        while params is not None:
+            page = chunk(*args, **dict(kwargs, **params))
+            for item in page['results']:
+                yield item
+            params = next_params(page)
+        return
+
+    fetch = lambda page_kwargs: chunk(*args, **dict(kwargs, **page_kwargs))
+    for page in _fetch_pages(fetch, pages, window, ordered):
+        for item in page['results']:
+            yield item
+
+
+def _fetch_pages(fetch, pages, window, ordered):
+    """
+    Generator of the results of `fetch` for every item of `pages`, with up
+    to `window` of them running or waiting to be yielded at once
+    """
+    done = Queue.Queue()
+    finished = {}
+    submitted = 0
+    expected = 0
+
+    def run(index):
+        try:
+            done.put((index, fetch(pages[index]), None))
+        except Exception as exc:
+            done.put((index, None, exc))
+
+    while expected < len(pages):
+        while (submitted < len(pages) and
+               submitted - expected < window):
+            thread = threading.Thread(target=run, args=(submitted,))
+            thread.daemon = True
+            thread.start()
+            submitted += 1
+
+        index, page, error = done.get()
+        if not ordered:
+            if error is not None:
+                raise error
+            expected += 1
+            yield page
+            continue
+        finished[index] = (page, error)
+        while expected in finished:
+            page, error = finished.pop(expected)
+            if error is not None:
+                raise error
+            expected += 1
+            yield page
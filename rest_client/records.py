@@ -0,0 +1,258 @@
+"""
+Compact decoding of list responses.
+
+A decoded JSON list of objects is a list of dicts, each of which costs
+several times the memory of the values it holds. Records of a layout (the
+ordered field names of an endpoint's items) can be stored instead as:
+
+- `records`: instances of a class with `__slots__`, so each one only holds
+  a pointer per field, or
+- `columns`: a `Columns` table with one list per field, where numbers are
+  packed into arrays and equal strings share a single object.
+
+Both support attribute access (`record.name`) as well as the item access
+(`record['name']`) and most of the read-only methods of dicts.
+"""
+
+from array import array
+import keyword
+import re
+import threading
+
+
+RECORDS = 'records'
+COLUMNS = 'columns'
+MODES = (RECORDS, COLUMNS)
+
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Names of the record classes' own attributes
+RESERVED = frozenset(('_fields',))
+
+
+class Record(object):
+    """
+    Base of the record classes of every layout. Fields missing from the
+    decoded object are left unset, and raise a KeyError as in a dict.
+
+    A field named like a method of the base class (`get`, `keys`...) hides
+    it on the records of its layout.
+    """
+
+    __slots__ = ()
+    _fields = ()
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._fields and hasattr(self, key)
+
+    def __iter__(self):
+        return (key for key in self._fields if hasattr(self, key))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other._asdict()
+        return self._asdict() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [getattr(self, key) for key in self]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self]
+
+    def _asdict(self):
+        return dict((key, getattr(self, key)) for key in self)
+
+    def __reduce__(self):
+        # Record classes are made at runtime and can't be pickled by name
+        return _rebuild, (self._fields, self._asdict())
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join(
+            '{}={!r}'.format(key, getattr(self, key)) for key in self))
+
+
+_classes = {}
+_classes_lock = threading.Lock()
+
+
+def valid_layout(fields):
+    """
+    Whether every field can be the name of a slot
+    """
+    return all(IDENTIFIER.match(field) and not keyword.iskeyword(field) and
+               not field.startswith('__') and field not in RESERVED
+               for field in fields)
+
+
+def record_class(fields):
+    """
+    Record class with a slot per field, shared by every layout with the
+    same fields. Raises ValueError if a field isn't a valid identifier.
+    """
+    fields = tuple(str(field) for field in fields)
+    cls = _classes.get(fields)
+    if cls is not None:
+        return cls
+    if not valid_layout(fields):
+        raise ValueError('Invalid field name in {}'.format(fields))
+    with _classes_lock:
+        cls = _classes.get(fields)
+        if cls is None:
+            cls = type('Record', (Record,), {
+                '__slots__': fields, '_fields': fields,
+            })
+            _classes[fields] = cls
+    return cls
+
+
+def make_record(cls, item):
+    record = cls.__new__(cls)
+    for key, value in item.iteritems():
+        setattr(record, key, value)
+    return record
+
+
+def _rebuild(fields, values):
+    return make_record(record_class(fields), values)
+
+
+def _pack(values):
+    """
+    Most compact container for the values of a column
+    """
+    kinds = set(type(value) for value in values)
+    if kinds == set([int]):
+        return array('l', values)
+    if kinds == set([float]):
+        return array('d', values)
+    shared = {}
+    return [shared.setdefault(value, value)
+            if isinstance(value, basestring) else value
+            for value in values]
+
+
+class Columns(object):
+    """
+    Table of the records of a list response, stored a column per field.
+
+    Indexing and iterating build a record on the fly, and `column(name)`
+    returns the values of a field. Missing fields read as None.
+    """
+
+    __slots__ = ('_fields', '_columns', '_length', '_record_class')
+
+    def __init__(self, fields, items):
+        self._fields = tuple(str(field) for field in fields)
+        self._record_class = record_class(self._fields)
+        self._length = len(items)
+        self._columns = dict(
+            (field, _pack([item.get(field) for item in items]))
+            for field in self._fields
+        )
+
+    def column(self, name):
+        return self._columns[name]
+
+    def __len__(self):
+        return self._length
+
+    def _record(self, index):
+        record = self._record_class.__new__(self._record_class)
+        for field in self._fields:
+            setattr(record, field, self._columns[field][index])
+        return record
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._record(position)
+                    for position in xrange(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('Columns index out of range')
+        return self._record(index)
+
+    def __iter__(self):
+        return (self._record(index) for index in xrange(self._length))
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '<Columns {} x {}>'.format(self._length, len(self._fields))
+
+
+def infer_layout(items, layout=None):
+    """
+    Fields of the items, starting with those of `layout` and followed by
+    any other in the order they first appear.
+    """
+    fields = list(layout or ())
+    known = set(fields)
+    for item in items:
+        if not known.issuperset(item):
+            for key in item:
+                if key not in known:
+                    known.add(key)
+                    fields.append(key)
+    return tuple(fields)
+
+
+def compact(data, mode, layout=None):
+    """
+    Convert the items of a decoded list response (or of the `results` of a
+    paginated one) to the `mode` representation. Returns the converted data
+    and the layout used, or the data untouched and None when it isn't a
+    list of objects or its fields can't be slots.
+    """
+    if mode not in MODES:
+        raise ValueError('Unknown decode mode {}'.format(mode))
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        items, page = data['results'], data
+    elif isinstance(data, list):
+        items, page = data, None
+    else:
+        return data, None
+    if not all(isinstance(item, dict) for item in items):
+        return data, None
+
+    fields = infer_layout(items, layout)
+    if not valid_layout(fields):
+        return data, None
+    if mode == COLUMNS:
+        converted = Columns(fields, items)
+    else:
+        cls = record_class(fields)
+        converted = [make_record(cls, item) for item in items]
+
+    if page is None:
+        return converted, fields
+    page = dict(page)
+    page['results'] = converted
+    return page, fields
@@ -0,0 +1,60 @@
+"""
+Lazy response objects.
+"""
+
+from .formats import decode
+
+
+_NOT_DECODED = object()
+
+
+class LazyResponse(object):
+    """
+    Lightweight response returned by `ApiChunk` calls in lazy mode.
+
+    The status code, headers and raw body are available straight away while
+    the body is only decoded as JSON the first time it is needed, so callers
+    that only check for success or forward the body as is never pay for it.
+
+    Item access (`response['name']`) and `get` work on the decoded body as
+    they would on the dictionary returned in the default mode.
+    """
+
+    __slots__ = ('status_code', 'headers', 'content', '_json')
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self._json = _NOT_DECODED
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        """
+        Decoded body, from MessagePack when that's its content type
+        """
+        if self._json is _NOT_DECODED:
+            self._json = decode(self.content, self.headers)
+        return self._json
+
+    def body_view(self):
+        """
+        Read-only view over the raw body which can be sliced or written to a
+        socket or file without copying it.
+        """
+        return memoryview(self.content)
+
+    def __getitem__(self, key):
+        return self.json()[key]
+
+    def __contains__(self, key):
+        return key in self.json()
+
+    def get(self, key, default=None):
+        return self.json().get(key, default)
+
+    def __repr__(self):
+        return '<LazyResponse [{}]>'.format(self.status_code)
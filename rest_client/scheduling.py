@@ -0,0 +1,173 @@
+"""
+Priority scheduling of the requests a Client sends.
+"""
+
+from collections import deque
+from contextlib import contextmanager
+import os
+import threading
+import time
+
+from .metrics import Histogram
+
+
+# Priority classes, from the most to the least urgent, and their weights
+DEFAULT_CLASSES = (
+    ('interactive', 8),
+    ('default', 4),
+    ('bulk', 1),
+)
+
+
+class _Waiter(object):
+
+    __slots__ = ('priority', 'enqueued', 'event', 'granted')
+
+    def __init__(self, priority):
+        self.priority = priority
+        self.enqueued = time.time()
+        self.event = threading.Event()
+        self.granted = False
+
+
+class PriorityScheduler(object):
+    """
+    Let at most `slots` requests use the connection pool at once, choosing
+    which waiting request goes next by its priority class.
+
+    By default classes share the slots in proportion to their weights
+    (stride scheduling), so bulk jobs keep progressing while interactive
+    calls get most of the pool. With `strict=True` a class is only served
+    when every more urgent one is empty. In both modes a request that has
+    waited more than `max_wait` seconds goes first, so no class starves.
+
+    `slots` should match the pool size of the transport, otherwise requests
+    queue in the pool instead of here.
+    """
+
+    def __init__(self, slots=10, classes=DEFAULT_CLASSES, strict=False,
+                 max_wait=2.0, default='default'):
+        self.slots = slots
+        self.order = [name for name, _ in classes]
+        self.weights = dict(classes)
+        if default not in self.weights:
+            raise ValueError('Unknown default priority {}'.format(default))
+        self.strict = strict
+        self.max_wait = max_wait
+        self.default = default
+        self._reset_state()
+
+    def _reset_state(self):
+        self._free = self.slots
+        self._queues = dict((name, deque()) for name in self.order)
+        self._pass = dict((name, 0.0) for name in self.order)
+        self._virtual = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = dict((name, {'granted': 0, 'timeouts': 0,
+                                   'max_waiting': 0, 'wait': Histogram()})
+                           for name in self.order)
+        self._pid = os.getpid()
+
+    @contextmanager
+    def priority(self, name):
+        """
+        Use the priority class `name` for the calls made by this thread in
+        the block, e.g. for every request of a batch job
+        """
+        self._check_priority(name)
+        previous = getattr(self._local, 'priority', None)
+        self._local.priority = name
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def current(self):
+        """
+        Priority class of the calls made by this thread
+        """
+        return getattr(self._local, 'priority', None) or self.default
+
+    def _check_priority(self, name):
+        if name not in self.weights:
+            raise ValueError('Unknown priority {}'.format(name))
+
+    def acquire(self, priority=None, timeout=None):
+        """
+        Wait for a slot, for up to `timeout` seconds. Returns False if none
+        was granted in time.
+        """
+        if self._pid != os.getpid():
+            self._reset_state()
+        if priority is None:
+            priority = self.current()
+        self._check_priority(priority)
+
+        with self._lock:
+            stats = self._stats[priority]
+            if self._free and not any(self._queues.values()):
+                self._free -= 1
+                stats['granted'] += 1
+                stats['wait'].observe(0)
+                return True
+            waiter = _Waiter(priority)
+            queue = self._queues[priority]
+            if not queue:
+                # A class coming back doesn't get credit for its idle time
+                self._pass[priority] = max(self._pass[priority],
+                                           self._virtual)
+            queue.append(waiter)
+            stats['max_waiting'] = max(stats['max_waiting'], len(queue))
+
+        waiter.event.wait(timeout)
+        with self._lock:
+            if not waiter.granted:
+                self._queues[priority].remove(waiter)
+                stats['timeouts'] += 1
+                return False
+            stats['granted'] += 1
+            stats['wait'].observe(time.time() - waiter.enqueued)
+            return True
+
+    def release(self):
+        with self._lock:
+            waiter = self._next_waiter()
+            if waiter is None:
+                self._free += 1
+                return
+            # The slot goes straight to the waiter
+            waiter.granted = True
+            waiter.event.set()
+
+    def _next_waiter(self):
+        waiting = [name for name in self.order if self._queues[name]]
+        if not waiting:
+            return None
+        oldest = min(waiting, key=lambda name: self._queues[name][0].enqueued)
+        if (self.max_wait is not None and
+                time.time() - self._queues[oldest][0].enqueued >=
+                self.max_wait):
+            chosen = oldest
+        elif self.strict:
+            chosen = waiting[0]
+        else:
+            chosen = min(waiting, key=lambda name: self._pass[name])
+        self._virtual = self._pass[chosen]
+        self._pass[chosen] += 1.0 / self.weights[chosen]
+        return self._queues[chosen].popleft()
+
+    def snapshot(self):
+        """
+        Queue depth and wait times of every priority class
+        """
+        with self._lock:
+            return dict((name, {
+                'waiting': len(self._queues[name]),
+                'max_waiting': stats['max_waiting'],
+                'granted': stats['granted'],
+                'timeouts': stats['timeouts'],
+                'wait_mean': stats['wait'].mean(),
+                'wait_p50': stats['wait'].percentile(50),
+                'wait_p99': stats['wait'].percentile(99),
+            }) for name, stats in self._stats.items())
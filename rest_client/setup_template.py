@@ -22,6 +22,9 @@ setup(
         'Operating System :: OS Independent',
     ],
     install_requires=[
-        'requests==2.3.0',
+        'requests==2.4.3',
     ],
+    extras_require={
+        'msgpack': ['msgpack>=0.5.2'],
+    },
 )
@@ -0,0 +1,326 @@
+"""
+Transports used by the Client to actually perform HTTP requests.
+
+Every transport exposes `send(method, url, **kwargs)`, taking the same
+keyword arguments as `requests.request`, and returns a `requests.Response`.
+Transports keeping connection pools can also expose
+`warmup(url, connections, verify)` to pre-open connections.
+
+Besides the default `RequestsTransport`, `RecordingTransport` captures the
+request/response pairs going through another transport into a file which
+`ReplayTransport` can later serve from memory, with no network involved,
+optionally injecting latency and errors. This allows measuring client side
+performance in a deterministic way.
+"""
+
+import base64
+import gzip
+import json
+import math
+import os
+import random
+import threading
+import time
+import urlparse
+
+
+class RequestsTransport(object):
+    """
+    Perform requests over the network using `requests`.
+
+    Connections are kept alive in a pool of up to `pool_maxsize` connections
+    for each of up to `pool_connections` hosts. Cookies set by the server
+    are ignored, as they would be without a persistent session.
+
+    `requests` is only imported, and the session created, when the first
+    request is sent.
+
+    A transport created before the process forks (e.g. at import time in
+    the master process of a pre-fork server) starts over with a new pool in
+    the child process, as connections can't be shared between processes.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._session = None
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _after_fork(self):
+        inherited, self._session = self._session, None
+        # The lock may have been held by a thread which doesn't exist here
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        if inherited is not None:
+            # Only releases this process' file descriptors, the parent's
+            # connections stay open
+            inherited.close()
+
+    @property
+    def session(self):
+        if self._pid != os.getpid():
+            self._after_fork()
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        from cookielib import DefaultCookiePolicy
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def send(self, method, url, **kwargs):
+        return self.session.request(method, url, **kwargs)
+
+    def warmup(self, url, connections, verify=True):
+        """
+        Open up to `connections` connections to the host of `url` and leave
+        them in its pool, so the next requests skip DNS resolution and the
+        TCP and TLS handshakes. Returns the number of connections opened.
+        """
+        adapter = self.session.get_adapter(url)
+        pool = adapter.get_connection(url)
+        adapter.cert_verify(pool, url, verify, None)
+        opened = []
+        try:
+            for _ in range(min(connections, self.pool_maxsize)):
+                connection = pool._get_conn()
+                opened.append(connection)
+                if connection.sock is None:
+                    connection.connect()
+        finally:
+            for connection in opened:
+                pool._put_conn(connection)
+        return len(opened)
+
+
+def request_key(method, url, data=None):
+    """
+    Key identifying a request regardless of the order of its query string
+    and form encoded parameters.
+    """
+    import urllib
+
+    url_parts = list(urlparse.urlsplit(url))
+    url_parts[3] = urllib.urlencode(sorted(urlparse.parse_qsl(url_parts[3])))
+    if isinstance(data, dict):
+        data = urllib.urlencode(sorted(data.items()))
+    return method.upper(), urlparse.urlunsplit(url_parts), data or None
+
+
+class _NoConnection(object):
+    """
+    `raw` of built responses, whose body is already in memory, so closing
+    them has nothing to release
+    """
+
+    def release_conn(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def build_response(url, status, headers, content):
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    response = requests.Response()
+    response.url = url
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = content
+    response.raw = _NoConnection()
+    response.encoding = 'utf-8'
+    return response
+
+
+def encode_record(method, url, data, response, elapsed):
+    key = request_key(method, url, data)
+    record = {
+        'm': key[0],
+        'u': key[1],
+        'b': key[2],
+        's': response.status_code,
+        'h': dict(response.headers),
+        'e': round(elapsed, 6),
+    }
+    content = response.content or ''
+    try:
+        record['c'] = content.decode('utf-8')
+    except UnicodeDecodeError:
+        record['c64'] = base64.b64encode(content)
+    return json.dumps(record, separators=(',', ':'))
+
+
+def decode_record(line):
+    record = json.loads(line)
+    if 'c64' in record:
+        content = base64.b64decode(record['c64'])
+    else:
+        content = record['c'].encode('utf-8')
+    return (record['m'], record['u'], record['b']), {
+        'status': record['s'],
+        'headers': record['h'],
+        'content': content,
+        'elapsed': record['e'],
+    }
+
+
+class RecordingTransport(object):
+    """
+    Forward requests to another transport and append every request and its
+    response to a gzipped JSON lines file.
+
+    The records are compressed as a single stream, which is only complete
+    once `close` is called (or the transport is used as a context manager).
+    A recording transport inherited by a forked process appends its own
+    stream to the file.
+    """
+
+    def __init__(self, path, transport=None):
+        self.path = path
+        self.transport = transport or RequestsTransport()
+        self._lock = threading.Lock()
+        self._file = None
+        self._pid = os.getpid()
+
+    def _after_fork(self):
+        # Closing the parent's stream here would write its buffered records
+        # a second time
+        self._file = None
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Finish the compressed stream, making the file readable
+        """
+        if self._pid != os.getpid():
+            self._after_fork()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def warmup(self, url, connections, verify=True):
+        warmup = getattr(self.transport, 'warmup', None)
+        if warmup is None:
+            return 0
+        return warmup(url, connections, verify)
+
+    def send(self, method, url, **kwargs):
+        started = time.time()
+        response = self.transport.send(method, url, **kwargs)
+        line = encode_record(method, url, kwargs.get('data'), response,
+                             time.time() - started)
+        if self._pid != os.getpid():
+            self._after_fork()
+        with self._lock:
+            if self._file is None:
+                self._file = gzip.open(self.path, 'ab')
+            self._file.write(line + '\n')
+        return response
+
+
+class ReplayMiss(LookupError):
+    pass
+
+
+def fixed_latency(seconds):
+    return lambda record: seconds
+
+
+def uniform_latency(low, high, seed=None):
+    rand = random.Random(seed)
+    return lambda record: rand.uniform(low, high)
+
+
+def lognormal_latency(median, sigma, seed=None):
+    """
+    Long tailed latencies, the usual shape of real server response times
+    """
+    rand = random.Random(seed)
+    mu = math.log(median)
+    return lambda record: rand.lognormvariate(mu, sigma)
+
+
+def recorded_latency(scale=1.0):
+    """
+    Replay the latency observed when the response was recorded
+    """
+    return lambda record: record['elapsed'] * scale
+
+
+class ReplayTransport(object):
+    """
+    Serve responses recorded by `RecordingTransport` from an in-memory index.
+
+    :param path: File written by a `RecordingTransport`
+    :param latency: Callable receiving the recorded response and returning
+        the seconds to wait before answering, see the `*_latency` helpers
+    :param error_rate: Probability of answering with `error` instead of the
+        recorded response
+    :param error: HTTP status code or exception instance used when an error
+        is injected
+    :param seed: Seed for the error injection, for repeatable runs
+
+    Requests recorded several times are answered with each of their
+    recorded responses in turn. Requests that were never recorded raise
+    `ReplayMiss`.
+    """
+
+    def __init__(self, path, latency=None, error_rate=0, error=503,
+                 seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error = error
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._index = {}
+        self._positions = {}
+        with gzip.open(path, 'rb') as record_file:
+            for line in record_file:
+                key, record = decode_record(line)
+                self._index.setdefault(key, []).append(record)
+
+    def _next_record(self, key):
+        with self._lock:
+            records = self._index.get(key)
+            if not records:
+                raise ReplayMiss('No recorded response for {} {}'.format(
+                    key[0], key[1]))
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            inject_error = (self.error_rate and
+                            self._random.random() < self.error_rate)
+        return records[position % len(records)], inject_error
+
+    def send(self, method, url, **kwargs):
+        record, inject_error = self._next_record(
+            request_key(method, url, kwargs.get('data')))
+        if self.latency is not None:
+            time.sleep(self.latency(record))
+        if inject_error:
+            if isinstance(self.error, Exception):
+                raise self.error
+            return build_response(url, self.error, {}, '')
+        return build_response(url, record['status'], record['headers'],
+                              record['content'])
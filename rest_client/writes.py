@@ -0,0 +1,157 @@
+"""
+Asynchronous sending of the writes made with the assignment syntax.
+"""
+
+import os
+import Queue
+import threading
+import time
+
+
+class WriteQueueFull(ValueError):
+    pass
+
+
+_STOP = object()
+
+
+def _remaining(deadline):
+    if deadline is None:
+        return None
+    return max(deadline - time.time(), 0)
+
+
+class WriteBehindQueue(object):
+    """
+    Bounded queue of writes (`client.x.y = {...}`) sent by `workers`
+    background threads, so the code making them doesn't wait for the
+    round trips.
+
+    When `max_pending` writes are waiting, assigning blocks until one is
+    sent, or raises `WriteQueueFull` after `put_timeout` seconds if set.
+    Failed writes are counted in `failures` and passed to
+    `on_failure(name, data, exception)` when given.
+
+    Workers share the connection pool of the client's transport, so there
+    shouldn't be more of them than pooled connections.
+
+    Worker threads don't survive a fork: a queue used in a child process
+    starts its own workers, and leaves the writes queued before the fork to
+    the parent.
+    """
+
+    def __init__(self, workers=4, max_pending=1000, put_timeout=None,
+                 on_failure=None):
+        self.workers = workers
+        self.put_timeout = put_timeout
+        self.on_failure = on_failure
+        self.max_pending = max_pending
+        self._reset_state()
+
+    def _reset_state(self):
+        self.failures = 0
+        self.sent = 0
+        self._queue = Queue.Queue(self.max_pending)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._pid = os.getpid()
+
+    def _start(self):
+        if self._pid != os.getpid():
+            self._reset_state()
+        with self._lock:
+            if self._closed:
+                raise ValueError('The write queue is closed')
+            if self._threads:
+                return
+            for _ in range(self.workers):
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, name, data, write):
+        """
+        Queue the write of `data` to the endpoint `name`, performed by
+        calling `write()`.
+        """
+        self._start()
+        try:
+            self._queue.put((name, data, write), timeout=self.put_timeout)
+        except Queue.Full:
+            raise WriteQueueFull(
+                '{} writes are already waiting'.format(self._queue.maxsize))
+
+    def _work(self):
+        while True:
+            try:
+                # Once closed, stop when there's nothing left rather than
+                # wait for a stop signal which may not have fit in the queue
+                item = self._queue.get(not self._closed)
+            except Queue.Empty:
+                return
+            try:
+                if item is _STOP:
+                    return
+                name, data, write = item
+                try:
+                    write()
+                except Exception as exc:
+                    with self._lock:
+                        self.failures += 1
+                    if self.on_failure is not None:
+                        try:
+                            self.on_failure(name, data, exc)
+                        except Exception:
+                            pass
+                else:
+                    with self._lock:
+                        self.sent += 1
+            finally:
+                self._queue.task_done()
+
+    def pending(self):
+        """
+        Number of writes queued or being sent
+        """
+        return self._queue.unfinished_tasks
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued write has been sent. Returns False if some
+        were still pending after `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                if deadline is None:
+                    self._queue.all_tasks_done.wait()
+                    continue
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=None):
+        """
+        Send the pending writes and stop the workers. Writes can't be
+        queued anymore afterwards. Returns False if some were still pending
+        after `timeout` seconds, in which case the workers stop once they
+        have sent them.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._lock:
+            self._closed = True
+            threads = self._threads
+            self._threads = []
+        flushed = self.flush(timeout)
+        for _ in threads:
+            try:
+                self._queue.put(_STOP, timeout=_remaining(deadline))
+            except Queue.Full:
+                break
+        for thread in threads:
+            thread.join(_remaining(deadline))
+        return flushed
@@ -24,6 +24,14 @@ setup(
         'Operating System :: OS Independent',
     ],
     install_requires=[
-        'requests==2.3.0',
+        'requests==2.4.3',
     ],
+    extras_require={
+        'msgpack': ['msgpack>=0.5.2'],
+    },
+    entry_points={
+        'console_scripts': [
+            'rest_client_loadgen = rest_client.loadgen:main',
+        ],
+    },
 )
@@ -0,0 +1,68 @@
+"""
+Minimal keep-alive HTTP server running in a thread, for the tests that need
+real sockets.
+"""
+
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+import threading
+import time
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def respond(self):
+        # Read the body, or it would be taken for the next request on the
+        # connection
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.requests.append(
+            (self.command, self.path, self.client_address))
+        body = '{"port": %d}' % self.client_address[1]
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_GET = do_POST = do_HEAD = do_OPTIONS = respond
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), Handler)
+        self.connections = []
+        self.requests = []
+
+    def verify_request(self, request, client_address):
+        self.connections.append(client_address)
+        return True
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}/'.format(self.server_address[1])
+
+    def wait_for_connections(self, count, timeout=1.0):
+        """
+        Connections are accepted asynchronously, wait until `count` of them
+        have been seen
+        """
+        give_up_at = time.time() + timeout
+        while len(self.connections) < count and time.time() < give_up_at:
+            time.sleep(0.01)
+        return len(self.connections)
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,96 @@
+"""
+Url conf the generation tests build client packages for
+"""
+
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure()
+
+from django.conf.urls import include, patterns, url  # noqa
+from django.utils.decorators import method_decorator  # noqa
+from django.views.decorators.cache import cache_control, cache_page  # noqa
+from django.views.generic import View  # noqa
+
+
+def view(request, **kwargs):
+    pass
+
+
+class ThingSerializer(object):
+
+    class Meta:
+        fields = ('id', 'name', 'price')
+
+
+class ThingViewSet(View):
+    """
+    Stands for a Django REST framework viewset
+    """
+    serializer_class = ThingSerializer
+
+    @method_decorator(cache_page(60))
+    def list(self, request):
+        pass
+
+    def create(self, request):
+        pass
+
+    def update(self, request, pk):
+        pass
+
+
+def thing_list(request):
+    pass
+
+
+# As set by the as_view() of Django REST framework viewsets
+thing_list.cls = ThingViewSet
+thing_list.actions = {'get': 'list', 'post': 'create'}
+
+
+class ThingDetail(View):
+    """
+    Stands for a Django REST framework RetrieveUpdateDestroyAPIView
+    """
+
+    @method_decorator(cache_control(max_age=30))
+    def get(self, request, pk):
+        pass
+
+    def put(self, request, pk):
+        pass
+
+    def patch(self, request, pk):
+        pass
+
+    def delete(self, request, pk):
+        pass
+
+    def update(self, request, pk):
+        pass
+
+    def destroy(self, request, pk):
+        pass
+
+
+ping = cache_control(no_cache=True)(view)
+
+
+things = patterns(
+    '',
+    url(r'^$', thing_list, name='thing-list'),
+    url(r'^(?P<pk>\d+)/$', ThingDetail.as_view(), name='thing-detail'),
+)
+
+internal = patterns(
+    '',
+    url(r'^stats/$', view, name='stats'),
+)
+
+urlpatterns = patterns(
+    '',
+    url(r'^api/things/', include(things, namespace='things')),
+    url(r'^api/internal/', include(internal, namespace='internal')),
+    url(r'^ping/$', ping, name='ping'),
+)
@@ -0,0 +1,186 @@
+import itertools
+import threading
+import time
+from unittest import TestCase
+
+import mock
+
+import rest_client
+from rest_client.auth import TokenProvider, TokenRefreshError
+from rest_client.client import ApiError, Client
+
+
+class Fetcher(object):
+    """
+    Hand out the tokens t1, t2... slowly enough for callers to overlap
+    """
+
+    def __init__(self, expires_in=3600, delay=0.02):
+        self.expires_in = expires_in
+        self.delay = delay
+        self.counter = itertools.count(1)
+
+    def __call__(self):
+        time.sleep(self.delay)
+        return 't{}'.format(next(self.counter)), self.expires_in
+
+
+def in_threads(target, count=10):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(target()))
+               for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(1)
+    return results
+
+
+class TokenProviderTest(TestCase):
+
+    def test_token_is_cached(self):
+        tokens = TokenProvider(Fetcher(), refresh_margin=60)
+
+        self.assertEqual(tokens.authorization, 'Bearer t1')
+        self.assertEqual(tokens.authorization, 'Bearer t1')
+        self.assertEqual(tokens.refreshes, 1)
+
+    def test_callers_share_a_single_fetch(self):
+        tokens = TokenProvider(Fetcher())
+
+        results = in_threads(lambda: tokens.authorization)
+
+        self.assertEqual(results, ['Bearer t1'] * 10)
+        self.assertEqual(tokens.refreshes, 1)
+
+    def test_refresh_ahead_of_expiry(self):
+        tokens = TokenProvider(Fetcher(expires_in=30), refresh_margin=60,
+                               scheme='')
+        self.assertEqual(tokens.authorization, 't1')
+
+        # Within the margin: the current token is still used while a new
+        # one is fetched in the background
+        self.assertEqual(tokens.authorization, 't1')
+        time.sleep(0.05)
+
+        self.assertEqual(tokens.authorization, 't2')
+        self.assertEqual(tokens.refreshes, 2)
+
+    def test_expired_token_is_replaced(self):
+        tokens = TokenProvider(Fetcher(expires_in=0))
+
+        self.assertEqual(tokens.authorization, 'Bearer t1')
+        self.assertEqual(tokens.authorization, 'Bearer t2')
+
+    def test_rejected_token_is_refreshed_once(self):
+        tokens = TokenProvider(Fetcher())
+        rejected = tokens.authorization
+
+        results = in_threads(lambda: tokens.invalidate(rejected))
+
+        self.assertEqual(results, ['Bearer t2'] * 10)
+        self.assertEqual(tokens.refreshes, 2)
+        # A report of an already replaced token doesn't refresh it again
+        self.assertEqual(tokens.invalidate(rejected), 'Bearer t2')
+        self.assertEqual(tokens.refreshes, 2)
+
+    def test_failed_fetch(self):
+        fetch = mock.Mock(side_effect=IOError('Connection refused'))
+        tokens = TokenProvider(fetch)
+
+        with self.assertRaises(TokenRefreshError) as context:
+            tokens.authorization
+        self.assertIsInstance(context.exception.error, IOError)
+        self.assertEqual(tokens.failures, 1)
+
+        fetch.side_effect = None
+        fetch.return_value = ('t1', None)
+        self.assertEqual(tokens.authorization, 'Bearer t1')
+
+    def test_failed_background_refresh_keeps_the_token(self):
+        fetch = mock.Mock(return_value=('t1', 30))
+        tokens = TokenProvider(fetch, refresh_margin=60, retry_interval=60)
+        tokens.authorization
+        fetch.side_effect = IOError('Connection refused')
+
+        self.assertEqual(tokens.authorization, 'Bearer t1')
+        time.sleep(0.02)
+        self.assertEqual(tokens.authorization, 'Bearer t1')
+
+        # Not tried again before retry_interval
+        self.assertEqual(fetch.call_count, 2)
+
+
+class ClientTokenTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ClientTokenTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'end__point': 'end/point/'
+        }
+
+    def sent_authorizations(self, transport):
+        authorizations = []
+        for call in transport.send.call_args_list:
+            request = mock.Mock(headers={})
+            call[1]['auth'](request)
+            authorizations.append(request.headers['Authorization'])
+        return authorizations
+
+    def test_rejected_request_is_replayed(self):
+        transport = mock.Mock()
+        rejected, accepted = mock.Mock(status_code=401), mock.Mock()
+        accepted.status_code = 200
+        accepted.json.return_value = {'a': 1}
+        transport.send.side_effect = [rejected, accepted]
+        client = Client('http://no.com', transport=transport,
+                        token_provider=TokenProvider(Fetcher(delay=0)))
+
+        self.assertEqual(client.end.point(), {'a': 1})
+
+        self.assertEqual(self.sent_authorizations(transport),
+                         ['Bearer t1', 'Bearer t2'])
+        rejected.close.assert_called_once_with()
+
+    def test_replayed_only_once(self):
+        transport = mock.Mock()
+        transport.send.return_value.status_code = 401
+        client = Client('http://no.com', transport=transport,
+                        token_provider=TokenProvider(Fetcher(delay=0)))
+
+        self.assertRaises(ApiError, client.end.point)
+        self.assertEqual(transport.send.call_count, 2)
+
+    def test_fetch_failures_are_not_host_failures(self):
+        transport = mock.Mock()
+        fetch = mock.Mock(side_effect=IOError('Connection refused'))
+        client = Client(['http://a.com', 'http://b.com'], transport=transport,
+                        token_provider=TokenProvider(fetch))
+
+        self.assertRaises(TokenRefreshError, client.end.point)
+        self.assertFalse(transport.send.called)
+        self.assertEqual(fetch.call_count, 1)
+
+    def test_failed_refresh_after_a_rejection_ends_the_request(self):
+        transport = mock.Mock()
+        transport.send.return_value.status_code = 401
+        fetch = mock.Mock(side_effect=[('t1', 3600),
+                                       IOError('Connection refused')])
+        client = Client(['http://a.com', 'http://b.com'], transport=transport,
+                        token_provider=TokenProvider(fetch))
+
+        self.assertRaises(TokenRefreshError, client.end.point)
+        self.assertEqual(client._hosts.in_flight,
+                         {'http://a.com': 0, 'http://b.com': 0})
+        self.assertEqual(client._hosts.failures,
+                         {'http://a.com': 0, 'http://b.com': 0})
+
+    def test_other_credentials_are_rejected(self):
+        provider = TokenProvider(Fetcher(delay=0))
+
+        self.assertRaises(ValueError, Client, 'http://no.com', 'user',
+                          'password', token_provider=provider)
+        self.assertRaises(ValueError, Client, 'http://no.com',
+                          authorization='Token abc', token_provider=provider)
@@ -0,0 +1,169 @@
+from unittest import TestCase
+
+import mock
+from requests.exceptions import ConnectionError, ConnectTimeout
+
+import rest_client
+from rest_client.balancing import HostPool
+from rest_client.client import Client
+
+
+class HostPoolTest(TestCase):
+
+    def test_faster_host_is_preferred(self):
+        pool = HostPool(['http://a.com', 'http://b.com'], seed=1)
+        pool.start('http://a.com')
+        pool.success('http://a.com', 0.5)
+        pool.start('http://b.com')
+        pool.success('http://b.com', 0.01)
+
+        chosen = [pool.attempt_order()[0] for _ in range(20)]
+
+        self.assertEquals(set(chosen), set(['http://b.com']))
+
+    def test_hung_host_is_avoided(self):
+        pool = HostPool(['http://a.com', 'http://b.com'], seed=1)
+        # a.com never answered, its requests are stuck
+        for _ in range(50):
+            pool.start('http://a.com')
+        pool.start('http://b.com')
+        pool.success('http://b.com', 0.02)
+
+        chosen = [pool.attempt_order()[0] for _ in range(100)]
+
+        self.assertEquals(set(chosen), set(['http://b.com']))
+
+    def test_fast_failing_host_is_avoided(self):
+        pool = HostPool(['http://a.com', 'http://b.com'], max_failures=100,
+                        seed=1)
+        pool.start('http://a.com')
+        pool.failure('http://a.com')
+        pool.start('http://b.com')
+        pool.success('http://b.com', 0.02)
+
+        chosen = [pool.attempt_order()[0] for _ in range(100)]
+
+        self.assertEquals(set(chosen), set(['http://b.com']))
+
+    def test_unknown_hosts_are_tried(self):
+        pool = HostPool(['http://a.com', 'http://b.com'], seed=1)
+        pool.start('http://b.com')
+        pool.success('http://b.com', 0.02)
+
+        chosen = [pool.attempt_order()[0] for _ in range(100)]
+
+        self.assertIn('http://a.com', chosen)
+
+    def test_failing_host_is_ejected(self):
+        pool = HostPool(['http://a.com', 'http://b.com'], max_failures=2)
+        for _ in range(2):
+            pool.start('http://a.com')
+            pool.failure('http://a.com')
+
+        self.assertEquals(pool.attempt_order(), ['http://b.com'])
+
+    def test_all_hosts_are_used_when_all_are_ejected(self):
+        pool = HostPool(['http://a.com', 'http://b.com'], max_failures=1)
+        for url in pool.base_urls:
+            pool.start(url)
+            pool.failure(url)
+
+        self.assertEquals(sorted(pool.attempt_order()),
+                          ['http://a.com', 'http://b.com'])
+
+    def test_stats_show_ejected_hosts(self):
+        pool = HostPool(['http://a.com', 'http://b.com'], max_failures=1)
+        pool.start('http://a.com')
+        pool.failure('http://a.com')
+
+        stats = pool.stats()
+
+        self.assertTrue(stats['http://a.com']['ejected'])
+        self.assertGreater(stats['http://a.com']['ejected_until'], 0)
+        self.assertFalse(stats['http://b.com']['ejected'])
+
+
+class ClientFailoverTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ClientFailoverTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'end__point': 'end/point/'
+        }
+
+    def setUp(self):
+        self.transport = mock.Mock()
+        self.client = Client(['http://a.com', 'http://b.com'],
+                             transport=self.transport)
+        self.urls = []
+
+    def fail_first(self, error=None, status=None):
+        def send(method, url, **kwargs):
+            self.urls.append(url)
+            response = mock.Mock(status_code=200)
+            if len(self.urls) == 1:
+                if error is not None:
+                    raise error
+                response.status_code = status
+            return response
+        self.transport.send.side_effect = send
+
+    def test_get_fails_over_on_connection_error(self):
+        self.fail_first(error=ConnectionError('Connection reset'))
+
+        self.client.end.point()
+
+        self.assertEquals(len(self.urls), 2)
+        self.assertNotEquals(self.urls[0], self.urls[1])
+
+    def test_get_fails_over_on_unavailable_server(self):
+        self.fail_first(status=503)
+
+        self.client.end.point()
+
+        self.assertEquals(len(self.urls), 2)
+
+    def test_post_does_not_fail_over_once_sent(self):
+        self.fail_first(error=ConnectionError('Connection reset'))
+
+        self.assertRaises(ConnectionError, self.client.end.point,
+                          http_method='post')
+        self.assertEquals(len(self.urls), 1)
+
+    def test_post_fails_over_when_connecting_times_out(self):
+        self.fail_first(error=ConnectTimeout('Connect timeout'))
+
+        self.client.end.point(http_method='post')
+
+        self.assertEquals(len(self.urls), 2)
+
+    def test_idempotent_methods_of_the_metadata_fail_over(self):
+        self.fail_first(error=ConnectionError('Connection reset'))
+        metadata = {'end__point': {'idempotent': ['get', 'put']}}
+
+        with mock.patch.object(rest_client.client, 'METADATA', metadata):
+            self.client.end.point(http_method='put')
+
+        self.assertEquals(len(self.urls), 2)
+
+    def test_error_is_raised_when_every_host_fails(self):
+        self.transport.send.side_effect = ConnectionError('Refused')
+
+        self.assertRaises(ConnectionError, self.client.end.point)
+        self.assertEquals(self.transport.send.call_count, 2)
+
+    def test_host_stats(self):
+        self.fail_first(status=503)
+
+        self.client.end.point()
+
+        stats = self.client.host_stats()
+        failed, other = sorted(
+            stats, key=lambda url: not self.urls[0].startswith(url))
+        self.assertEquals(stats[failed]['failures'], 1)
+        self.assertFalse(stats[failed]['ejected'])
+        self.assertEquals(stats[other]['failures'], 0)
+        self.assertGreater(stats[other]['latency'], 0)
+        self.assertEquals(stats[other]['in_flight'], 0)
@@ -0,0 +1,195 @@
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from unittest import TestCase
+
+import mock
+
+import rest_client
+from rest_client.cache import cache_key, SharedCache
+from rest_client.client import Client
+from rest_client.transport import build_response
+
+
+def store_response(path):
+    SharedCache(path, default_ttl=60).set('things/', 200, {},
+                                          '{"from": "child"}')
+
+
+class SharedCacheTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.path = os.path.join(self.tmp_dir, 'cache.db')
+
+    def test_responses_are_shared_between_processes(self):
+        process = multiprocessing.Process(target=store_response,
+                                          args=(self.path,))
+        process.start()
+        process.join()
+
+        cached = SharedCache(self.path).get('things/')
+        self.assertEqual(cached.content, '{"from": "child"}')
+
+    def test_cache_control_is_followed(self):
+        cache = SharedCache(self.path, default_ttl=60)
+        cache.set('no-store/', 200, {'Cache-Control': 'no-store'}, '')
+        cache.set('error/', 500, {}, '')
+        cache.set('max-age/', 200, {'Cache-Control': 'public, max-age=5'}, '')
+
+        self.assertIsNone(cache.get('no-store/'))
+        self.assertIsNone(cache.get('error/'))
+        self.assertLessEqual(cache.get('max-age/').expires - time.time(), 5)
+
+    def test_responses_without_caching_headers_are_only_revalidated(self):
+        cache = SharedCache(self.path)
+        cache.set('plain/', 200, {}, '')
+        cache.set('etag/', 200, {'ETag': '"v1"'}, '')
+
+        self.assertIsNone(cache.get('plain/'))
+        self.assertLessEqual(cache.get('etag/').expires, time.time())
+
+    def test_least_recently_used_responses_are_evicted(self):
+        cache = SharedCache(self.path, max_size=100, default_ttl=60)
+        with mock.patch('time.time', side_effect=range(10)):
+            for index in range(3):
+                cache.set('things/{}/'.format(index), 200, {}, 'x' * 30)
+            # Reading the oldest response makes it the most recently used
+            cache.get('things/0/')
+            cache.set('things/3/', 200, {}, 'x' * 30)
+
+            self.assertEqual(cache.size(), 90)
+            self.assertIsNone(cache.get('things/1/'))
+            for index in (0, 2, 3):
+                self.assertIsNotNone(cache.get('things/{}/'.format(index)))
+
+    def test_key_ignores_query_order_and_separates_users(self):
+        self.assertEqual(cache_key('things/?b=2&a=1'),
+                         cache_key('things/?a=1&b=2'))
+        self.assertNotEqual(cache_key('things/', authorization='Token a'),
+                            cache_key('things/', authorization='Token b'))
+        self.assertNotEqual(cache_key('things/', hosts='http://a/'),
+                            cache_key('things/', hosts='http://b/'))
+
+
+class ClientCacheTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ClientCacheTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'end__point': 'end/point/'
+        }
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.cache = SharedCache(os.path.join(self.tmp_dir, 'cache.db'))
+        self.transport = mock.Mock()
+
+    def client(self, base_url='http://no.com'):
+        return Client(base_url, transport=self.transport, cache=self.cache)
+
+    def respond(self, status, headers, content=''):
+        self.transport.send.return_value = build_response(
+            'http://no.com/end/point/', status, headers, content)
+
+    def test_fresh_responses_skip_the_network(self):
+        self.respond(200, {'Cache-Control': 'max-age=60'}, '{"a": 1}')
+
+        self.assertEqual(self.client().end.point(), {'a': 1})
+        self.assertEqual(self.client().end.point(), {'a': 1})
+
+        self.assertEqual(self.transport.send.call_count, 1)
+
+    def test_apis_dont_share_responses(self):
+        self.respond(200, {'Cache-Control': 'max-age=60'}, '{"a": 1}')
+        self.client('http://billing/').end.point()
+        self.client('http://users/').end.point()
+        self.client(['http://b/', 'http://a/']).end.point()
+        # Replicas of the same hosts do
+        self.client(['http://a/', 'http://b/']).end.point()
+
+        self.assertEqual(self.transport.send.call_count, 3)
+
+    def lock(self):
+        """
+        Hold the write lock of the cache like a writing process would
+        """
+        connection = sqlite3.connect(self.cache.path, isolation_level=None)
+        connection.execute('UPDATE responses SET accessed = 0')
+        connection.execute('BEGIN IMMEDIATE')
+        self.addCleanup(connection.close)
+        self.addCleanup(connection.rollback)
+
+    def test_locked_cache_still_answers(self):
+        self.respond(200, {'Cache-Control': 'max-age=60'}, '{"a": 1}')
+        self.client().end.point()
+        self.lock()
+
+        started = time.time()
+        self.assertEqual(self.client().end.point(), {'a': 1})
+
+        self.assertEqual(self.transport.send.call_count, 1)
+        self.assertLess(time.time() - started, 0.05)
+
+    def test_responses_are_not_stored_in_a_locked_cache(self):
+        self.respond(200, {'Cache-Control': 'max-age=60'}, '{"a": 1}')
+        self.cache.get('warm up')
+        self.lock()
+
+        self.assertEqual(self.client().end.point(), {'a': 1})
+        self.assertEqual(self.client().end.point(), {'a': 1})
+
+        self.assertEqual(self.transport.send.call_count, 2)
+
+    def test_stale_responses_are_revalidated(self):
+        self.respond(200, {'Cache-Control': 'no-cache', 'ETag': '"v1"'},
+                     '{"a": 1}')
+        self.client().end.point()
+        self.respond(304, {'Cache-Control': 'max-age=60'})
+
+        self.assertEqual(self.client().end.point(), {'a': 1})
+        self.assertEqual(self.client().end.point(), {'a': 1})
+
+        self.assertEqual(self.transport.send.call_count, 2)
+        headers = self.transport.send.call_args[1]['headers']
+        self.assertEqual(headers['If-None-Match'], '"v1"')
+
+    def test_max_age_of_the_metadata_is_the_default(self):
+        self.respond(200, {}, '{"a": 1}')
+        metadata = {'end__point': {'max_age': 60}}
+
+        with mock.patch.object(rest_client.client, 'METADATA', metadata):
+            self.client().end.point()
+            self.client().end.point()
+
+        self.assertEqual(self.transport.send.call_count, 1)
+
+    def test_views_without_max_age_use_the_cache_default(self):
+        self.respond(200, {}, '{"a": 1}')
+        self.cache.default_ttl = 60
+        # A class-based view, with its methods, and a function-based one
+        metadata = {'end__point': {'methods': ['get']}}
+
+        with mock.patch.object(rest_client.client, 'METADATA', metadata):
+            self.client().end.point()
+            self.client().end.point()
+        with mock.patch.object(rest_client.client, 'METADATA', {}):
+            self.client('http://other.com').end.point()
+            self.client('http://other.com').end.point()
+
+        self.assertEqual(self.transport.send.call_count, 2)
+
+    def test_other_methods_are_not_cached(self):
+        self.respond(200, {}, '{"a": 1}')
+
+        self.client().end.point(http_method='post')
+        self.client().end.point(http_method='post')
+
+        self.assertEqual(self.transport.send.call_count, 2)
@@ -3,9 +3,12 @@ from unittest import TestCase
 import urllib
 
 import httpretty
+import mock
 
 import rest_client
-from rest_client.client import Client
+from rest_client.client import (
+    Client, Deadline, DeadlineExceeded, DEADLINE_HEADER, MethodNotAllowed
+)
 
 
 class RestClientTest(TestCase):
@@ -176,3 +179,182 @@ class RestClientTest(TestCase):
             httpretty.last_request().headers['ANOTHER_header'],
             headers['ANOTHER_header']
         )
+
+    @httpretty.activate
+    def test_fields_are_sent_as_a_list_of_names(self):
+        httpretty.register_uri(
+            httpretty.GET, 'http://no.com/end/point/',
+            body='{"name": "object_name"}',
+            content_type="application/json"
+        )
+
+        self.client.end.point(fields=['name', 'created'])
+
+        self.assertEquals(httpretty.last_request().querystring,
+                          {'fields': ['name,created']})
+
+
+class TimeoutsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TimeoutsTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'end__point': 'end/point/',
+            'end__other': 'end/other/',
+            'single': 'single/',
+        }
+
+    def test_timeout_lookup_prefers_most_specific_name(self):
+        client = Client('http://no.com', timeout=10, timeouts={
+            'end': (1, 5),
+            'end__point': 2,
+        })
+
+        self.assertEquals(client._timeout_for('end__point'), 2)
+        self.assertEquals(client._timeout_for('end__other'), (1, 5))
+        self.assertEquals(client._timeout_for('single'), 10)
+
+    def setUp(self):
+        self.transport = mock.Mock()
+        self.transport.send.return_value.status_code = 200
+
+    def test_timeout_is_passed_to_transport(self):
+        client = Client('http://no.com', timeouts={'end': (1, 5)},
+                        transport=self.transport)
+
+        client.end.point()
+
+        self.assertEquals(self.transport.send.call_args[1]['timeout'], (1, 5))
+
+    def test_call_timeout_overrides_client_timeout(self):
+        client = Client('http://no.com', timeout=10, transport=self.transport)
+
+        client.end.point(http_timeout=3)
+
+        self.assertEquals(self.transport.send.call_args[1]['timeout'], 3)
+
+    def test_deadline_caps_timeout_and_is_sent(self):
+        client = Client('http://no.com', timeout=(1, 30),
+                        transport=self.transport)
+
+        client.end.point(http_deadline=5)
+
+        request_kwargs = self.transport.send.call_args[1]
+        connect, read = request_kwargs['timeout']
+        self.assertEquals(connect, 1)
+        self.assertTrue(4 < read <= 5)
+        remaining = int(request_kwargs['headers'][DEADLINE_HEADER])
+        self.assertTrue(4000 < remaining <= 5000)
+
+    def test_expired_deadline_does_not_send_request(self):
+        client = Client('http://no.com', transport=self.transport)
+        deadline = Deadline(-1)
+
+        self.assertRaises(DeadlineExceeded, client.end.point,
+                          http_deadline=deadline)
+        self.assertFalse(self.transport.send.called)
+
+
+class LazyResponseTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(LazyResponseTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'end__point': 'end/point/'
+        }
+
+    @httpretty.activate
+    def test_lazy_response(self):
+        httpretty.register_uri(
+            httpretty.GET, 'http://no.com/end/point/',
+            body='{"name": "object_name"}',
+            content_type="application/json"
+        )
+        client = Client('http://no.com', lazy_responses=True)
+
+        response = client.end.point()
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.headers['content-type'],
+                          'application/json')
+        self.assertEquals(response.content, '{"name": "object_name"}')
+        self.assertEquals(response.body_view().tobytes(), response.content)
+        self.assertEquals(response['name'], 'object_name')
+        self.assertIs(response.json(), response.json())
+
+    def test_json_is_decoded_only_when_accessed(self):
+        transport = mock.Mock()
+        transport.send.return_value.status_code = 200
+        transport.send.return_value.content = 'not json'
+        transport.send.return_value.headers = {}
+        client = Client('http://no.com', transport=transport)
+
+        response = client.end.point(http_lazy=True)
+
+        self.assertTrue(response.ok)
+        self.assertRaises(ValueError, response.json)
+
+
+class ConvertersTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ConvertersTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'things__thing_detail': 'things/{pk}/',
+            'things__thing_archive': 'things/{year}/{slug}/',
+        }
+        cls.converters = rest_client.client.CONVERTERS
+        rest_client.client.CONVERTERS = {
+            'things__thing_detail': {'pk': 'int'},
+            'things__thing_archive': {'year': '(19|20)\\d{2}',
+                                      'slug': 'slug'},
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        rest_client.client.CONVERTERS = cls.converters
+        super(ConvertersTest, cls).tearDownClass()
+
+    def setUp(self):
+        self.transport = mock.Mock()
+        self.transport.send.return_value.status_code = 200
+        self.client = Client('http://no.com', transport=self.transport)
+
+    def sent_url(self):
+        return self.transport.send.call_args[0][1]
+
+    def test_valid_arguments_are_coerced(self):
+        self.client.things.thing_detail(pk=42)
+        self.assertEquals(self.sent_url(), 'http://no.com/things/42/')
+
+        self.client.things.thing_archive(year='1999', slug='a-b_c')
+        self.assertEquals(self.sent_url(),
+                          'http://no.com/things/1999/a-b_c/')
+
+    def test_invalid_arguments_are_rejected_without_request(self):
+        for kwargs in ({'pk': 'abc'}, {'pk': -1}, {'pk': True}, {}):
+            self.assertRaises(ValueError, self.client.things.thing_detail,
+                              **kwargs)
+        self.assertRaises(ValueError, self.client.things.thing_archive,
+                          year=2150, slug='ok')
+        self.assertRaises(ValueError, self.client.things.thing_archive,
+                          year=2015, slug='not/ok')
+
+        self.assertFalse(self.transport.send.called)
+
+    def test_methods_the_view_does_not_allow_are_rejected(self):
+        metadata = {'things__thing_detail': {'methods': ['get', 'put']}}
+
+        with mock.patch.object(rest_client.client, 'METADATA', metadata):
+            self.client.things.thing_detail(pk=1, http_method='PUT')
+            self.assertRaises(MethodNotAllowed,
+                              self.client.things.thing_detail, pk=1,
+                              http_method='delete')
+
+        self.assertEquals(self.transport.send.call_count, 1)
@@ -1,6 +1,12 @@
+import imp
+import os
+import shutil
+import tempfile
 from unittest import TestCase
 
-from rest_client.management.commands.generate_api_client import clean_patterns
+from rest_client.management.commands.generate_api_client import (
+    clean_converters, clean_patterns, Command, extract_converters
+)
 
 
 class ClientGenerationTest(TestCase):
@@ -53,3 +59,79 @@ class ClientGenerationTest(TestCase):
         self.assertEqual(result[0][0], 'bakery__bake')
         self.assertEqual(
             result[0][1], 'bakery/bake/{pk}/and-then/{another_id}/')
+
+
+class ClientPackageTest(TestCase):
+
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_dir)
+
+    def test_generated_package_only_has_runtime_modules(self):
+        Command().copy_base_client_library(
+            self.base_dir, {'FULL_PACKAGE': 'my_client'})
+
+        files = os.listdir(os.path.join(self.base_dir, 'my_client'))
+        self.assertIn('client.py', files)
+        self.assertIn('endpoints.py', files)
+        for generator_only in ('management', 'unparse.py',
+                               'setup_template.py'):
+            self.assertNotIn(generator_only, files)
+
+    def test_endpoints_are_sharded_by_namespace(self):
+        os.makedirs(os.path.join(self.base_dir, 'my_client'))
+        Command().write_endpoints_module(
+            self.base_dir, {'FULL_PACKAGE': 'my_client'},
+            {'things__thing_detail': 'things/{pk}/', 'ping': 'ping/',
+             'status': 'status/'},
+            {'things__thing_detail': {'pk': 'int'}}
+        )
+
+        package_path = os.path.join(self.base_dir, 'my_client')
+        index = imp.load_source(
+            'index', os.path.join(package_path, 'endpoints.py'))
+        # Endpoints outside of any namespace share a shard
+        self.assertEqual(index.SHARDS, {'things': '_things', '': '_root'})
+        root = imp.load_source('root', os.path.join(
+            package_path, 'endpoint_shards', '_root.py'))
+        self.assertEqual(root.ENDPOINTS,
+                         {'ping': 'ping/', 'status': 'status/'})
+        things = imp.load_source('things', os.path.join(
+            package_path, 'endpoint_shards', '_things.py'))
+        self.assertEqual(things.ENDPOINTS,
+                         {'things__thing_detail': 'things/{pk}/'})
+        self.assertEqual(things.CONVERTERS,
+                         {'things__thing_detail': {'pk': 'int'}})
+
+
+class ConvertersTest(TestCase):
+
+    def test_known_converters(self):
+        converters = extract_converters(
+            '^bakery/(?P<pk>[^/]+)/bake/(?P<thing_id>\\d+)/(?P<slug>[-\\w]+)/')
+
+        self.assertEqual(converters, {
+            'pk': 'str',
+            'thing_id': 'int',
+            'slug': 'slug',
+        })
+
+    def test_unknown_regular_expressions_are_kept(self):
+        converters = extract_converters(
+            '^archive/(?P<year>(19|20)\\d{2})/(?P<code>[a-f)]{4})/$')
+
+        self.assertEqual(converters, {
+            'year': '(19|20)\\d{2}',
+            'code': '[a-f)]{4}',
+        })
+
+    def test_clean_converters_skips_patterns_without_arguments(self):
+        urls_data = [
+            (lambda _: None, 'api/things/$', 'things:thing-list'),
+            (lambda _: None, 'api/things/(?P<pk>\\d+)/$',
+             'things:thing-detail'),
+        ]
+
+        self.assertEqual(clean_converters(urls_data), {
+            'things__thing_detail': {'pk': 'int'},
+        })
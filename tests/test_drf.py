@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+import mock
+
+from rest_client.drf import SparseFieldsMixin
+
+
+class Serializer(object):
+    """
+    Stand-in for a Django REST framework serializer
+    """
+
+    def __init__(self, instance=None, context=None):
+        self.context = context or {}
+        self.fields = {'id': None, 'name': None, 'created': None}
+
+
+class ThingSerializer(SparseFieldsMixin, Serializer):
+    pass
+
+
+class SparseFieldsMixinTest(TestCase):
+
+    def request(self, **query):
+        return mock.Mock(query_params=query)
+
+    def test_only_requested_fields_are_kept(self):
+        serializer = ThingSerializer(context={
+            'request': self.request(fields='id, name,unknown')})
+
+        self.assertEqual(sorted(serializer.fields), ['id', 'name'])
+
+    def test_every_field_is_kept_by_default(self):
+        for context in ({}, {'request': self.request()}):
+            serializer = ThingSerializer(context=context)
+
+            self.assertEqual(len(serializer.fields), 3)
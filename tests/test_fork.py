@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import urlparse
+from unittest import TestCase
+
+import rest_client
+from rest_client.client import Client
+from rest_client.metrics import MetricsRegistry
+from rest_client.writes import WriteBehindQueue
+
+from .http_server import Server
+
+
+def use_client(client, writes, metrics):
+    """
+    Body of the worker processes, exiting with 1 if anything went wrong
+    """
+    pid = os.getpid()
+    for _ in range(3):
+        client.end.point(pid=pid)
+    client.end.point = {'pid': pid}
+    flushed = writes.flush(timeout=2)
+    requests = metrics.snapshot()[('end__point', 'GET')]['requests']
+    os._exit(0 if flushed and writes.sent == 1 and requests == 3 else 1)
+
+
+class ForkTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ForkTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'end__point': 'end/point/'
+        }
+
+    def setUp(self):
+        self.server = Server()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def test_connections_are_not_shared_with_child_processes(self):
+        writes = WriteBehindQueue(workers=1)
+        metrics = MetricsRegistry()
+        client = Client(self.server.url, write_behind=writes, metrics=metrics)
+        # Leave an open connection in the pool, and a running write worker
+        client.end.point(pid=os.getpid())
+        client.end.point = {'pid': os.getpid()}
+        writes.flush()
+
+        processes = [
+            multiprocessing.Process(target=use_client,
+                                    args=(client, writes, metrics))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        self.assertEqual([process.exitcode for process in processes],
+                         [0] * 4)
+        pids_by_port = {}
+        for method, path, (_, port) in self.server.requests:
+            if method == 'GET':
+                query = urlparse.parse_qs(urlparse.urlparse(path).query)
+                pids_by_port.setdefault(port, set()).update(query['pid'])
+        self.assertEqual(len(pids_by_port), 5)
+        for pids in pids_by_port.values():
+            self.assertEqual(len(pids), 1)
+        # The parent process keeps using its own connection
+        client.end.point(pid=os.getpid())
+        self.assertEqual(metrics.snapshot()[('end__point', 'GET')]['requests'],
+                         2)
@@ -0,0 +1,99 @@
+import datetime
+import decimal
+import json
+from StringIO import StringIO
+from unittest import skipIf, TestCase
+
+import mock
+
+import rest_client
+from rest_client.client import Client
+from rest_client.drf import MessagePackParser, MessagePackRenderer
+from rest_client.formats import JSON, MSGPACK
+from rest_client.response import LazyResponse
+from rest_client.transport import build_response
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+@skipIf(msgpack is None, 'msgpack is not installed')
+class MessagePackTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(MessagePackTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'end__point': 'end/point/'
+        }
+
+    def setUp(self):
+        self.transport = mock.Mock()
+        self.client = Client('http://no.com', transport=self.transport,
+                             msgpack=True)
+
+    def respond(self, *responses):
+        self.transport.send.side_effect = [
+            build_response('http://no.com/end/point/', status,
+                           {'Content-Type': content_type}, content)
+            for status, content_type, content in responses
+        ]
+
+    def sent(self, call):
+        return self.transport.send.call_args_list[call][1]
+
+    def test_msgpack_responses_are_decoded(self):
+        self.respond((200, MSGPACK, msgpack.packb({'a': [1, 2.5]})))
+
+        self.assertEqual(self.client.end.point(), {'a': [1, 2.5]})
+        self.assertIn(MSGPACK, self.sent(0)['headers']['Accept'])
+
+    def test_json_is_used_with_servers_without_msgpack(self):
+        self.respond((200, JSON, '{"a": 1}'), (201, JSON, '{}'))
+
+        self.assertEqual(self.client.end.point(), {'a': 1})
+        self.client.end.point(http_method='post', http_body={'b': 2})
+
+        self.assertEqual(self.sent(1)['data'], '{"b": 2}')
+
+    def test_bodies_are_sent_as_msgpack_once_the_server_answers_in_it(self):
+        self.respond((200, MSGPACK, msgpack.packb({})),
+                     (201, MSGPACK, msgpack.packb({})))
+
+        self.client.end.point()
+        self.client.end.point(http_method='post', http_body={'b': 2})
+
+        self.assertEqual(self.sent(1)['headers']['Content-type'], MSGPACK)
+        self.assertEqual(msgpack.unpackb(self.sent(1)['data']), {'b': 2})
+
+    def test_unsupported_msgpack_body_is_sent_again_as_json(self):
+        self.respond((200, MSGPACK, msgpack.packb({})),
+                     (415, JSON, '{}'),
+                     (201, JSON, '{}'))
+
+        self.client.end.point()
+        self.client.end.point(http_method='post', http_body={'b': 2})
+
+        self.assertEqual(self.sent(2)['data'], '{"b": 2}')
+        self.assertEqual(self.sent(2)['headers']['Content-type'], JSON)
+        self.assertFalse(self.client._msgpack_accepted)
+
+    def test_lazy_response_decodes_msgpack(self):
+        response = LazyResponse(200, {'Content-Type': MSGPACK},
+                                msgpack.packb({'a': 1}))
+
+        self.assertEqual(response['a'], 1)
+
+    def test_renderer_and_parser(self):
+        data = {'name': u'caf\xe9', 'spend': decimal.Decimal('1.50'),
+                'day': datetime.date(2014, 6, 1)}
+
+        body = MessagePackRenderer().render(data)
+        parsed = MessagePackParser().parse(StringIO(body))
+
+        self.assertEqual(parsed, {'name': u'caf\xe9', 'spend': '1.50',
+                                  'day': '2014-06-01'})
+        self.assertLess(len(body), len(json.dumps(parsed)))
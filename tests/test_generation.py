@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from rest_client.management.generation import (
+    generate_client, generate_clients, parse_urls
+)
+
+from . import sample_urls
+
+
+class GenerationTest(TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+        self.cwd = os.getcwd()
+
+    def read_endpoints(self, package_dir, package):
+        namespace = {}
+        execfile(os.path.join(package_dir, package, 'endpoints.py'),
+                 namespace)
+        return namespace['SHARDS']
+
+    def test_parse_urls(self):
+        tables = parse_urls(sample_urls, skip_namespaces=['internal'])
+
+        self.assertEqual(tables.endpoints, {
+            'things__thing_list': 'api/things/',
+            'things__thing_detail': 'api/things/{pk}/',
+            'ping': 'ping/',
+        })
+        self.assertEqual(tables.converters,
+                         {'things__thing_detail': {'pk': 'int'}})
+        self.assertEqual(tables.skipped, [])
+        self.assertEqual(tables.skipped_namespaces, ['internal'])
+        self.assertEqual(tables.layouts,
+                         {'things__thing_list': ['id', 'name', 'price']})
+        self.assertEqual(tables.metadata, {
+            'things__thing_list': {
+                'methods': ['get', 'head', 'options', 'post'],
+                'idempotent': ['get', 'head', 'options'],
+                'max_age': 60,
+            },
+            'things__thing_detail': {
+                'methods': ['delete', 'get', 'head', 'options', 'patch',
+                            'put'],
+                'idempotent': ['delete', 'get', 'head', 'options', 'put'],
+                'max_age': 30,
+            },
+            'ping': {'max_age': 0},
+        })
+
+    def test_declared_layouts_are_written(self):
+        package_dir = os.path.join(self.output_dir, 'build')
+
+        generate_client(sample_urls, 'my_client', '1.0.0', package_dir,
+                        sdist=False, layouts={'ping': ['status']})
+
+        shards = os.path.join(package_dir, 'my_client', 'endpoint_shards')
+        tables = {}
+        execfile(os.path.join(shards, '_root.py'), tables)
+        self.assertEqual(tables['LAYOUTS'], {'ping': ['status']})
+        tables = {}
+        execfile(os.path.join(shards, '_things.py'), tables)
+        self.assertEqual(tables['LAYOUTS'],
+                         {'things__thing_list': ['id', 'name', 'price']})
+        self.assertEqual(tables['METADATA']['things__thing_list']['max_age'],
+                         60)
+
+    def test_generate_client_builds_an_sdist_without_changing_directory(self):
+        package_dir = os.path.join(self.output_dir, 'build')
+
+        generate_client(sample_urls, 'my_client', '1.0.0', package_dir)
+
+        self.assertEqual(os.getcwd(), self.cwd)
+        self.assertEqual(os.listdir(os.path.join(package_dir, 'dist')),
+                         ['my_client-1.0.0.tar.gz'])
+
+    def test_only_generated_directories_are_replaced(self):
+        package_dir = os.path.join(self.output_dir, 'build')
+        generate_client(sample_urls, 'my_client', '1.0.0', package_dir,
+                        sdist=False)
+        generate_client(sample_urls, 'my_client', '1.0.1', package_dir,
+                        sdist=False)
+        with open(os.path.join(self.output_dir, 'notes.txt'), 'w'):
+            pass
+
+        self.assertRaises(ValueError, generate_client, sample_urls,
+                          'my_client', '1.0.0', self.output_dir, sdist=False)
+        self.assertTrue(os.path.exists(
+            os.path.join(self.output_dir, 'notes.txt')))
+
+    def test_batch_generation_in_processes(self):
+        jobs = [
+            {'urls_module': 'tests.sample_urls', 'name': 'my_client',
+             'version': '1.0.0', 'output_dir': os.path.join(self.output_dir,
+                                                            'v1')},
+            {'urls_module': 'tests.sample_urls', 'name': 'my_client',
+             'version': '2.0.0', 'skip_namespaces': ['internal'],
+             'output_dir': os.path.join(self.output_dir, 'v2')},
+        ]
+
+        package_dirs = generate_clients(jobs, processes=2, sdist=False)
+
+        self.assertEqual(package_dirs, [job['output_dir'] for job in jobs])
+        self.assertIn('internal',
+                      self.read_endpoints(package_dirs[0], 'my_client'))
+        self.assertNotIn('internal',
+                         self.read_endpoints(package_dirs[1], 'my_client'))
+
+    def test_jobs_need_their_own_output_directory(self):
+        job = {'urls_module': sample_urls, 'name': 'my_client',
+               'version': '1.0.0', 'output_dir': self.output_dir}
+
+        self.assertRaises(ValueError, generate_clients, [job, job])
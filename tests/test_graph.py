@@ -0,0 +1,148 @@
+import threading
+import time
+from unittest import TestCase
+
+import mock
+
+import rest_client
+from rest_client.client import Client
+from rest_client.graph import CallGraph, GraphError, ITEM
+from rest_client.scheduling import PriorityScheduler
+
+
+class FakeTransport(object):
+    """
+    Answer with the body registered for each path after `latency` seconds,
+    recording the requests
+    """
+
+    def __init__(self, bodies, latency=0.02):
+        self.bodies = bodies
+        self.latency = latency
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send(self, method, url, **kwargs):
+        path = url.split('no.com/', 1)[1]
+        with self.lock:
+            self.sent.append((method, path))
+        time.sleep(self.latency)
+        response = mock.Mock(headers={})
+        if path in self.bodies:
+            response.status_code = 200
+            response.json.return_value = self.bodies[path]
+        else:
+            response.status_code = 404
+            response.content = ''
+        return response
+
+
+class CallGraphTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(CallGraphTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'campaigns__campaign_detail': 'campaigns/{pk}/',
+            'advertisers__advertiser_detail': 'advertisers/{pk}/',
+            'creatives__creative_detail': 'creatives/{pk}/',
+        }
+
+    def setUp(self):
+        self.transport = FakeTransport({
+            'campaigns/1/': {'advertiser': 7, 'creatives': [10, 11, 10]},
+            'campaigns/2/': {'advertiser': 7, 'creatives': []},
+            'advertisers/7/': {'name': 'Acme'},
+            'creatives/10/': {'size': '300x250'},
+            'creatives/11/': {'size': '728x90'},
+        })
+        self.client = Client('http://no.com/', transport=self.transport)
+
+    def test_calls_take_arguments_from_other_results(self):
+        graph = CallGraph()
+        campaign = graph.call(self.client.campaigns.campaign_detail, pk=1)
+        advertiser = graph.call(self.client.advertisers.advertiser_detail,
+                                pk=campaign['advertiser'])
+        creatives = graph.map(self.client.creatives.creative_detail,
+                              campaign['creatives'], pk=ITEM)
+
+        results = graph.run()
+
+        self.assertEqual(results[advertiser], {'name': 'Acme'})
+        self.assertEqual([creative['size'] for creative in results[creatives]],
+                         ['300x250', '728x90', '300x250'])
+        # Duplicate calls are only sent once
+        self.assertEqual(sorted(self.transport.sent), [
+            ('get', 'advertisers/7/'), ('get', 'campaigns/1/'),
+            ('get', 'creatives/10/'), ('get', 'creatives/11/'),
+        ])
+
+    def test_independent_calls_are_concurrent(self):
+        self.transport.latency = 0.1
+        graph = CallGraph()
+        for pk in (1, 2):
+            campaign = graph.call(self.client.campaigns.campaign_detail,
+                                  pk=pk)
+            graph.call(self.client.advertisers.advertiser_detail,
+                       pk=campaign['advertiser'])
+
+        started = time.time()
+        graph.run(workers=4)
+
+        # Two rounds of requests, the second shared by both campaigns
+        self.assertLess(time.time() - started, 0.3)
+        self.assertEqual(len(self.transport.sent), 3)
+
+    def test_writes_are_not_shared(self):
+        graph = CallGraph()
+        for _ in range(2):
+            graph.call(self.client.advertisers.advertiser_detail, pk=7,
+                       http_method='post', http_body={'name': 'Acme'})
+
+        graph.run()
+
+        self.assertEqual(self.transport.sent, [('post', 'advertisers/7/')] * 2)
+
+    def test_failures_skip_dependent_calls(self):
+        graph = CallGraph()
+        missing = graph.call(self.client.campaigns.campaign_detail, pk=3)
+        graph.call(self.client.advertisers.advertiser_detail,
+                   pk=missing['advertiser'])
+        other = graph.call(self.client.campaigns.campaign_detail, pk=2)
+        empty = graph.map(self.client.creatives.creative_detail,
+                          other['creatives'], pk=ITEM)
+
+        with self.assertRaises(GraphError) as context:
+            graph.run()
+
+        self.assertEqual(list(context.exception.errors), [missing])
+        self.assertEqual(context.exception.results[empty], [])
+        self.assertNotIn(('get', 'advertisers/7/'), self.transport.sent)
+
+    def test_calls_have_the_priority_of_the_caller(self):
+        scheduler = PriorityScheduler()
+        client = Client('http://no.com', transport=self.transport,
+                        scheduler=scheduler)
+        graph = CallGraph()
+        campaign = graph.call(client.campaigns.campaign_detail, pk=1)
+        graph.call(client.advertisers.advertiser_detail,
+                   pk=campaign['advertiser'])
+        graph.call(client.campaigns.campaign_detail, pk=2,
+                   http_priority='interactive')
+
+        with scheduler.priority('bulk'):
+            graph.run()
+
+        stats = scheduler.snapshot()
+        self.assertEqual(stats['bulk']['granted'], 2)
+        self.assertEqual(stats['interactive']['granted'], 1)
+        self.assertEqual(stats['default']['granted'], 0)
+
+    def test_references_must_be_from_the_same_graph(self):
+        other = CallGraph().call(self.client.campaigns.campaign_detail, pk=1)
+
+        self.assertRaises(ValueError, CallGraph().call,
+                          self.client.advertisers.advertiser_detail,
+                          pk=other['advertiser'])
+        self.assertRaises(TypeError, list, other)
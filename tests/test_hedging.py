@@ -0,0 +1,153 @@
+import Queue
+import threading
+import time
+from unittest import TestCase
+
+import mock
+
+import rest_client
+from rest_client.client import Client
+from rest_client.hedging import HedgingPolicy
+
+
+class SlowSender(object):
+    """
+    Callable returning mock responses after the given delays, one per call
+    """
+
+    def __init__(self, *delays):
+        self.delays = list(delays)
+        self.responses = []
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            delay = self.delays.pop(0)
+            response = mock.Mock(delay=delay)
+            self.responses.append(response)
+        time.sleep(delay)
+        return response
+
+
+class SlowQueue(Queue.Queue):
+    """
+    Queue whose consumer is slow to handle errors
+    """
+
+    def get(self, *args, **kwargs):
+        item = Queue.Queue.get(self, *args, **kwargs)
+        if item[1] is not None:
+            time.sleep(0.05)
+        return item
+
+
+class HedgingPolicyTest(TestCase):
+
+    def test_fast_response_is_not_hedged(self):
+        policy = HedgingPolicy(initial_delay=0.5)
+        send = SlowSender(0)
+
+        response = policy.send('end__point', send)
+
+        self.assertEquals(response.delay, 0)
+        self.assertEquals(policy.hedges, 0)
+
+    def test_slow_response_is_hedged(self):
+        policy = HedgingPolicy(initial_delay=0.02)
+        send = SlowSender(0.5, 0)
+
+        response = policy.send('end__point', send)
+
+        self.assertEquals(response.delay, 0)
+        self.assertEquals(policy.hedges, 1)
+
+    def test_discarded_response_is_closed(self):
+        policy = HedgingPolicy(initial_delay=0.02)
+        send = SlowSender(0.1, 0)
+
+        policy.send('end__point', send)
+        time.sleep(0.2)
+
+        slow_response = send.responses[0]
+        self.assertTrue(slow_response.close.called)
+
+    def test_budget_caps_hedges(self):
+        policy = HedgingPolicy(initial_delay=0.01, budget=0, burst=1)
+        send = SlowSender(0.05, 0, 0.05)
+
+        policy.send('end__point', send)
+        policy.send('end__point', send)
+
+        self.assertEquals(policy.hedges, 1)
+        self.assertEquals(policy.requests, 2)
+
+    def test_delay_uses_latency_percentile(self):
+        policy = HedgingPolicy(percentile=90, min_samples=10, min_delay=0)
+        for latency in range(100):
+            policy.record('end__point', latency / 1000.0)
+
+        self.assertEquals(policy.delay('end__point'), 0.09)
+        self.assertEquals(policy.delay('end__other'), policy.initial_delay)
+
+    def test_error_is_raised_only_when_every_attempt_failed(self):
+        policy = HedgingPolicy(initial_delay=0.01)
+        calls = []
+
+        def send():
+            calls.append(None)
+            if len(calls) == 1:
+                time.sleep(0.05)
+                raise IOError('Connection reset')
+            return 'response'
+
+        self.assertEquals(policy.send('end__point', send), 'response')
+
+        def fail():
+            time.sleep(0.02)
+            raise IOError('Connection reset')
+
+        self.assertRaises(IOError, policy.send, 'end__point', fail)
+
+    def test_hedge_answering_right_after_a_failure_is_used(self):
+        policy = HedgingPolicy(initial_delay=0.01)
+        send = SlowSender(0.03, 0.03)
+
+        def first_fails():
+            response = send()
+            if response is send.responses[0]:
+                raise IOError('Connection reset')
+            return response
+
+        with mock.patch('rest_client.hedging.Queue',
+                        mock.Mock(Queue=SlowQueue, Empty=Queue.Empty)):
+            response = policy.send('end__point', first_fails)
+
+        self.assertIs(response, send.responses[1])
+        self.assertFalse(response.close.called)
+
+
+class ClientHedgingTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ClientHedgingTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'end__point': 'end/point/'
+        }
+
+    def test_only_idempotent_calls_are_hedged(self):
+        transport = mock.Mock()
+        transport.send.return_value.status_code = 200
+        policy = mock.Mock()
+        policy.send.side_effect = lambda name, send: send()
+        client = Client('http://no.com', hedging=policy, transport=transport)
+
+        client.end.point()
+        client.end.point(http_method='post')
+
+        self.assertEquals(policy.send.call_count, 1)
+        self.assertEquals(
+            [call[0][0] for call in transport.send.call_args_list],
+            ['get', 'post']
+        )
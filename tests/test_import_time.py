@@ -0,0 +1,27 @@
+import os
+import sys
+from unittest import TestCase
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'benchmarks'))
+
+from import_time import import_time  # noqa
+
+
+# Seconds importing the client may take. Importing it used to pull in
+# requests and the endpoints table, which takes several times longer
+IMPORT_BUDGET = 0.05
+
+
+class ImportTimeTest(TestCase):
+
+    def test_requests_is_imported_lazily(self):
+        _, requests_imported = import_time()
+
+        self.assertFalse(requests_imported)
+
+    def test_import_time_budget(self):
+        # Best of a few runs, to ignore a busy machine
+        seconds = min(import_time()[0] for _ in range(3))
+
+        self.assertLess(seconds, IMPORT_BUDGET)
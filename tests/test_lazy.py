@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+import mock
+
+from rest_client.lazy import LazyEndpoints
+
+
+SHARDS = {
+    'things': {'things__thing_list': 'things/'},
+    'bakery': {'bakery__bake': 'bakery/bake/'},
+    '': {'ping': 'ping/', 'status': 'status/'},
+}
+
+
+class ShardedEndpointsTest(TestCase):
+
+    def setUp(self):
+        self.loader = mock.Mock(return_value=dict(
+            SHARDS['things'], **dict(SHARDS['bakery'], **SHARDS[''])))
+        self.shard_loader = mock.Mock(side_effect=SHARDS.get)
+        self.endpoints = LazyEndpoints(self.loader, self.shard_loader)
+
+    def test_lookup_only_loads_its_namespace(self):
+        self.assertEqual(self.endpoints['things__thing_list'], 'things/')
+        self.assertEqual(self.endpoints.get('things__thing_list'), 'things/')
+
+        self.shard_loader.assert_called_once_with('things')
+        self.assertFalse(self.loader.called)
+
+    def test_endpoints_outside_of_namespaces_share_a_shard(self):
+        self.assertEqual(self.endpoints['ping'], 'ping/')
+        self.assertEqual(self.endpoints['status'], 'status/')
+
+        self.shard_loader.assert_called_once_with('')
+
+    def test_unknown_endpoints_are_missing(self):
+        self.assertNotIn('nothing__here', self.endpoints)
+        self.assertNotIn('nothing__else', self.endpoints)
+
+        self.shard_loader.assert_called_once_with('nothing')
+
+    def test_listing_loads_every_endpoint(self):
+        self.endpoints['things__thing_list']
+
+        self.assertEqual(sorted(self.endpoints), [
+            'bakery__bake', 'ping', 'status', 'things__thing_list'])
+        self.assertEqual(self.loader.call_count, 1)
+
+    def test_unsharded_package_loads_the_whole_table(self):
+        self.shard_loader.side_effect = lambda namespace: None
+
+        self.assertEqual(self.endpoints['bakery__bake'], 'bakery/bake/')
+        self.assertIn('things__thing_list', self.endpoints)
+
+        self.assertEqual(self.shard_loader.call_count, 1)
+        self.assertEqual(self.loader.call_count, 1)
@@ -0,0 +1,86 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+from unittest import TestCase
+
+import mock
+
+import rest_client
+from rest_client.client import Client
+from rest_client.loadgen import (
+    EndpointScenario, format_report, LoadGenerator, load_scenario,
+    make_generator
+)
+
+
+class LoadGeneratorTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(LoadGeneratorTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'users__user_detail': 'users/{pk}/',
+            'users__user_list': 'users/',
+        }
+
+    def setUp(self):
+        # Mock call counts aren't thread safe, requests are counted here
+        self.sent = []
+        self.response = mock.Mock(status_code=200)
+        self.transport = mock.Mock()
+        self.transport.send.side_effect = (
+            lambda *args, **kwargs: self.sent.append(args) or self.response)
+        self.client = Client('http://no.com', transport=self.transport)
+
+    def test_parameter_generators(self):
+        rand = random.Random(1)
+
+        self.assertEquals(make_generator('fixed', rand)(), 'fixed')
+        self.assertTrue(1 <= make_generator({'randint': [1, 3]}, rand)() <= 3)
+        self.assertIn(make_generator({'choice': ['a', 'b']}, rand)(),
+                      ['a', 'b'])
+        sequence = make_generator({'sequence': 5}, rand)
+        self.assertEquals([sequence(), sequence()], [5, 6])
+
+    def test_load_scenario_rejects_unknown_endpoints(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'scenario.json')
+        with open(path, 'w') as scenario_file:
+            json.dump({'endpoints': [{'name': 'users__missing'}]},
+                      scenario_file)
+
+        self.assertRaises(ValueError, load_scenario, path,
+                          rest_client.client.ENDPOINTS)
+
+    def test_run_fixed_number_of_requests(self):
+        scenario = [
+            EndpointScenario('users__user_detail', weight=3,
+                             params={'pk': {'randint': [1, 10]}}),
+            EndpointScenario('users__user_list', weight=1),
+        ]
+        generator = LoadGenerator(self.client, scenario, concurrency=4,
+                                  requests=200, seed=3)
+
+        stats = generator.run()
+
+        self.assertEquals(len(self.sent), 200)
+        detail = stats['users__user_detail'].requests
+        listing = stats['users__user_list'].requests
+        self.assertEquals(detail + listing, 200)
+        self.assertTrue(detail > listing)
+        self.assertIn('users__user_detail',
+                      format_report(stats, generator.elapsed))
+
+    def test_errors_are_counted_by_status(self):
+        self.response.status_code = 503
+        scenario = [EndpointScenario('users__user_list')]
+        generator = LoadGenerator(self.client, scenario, concurrency=2,
+                                  requests=10)
+
+        stats = generator.run()
+
+        self.assertEquals(stats['users__user_list'].errors, {'503': 10})
@@ -0,0 +1,129 @@
+import threading
+from unittest import TestCase
+
+import mock
+
+import rest_client
+from rest_client.client import Client
+from rest_client.metrics import Histogram, MetricsRegistry
+
+
+class HistogramTest(TestCase):
+
+    def test_percentiles(self):
+        histogram = Histogram(buckets=(0.1, 0.2, 0.5))
+        for value in (0.05, 0.05, 0.15, 0.3, 2):
+            histogram.observe(value)
+
+        self.assertEquals(histogram.counts, [2, 1, 1, 1])
+        self.assertEquals(histogram.percentile(40), 0.1)
+        self.assertEquals(histogram.percentile(60), 0.2)
+        self.assertEquals(histogram.percentile(100), float('inf'))
+
+
+class MetricsRegistryTest(TestCase):
+
+    def test_observations_from_several_threads_are_added_up(self):
+        registry = MetricsRegistry()
+
+        def work():
+            for _ in range(100):
+                registry.observe('end__point', 'GET', 0.01, 200, 0, 10)
+            registry.observe('end__point', 'GET', 0.01, 503)
+            registry.observe('end__point', 'GET', 0.01)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        metrics = registry.snapshot()[('end__point', 'GET')]
+        self.assertEquals(metrics['requests'], 408)
+        self.assertEquals(metrics['errors'], {'5xx': 4, 'network': 4})
+        self.assertEquals(metrics['bytes_received'], 4000)
+        self.assertEquals(sum(metrics['latency_counts']), 408)
+
+    def test_counters_of_ended_threads_are_folded(self):
+        registry = MetricsRegistry()
+
+        for _ in range(50):
+            thread = threading.Thread(
+                target=registry.observe,
+                args=('end__point', 'GET', 0.01, 500, 0, 10))
+            thread.start()
+            thread.join()
+        registry.observe('end__point', 'GET', 0.01, 200, 0, 10)
+
+        metrics = registry.snapshot()[('end__point', 'GET')]
+        self.assertEquals(metrics['requests'], 51)
+        self.assertEquals(metrics['errors'], {'5xx': 50})
+        self.assertEquals(len(registry._shards), 1)
+        # Totals can be read again without counting ended threads twice
+        self.assertEquals(
+            registry.snapshot()[('end__point', 'GET')]['bytes_received'], 510)
+
+    def test_reset(self):
+        registry = MetricsRegistry()
+        registry.observe('end__point', 'GET', 0.01, 404)
+        registry.reset()
+        registry.observe('end__point', 'GET', 0.01, 200)
+
+        metrics = registry.snapshot()[('end__point', 'GET')]
+        self.assertEquals(metrics['requests'], 1)
+        self.assertEquals(metrics['errors'], {})
+
+    def test_exposition(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        registry.observe('end__point', 'GET', 0.05, 200, 0, 10)
+        registry.observe('end__point', 'GET', 0.5, 500, 0, 10)
+
+        exposition = registry.exposition()
+
+        for line in (
+            'rest_client_requests_total{endpoint="end__point",method="GET"} 2',
+            'rest_client_errors_total{endpoint="end__point",method="GET",'
+            'class="5xx"} 1',
+            'rest_client_bytes_received_total{endpoint="end__point",'
+            'method="GET"} 20',
+            'rest_client_request_duration_seconds_bucket{endpoint='
+            '"end__point",method="GET",le="0.1"} 1',
+            'rest_client_request_duration_seconds_bucket{endpoint='
+            '"end__point",method="GET",le="+Inf"} 2',
+            'rest_client_request_duration_seconds_count{endpoint='
+            '"end__point",method="GET"} 2',
+        ):
+            self.assertIn(line + '\n', exposition)
+
+
+class ClientMetricsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ClientMetricsTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'end__point': 'end/point/'
+        }
+
+    def test_client_records_metrics(self):
+        transport = mock.Mock()
+        transport.send.return_value.status_code = 200
+        transport.send.return_value.content = '{"name": "object_name"}'
+        registry = MetricsRegistry()
+        client = Client('http://no.com', transport=transport,
+                        metrics=registry)
+
+        client.end.point()
+        client.end.point(http_method='post', http_body={'a': 1})
+        transport.send.side_effect = IOError('Connection reset')
+        self.assertRaises(IOError, client.end.point)
+
+        snapshot = registry.snapshot()
+        self.assertEquals(snapshot[('end__point', 'GET')]['requests'], 2)
+        self.assertEquals(snapshot[('end__point', 'GET')]['errors'],
+                          {'network': 1})
+        self.assertEquals(snapshot[('end__point', 'POST')]['bytes_sent'],
+                          len('{"a": 1}'))
+        self.assertEquals(snapshot[('end__point', 'POST')]['bytes_received'],
+                          len('{"name": "object_name"}'))
@@ -0,0 +1,190 @@
+import threading
+import time
+from unittest import TestCase
+import urllib
+import urlparse
+
+import mock
+
+import rest_client
+from rest_client.client import ApiError, Client
+from rest_client.pagination import page_params
+from rest_client.scheduling import PriorityScheduler
+
+
+class PagedTransport(object):
+    """
+    List endpoint of `count` items paginated like Django REST framework,
+    by page number on pages/ and by limit and offset on items/
+    """
+
+    def __init__(self, count=95, size=10, latency=0.02, cursor=False):
+        self.count = count
+        self.size = size
+        self.latency = latency
+        self.cursor = cursor
+        self.sent = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def send(self, method, url, **kwargs):
+        parts = urlparse.urlsplit(url)
+        query = dict(urlparse.parse_qsl(parts.query))
+        with self.lock:
+            self.sent.append(query)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+
+        if parts.path.endswith('/items/'):
+            limit = int(query.get('limit', self.size))
+            start = int(query.get('offset', 0))
+            following = dict(query, limit=limit, offset=start + limit)
+        else:
+            limit = self.size
+            if self.cursor:
+                page = int(query.get('cursor', 'c1')[1:])
+                following = dict(query, cursor='c{}'.format(page + 1))
+            else:
+                page = int(query.get('page', 1))
+                following = dict(query, page=page + 1)
+            start = (page - 1) * limit
+        response = mock.Mock(headers={})
+        if start >= self.count and start:
+            response.status_code = 404
+            response.content = ''
+            return response
+        response.status_code = 200
+        next_url = None
+        if start + limit < self.count:
+            next_url = '{}://{}{}?{}'.format(parts.scheme, parts.netloc,
+                                             parts.path,
+                                             urllib.urlencode(following))
+        response.json.return_value = {
+            'count': self.count,
+            'next': next_url,
+            'previous': None,
+            'results': range(start, min(start + limit, self.count)),
+        }
+        return response
+
+
+class PaginationTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(PaginationTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'things__pages': 'things/pages/',
+            'things__items': 'things/items/',
+        }
+
+    def client(self, scheduler=None, **kwargs):
+        self.transport = PagedTransport(**kwargs)
+        return Client('http://no.com/', transport=self.transport,
+                      scheduler=scheduler)
+
+    def test_sequential(self):
+        client = self.client()
+
+        items = list(client.things.pages(http_paginate='sequential',
+                                         status='active'))
+
+        self.assertEqual(items, range(95))
+        self.assertEqual(self.transport.max_in_flight, 1)
+        self.assertEqual(self.transport.sent[-1],
+                         {'page': '10', 'status': 'active'})
+
+    def test_parallel_page_numbers(self):
+        client = self.client(latency=0.05)
+
+        started = time.time()
+        items = list(client.things.pages(http_paginate='parallel',
+                                         http_window=4))
+
+        self.assertEqual(items, range(95))
+        self.assertEqual(self.transport.max_in_flight, 4)
+        # The first page, then the 9 others 4 at a time
+        self.assertLess(time.time() - started, 0.3)
+
+    def test_parallel_limit_offset(self):
+        client = self.client()
+
+        items = list(client.things.items(limit=20, http_paginate='parallel'))
+
+        self.assertEqual(items, range(95))
+        self.assertEqual(len(self.transport.sent), 5)
+
+    def test_unordered(self):
+        client = self.client()
+
+        items = client.things.pages(http_paginate='parallel',
+                                    http_ordered=False)
+
+        self.assertEqual(sorted(items), range(95))
+
+    def test_stops_when_the_caller_does(self):
+        client = self.client(latency=0.01)
+
+        for item in client.things.pages(http_paginate='parallel',
+                                        http_window=2):
+            if item == 15:
+                break
+        time.sleep(0.05)
+
+        # The first page, and the window of two pages
+        self.assertEqual(len(self.transport.sent), 3)
+
+    def test_pages_have_the_priority_of_the_caller(self):
+        scheduler = PriorityScheduler()
+        client = self.client(scheduler)
+
+        with scheduler.priority('bulk'):
+            items = list(client.things.pages(http_paginate='parallel'))
+
+        self.assertEqual(items, range(95))
+        stats = scheduler.snapshot()
+        self.assertEqual(stats['bulk']['granted'], 10)
+        self.assertEqual(stats['default']['granted'], 0)
+
+    def test_cursor_pagination_is_followed(self):
+        client = self.client(cursor=True)
+
+        items = list(client.things.pages(http_paginate='parallel'))
+
+        self.assertEqual(items, range(95))
+        self.assertEqual(self.transport.max_in_flight, 1)
+
+    def test_errors_are_raised(self):
+        client = self.client()
+        # Items were deleted since the first page was read
+        original_send = self.transport.send
+
+        def send(method, url, **kwargs):
+            response = original_send(method, url, **kwargs)
+            self.transport.count = 50
+            return response
+
+        self.transport.send = send
+
+        items = client.things.pages(http_paginate='parallel')
+
+        self.assertRaises(ApiError, list, items)
+
+    def test_unknown_mode(self):
+        client = self.client()
+
+        self.assertRaises(ValueError, client.things.pages,
+                          http_paginate='random')
+
+    def test_page_params(self):
+        page = {'count': 25, 'results': range(10)}
+
+        self.assertEqual(page_params(page, {'p': '2', 'status': '1'}), [
+            {'p': '2', 'status': '1'}, {'p': '3', 'status': '1'}])
+        self.assertIsNone(page_params(page, {'cursor': 'abc'}))
+        self.assertIsNone(page_params(dict(page, count=None), {'p': '2'}))
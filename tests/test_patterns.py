@@ -0,0 +1,78 @@
+import os
+import sys
+from unittest import TestCase
+
+from rest_client.management.patterns import (
+    _translate_tokens, translate, UntranslatablePattern
+)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'benchmarks'))
+
+from translate_patterns import generate_patterns, translate_all  # noqa
+
+
+# Seconds translating 50,000 patterns of the benchmark's typical shapes may
+# take. Translating them token by token took about twice as long
+TRANSLATE_BUDGET = 0.5
+
+
+class TranslateTest(TestCase):
+
+    def test_named_groups_become_placeholders(self):
+        template, converters = translate(
+            '^bakery/(?P<pk>[^/]+)/and-then/(?P<another_id>\\d+)/$')
+
+        self.assertEqual(template, 'bakery/{pk}/and-then/{another_id}/')
+        self.assertEqual(converters, {'pk': 'str', 'another_id': 'int'})
+
+    def test_include_anchors_are_removed(self):
+        template, _ = translate('^api/^v1/things\\.json$')
+
+        self.assertEqual(template, 'api/v1/things.json')
+
+    def test_quantifiers_keep_the_shortest_match(self):
+        template, _ = translate('^a/b+/c{3}/d?/(?:edit/)?$')
+
+        self.assertEqual(template, 'a/b/ccc/')
+
+    def test_optional_trailing_slash_is_dropped(self):
+        template, converters = translate(
+            '^things\\.(?P<format>[a-z0-9]+)/?$')
+
+        self.assertEqual(template, 'things.{format}')
+        self.assertEqual(converters, {'format': '[a-z0-9]+'})
+
+    def test_groups_inside_named_groups_are_kept(self):
+        template, converters = translate(
+            '^archive/(?P<year>(19|20)\\d{2})/(?P<code>[a-f)]{4})/$')
+
+        self.assertEqual(template, 'archive/{year}/{code}/')
+        self.assertEqual(converters, {
+            'year': '(19|20)\\d{2}',
+            'code': '[a-f)]{4}',
+        })
+
+    def test_untranslatable_patterns(self):
+        for pattern in ('^things/(?P<pk>\\d+)?/$',
+                        '^(things|stuff)/$',
+                        '^things/(\\d+)/$',
+                        '^things/.*$',
+                        '^things/[ab]/$',
+                        '^things/(?P<pk>\\d+/$'):
+            self.assertRaises(UntranslatablePattern, translate, pattern)
+
+    def test_simple_patterns_are_translated_like_the_others(self):
+        patterns = generate_patterns(6) + [
+            '^things/(?P<pk>[a-f)]{4})/$',
+            '^things\\.json/(?P<pk>(ab)c)/(?:edit/)?x?/$',
+            '^things//(?P<pk>\\d+)$',
+        ]
+        for pattern in patterns:
+            self.assertEqual(translate(pattern), _translate_tokens(pattern))
+
+    def test_translating_many_patterns_is_fast(self):
+        patterns = generate_patterns(50000)
+
+        self.assertLess(min(translate_all(patterns) for _ in range(3)),
+                        TRANSLATE_BUDGET)
@@ -0,0 +1,100 @@
+import os
+import pstats
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import TestCase
+
+from django.core.urlresolvers import RegexURLPattern
+
+from rest_client.management.commands.generate_api_client import (
+    extract_info_from_urlpatterns
+)
+from rest_client.management.profiling import PhaseProfiler
+
+from . import sample_urls
+
+
+class PhaseProfilerTest(TestCase):
+
+    def test_disabled_profiler_records_nothing(self):
+        profiler = PhaseProfiler()
+
+        with profiler.phase('load_source'):
+            pass
+
+        self.assertEqual(profiler.phases, [])
+
+    def test_phases_are_measured(self):
+        profiler = PhaseProfiler(enabled=True)
+
+        with profiler.phase('fast'):
+            pass
+        with profiler.phase('slow'):
+            garbage = [[] for _ in range(1000)]
+            time.sleep(0.01)
+
+        self.assertEqual([phase[0] for phase in profiler.phases],
+                         ['fast', 'slow'])
+        self.assertTrue(profiler.phases[1][1] >= 0.01)
+        self.assertTrue(profiler.phases[1][2] >= len(garbage))
+        self.assertEqual(profiler.slowest(), 'slow')
+        self.assertIn('slow', profiler.report())
+
+    def test_dump_slowest_phase(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'slowest.prof')
+        profiler = PhaseProfiler(cprofile=True)
+
+        with profiler.phase('fast'):
+            pass
+        with profiler.phase('slow'):
+            time.sleep(0.01)
+
+        self.assertEqual(profiler.dump_slowest(path), 'slow')
+        self.assertTrue(pstats.Stats(path).total_calls > 0)
+
+    def test_dump_subprocess_phase(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        script = os.path.join(tmp_dir, 'child.py')
+        with open(script, 'w') as script_file:
+            script_file.write('import time\ntime.sleep(0.05)\n')
+        path = os.path.join(tmp_dir, 'slowest.prof')
+        profiler = PhaseProfiler(cprofile=True)
+
+        with profiler.phase('child'):
+            subprocess.check_call([
+                sys.executable, '-m', 'cProfile', '-o',
+                profiler.subprocess_profile('child'), script])
+
+        self.assertEqual(profiler.dump_slowest(path), 'child')
+        functions = [function for _, _, function in pstats.Stats(path).stats]
+        self.assertIn('<time.sleep>', functions)
+        self.assertNotIn('waitpid', ' '.join(functions))
+
+    def test_skipped_patterns_are_collected(self):
+        skipped = []
+
+        info = extract_info_from_urlpatterns(
+            [RegexURLPattern(r'^things/$', lambda request: None)],
+            skipped=skipped
+        )
+
+        self.assertEqual(info, [])
+        self.assertEqual(len(skipped), 1)
+
+    def test_skipped_namespaces_are_not_skipped_patterns(self):
+        skipped = []
+        skipped_namespaces = []
+
+        extract_info_from_urlpatterns(
+            sample_urls.urlpatterns, skip_namespaces=['internal'],
+            skipped=skipped, skipped_namespaces=skipped_namespaces
+        )
+
+        self.assertEqual(skipped, [])
+        self.assertEqual(skipped_namespaces, ['internal'])
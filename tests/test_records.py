@@ -0,0 +1,131 @@
+from array import array
+import pickle
+from unittest import TestCase
+
+import mock
+
+import rest_client
+from rest_client.client import Client
+from rest_client.records import Columns, compact, record_class
+
+
+ITEMS = [
+    {'id': 1, 'name': u'a', 'price': 1.5},
+    {'id': 2, 'name': u'b', 'price': 2.5, 'tags': []},
+]
+
+
+class RecordTest(TestCase):
+
+    def test_records_read_like_dicts(self):
+        records, fields = compact(ITEMS, 'records')
+
+        # Fields missing from the first items come last
+        self.assertEqual(sorted(fields[:3]), ['id', 'name', 'price'])
+        self.assertEqual(fields[3], 'tags')
+        self.assertEqual(records, ITEMS)
+        first = records[0]
+        self.assertEqual((first.id, first['name'], first.get('tags')),
+                         (1, u'a', None))
+        self.assertNotIn('tags', first)
+        self.assertRaises(KeyError, lambda: first['tags'])
+        self.assertEqual(sorted(first.keys()), ['id', 'name', 'price'])
+        self.assertFalse(hasattr(first, '__dict__'))
+
+    def test_layouts_share_a_class(self):
+        self.assertIs(record_class(['id', 'name']),
+                      record_class((u'id', u'name')))
+        self.assertRaises(ValueError, record_class, ['first-name'])
+
+    def test_records_can_be_pickled(self):
+        records, _ = compact(ITEMS, 'records')
+
+        self.assertEqual(pickle.loads(pickle.dumps(records, 2)), ITEMS)
+
+    def test_paginated_responses(self):
+        page = {'count': 2, 'next': None, 'results': ITEMS}
+
+        converted, _ = compact(page, 'columns', layout=('name', 'id'))
+
+        self.assertEqual(converted['count'], 2)
+        self.assertIsInstance(converted['results'], Columns)
+        self.assertEqual(converted['results']._fields[:2], ('name', 'id'))
+        self.assertIs(page['results'], ITEMS)
+
+    def test_other_responses_are_left_alone(self):
+        for data in ({'id': 1}, [1, 2], [{'first-name': u'a'}]):
+            self.assertEqual(compact(data, 'records'), (data, None))
+        self.assertRaises(ValueError, compact, ITEMS, 'tuples')
+
+
+class ColumnsTest(TestCase):
+
+    def test_columns(self):
+        columns = Columns(('id', 'name', 'price', 'tags'), ITEMS)
+
+        self.assertEqual(len(columns), 2)
+        self.assertEqual(columns.column('id'), array('l', [1, 2]))
+        self.assertEqual(columns.column('price'), array('d', [1.5, 2.5]))
+        self.assertEqual(columns.column('tags'), [None, []])
+        self.assertEqual(columns[-1].name, u'b')
+        self.assertEqual([record.id for record in columns[:1]], [1])
+        self.assertRaises(IndexError, lambda: columns[2])
+
+    def test_equal_strings_are_shared(self):
+        items = [{'status': u''.join(['act', 'ive'])} for _ in range(3)]
+
+        status = Columns(('status',), items).column('status')
+
+        self.assertIs(status[0], status[2])
+
+
+class ClientDecodeTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ClientDecodeTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'end__point': 'end/point/'
+        }
+
+    def setUp(self):
+        self.transport = mock.Mock()
+        self.transport.send.return_value.status_code = 200
+        self.transport.send.return_value.headers = {}
+
+    def test_decode_records(self):
+        self.transport.send.return_value.json.return_value = ITEMS
+        client = Client('http://no.com', transport=self.transport,
+                        decode='records')
+
+        records = client.end.point()
+
+        self.assertEqual([record.name for record in records], [u'a', u'b'])
+        self.assertEqual(client.end.point(http_decode=None), ITEMS)
+
+    def test_layout_is_kept_between_pages(self):
+        client = Client('http://no.com', transport=self.transport)
+        self.transport.send.return_value.json.return_value = ITEMS
+        first_page = client.end.point(http_decode='columns')
+
+        self.transport.send.return_value.json.return_value = [
+            {'price': 3.5, 'id': 3, 'name': u'c'}]
+        page = client.end.point(http_decode='columns')
+
+        self.assertEqual(page._fields, first_page._fields)
+        self.assertEqual(page[0].tags, None)
+
+    def test_declared_layout(self):
+        self.transport.send.return_value.json.return_value = ITEMS
+        client = Client('http://no.com', transport=self.transport)
+
+        with mock.patch.object(rest_client.client, 'LAYOUTS',
+                               {'end__point': ['price', 'id']}):
+            records = client.end.point(http_decode='records')
+
+        self.assertEqual(records[0]._fields[:2], ('price', 'id'))
+
+    def test_unknown_mode(self):
+        self.assertRaises(ValueError, Client, 'http://no.com',
+                          decode='tuples')
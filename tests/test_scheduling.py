@@ -0,0 +1,163 @@
+import threading
+import time
+from unittest import TestCase
+
+import mock
+
+import rest_client
+from rest_client.client import Client, DeadlineExceeded
+from rest_client.scheduling import PriorityScheduler
+
+
+class PrioritySchedulerTest(TestCase):
+
+    def setUp(self):
+        self.threads = []
+
+    def queue_waiters(self, scheduler, priorities, served=None):
+        """
+        Queue a waiter of each priority, in order, and return the list they
+        append their priority to once served
+        """
+        served = [] if served is None else served
+
+        def wait(priority):
+            if scheduler.acquire(priority, timeout=1):
+                served.append(priority)
+                scheduler.release()
+
+        for priority in priorities:
+            thread = threading.Thread(target=wait, args=(priority,))
+            thread.start()
+            self.threads.append(thread)
+            time.sleep(0.005)  # Keep the order of arrival
+        return served
+
+    def serve(self, scheduler):
+        scheduler.release()
+        for thread in self.threads:
+            thread.join(1)
+
+    def test_strict_order(self):
+        scheduler = PriorityScheduler(slots=1, strict=True, max_wait=None)
+        scheduler.acquire()
+        served = self.queue_waiters(
+            scheduler, ['bulk', 'default', 'interactive', 'bulk'])
+
+        self.serve(scheduler)
+
+        self.assertEqual(served, ['interactive', 'default', 'bulk', 'bulk'])
+
+    def test_classes_share_by_weight(self):
+        scheduler = PriorityScheduler(
+            slots=1, classes=(('interactive', 3), ('bulk', 1)),
+            default='interactive', max_wait=None)
+        scheduler.acquire()
+        served = self.queue_waiters(scheduler, ['bulk'] * 4 +
+                                    ['interactive'] * 6)
+
+        self.serve(scheduler)
+
+        # Bulk waiters keep getting a share instead of waiting for every
+        # interactive one
+        self.assertEqual(served[:4].count('interactive'), 3)
+        self.assertIn('bulk', served[:4])
+        self.assertEqual(sorted(served), ['bulk'] * 4 + ['interactive'] * 6)
+
+    def test_max_wait_prevents_starvation(self):
+        scheduler = PriorityScheduler(slots=1, strict=True, max_wait=0.02)
+        scheduler.acquire()
+        served = self.queue_waiters(scheduler, ['bulk'])
+        time.sleep(0.03)
+        self.queue_waiters(scheduler, ['interactive'] * 2, served)
+
+        self.serve(scheduler)
+
+        self.assertEqual(served, ['bulk', 'interactive', 'interactive'])
+        self.assertGreaterEqual(scheduler.snapshot()['bulk']['wait_mean'],
+                                0.02)
+
+    def test_acquire_times_out(self):
+        scheduler = PriorityScheduler(slots=1)
+        self.assertTrue(scheduler.acquire())
+
+        self.assertFalse(scheduler.acquire('bulk', timeout=0.01))
+
+        stats = scheduler.snapshot()['bulk']
+        self.assertEqual((stats['waiting'], stats['timeouts']), (0, 1))
+        scheduler.release()
+        self.assertTrue(scheduler.acquire('bulk', timeout=0.01))
+
+    def test_priority_context(self):
+        scheduler = PriorityScheduler()
+
+        with scheduler.priority('bulk'):
+            self.assertEqual(scheduler.current(), 'bulk')
+            scheduler.acquire()
+        self.assertEqual(scheduler.current(), 'default')
+
+        self.assertEqual(scheduler.snapshot()['bulk']['granted'], 1)
+
+    def test_unknown_priority(self):
+        scheduler = PriorityScheduler()
+
+        self.assertRaises(ValueError, scheduler.acquire, 'urgent')
+        self.assertRaises(ValueError, PriorityScheduler, default='urgent')
+
+
+class ClientSchedulingTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ClientSchedulingTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'end__point': 'end/point/'
+        }
+
+    def test_requests_take_a_slot(self):
+        transport = mock.Mock()
+        transport.send.return_value.status_code = 200
+        scheduler = mock.Mock()
+        scheduler.acquire.return_value = True
+        client = Client('http://no.com', transport=transport,
+                        scheduler=scheduler)
+
+        client.end.point(http_priority='bulk')
+
+        scheduler.acquire.assert_called_once_with('bulk', None)
+        scheduler.release.assert_called_once_with()
+        self.assertNotIn('priority', transport.send.call_args[1])
+
+    def test_thread_priority_is_used(self):
+        transport = mock.Mock()
+        transport.send.return_value.status_code = 200
+        scheduler = PriorityScheduler()
+        client = Client('http://no.com', transport=transport,
+                        scheduler=scheduler)
+
+        with scheduler.priority('interactive'):
+            client.end.point()
+
+        self.assertEqual(scheduler.snapshot()['interactive']['granted'], 1)
+
+    def test_slot_is_released_on_errors(self):
+        transport = mock.Mock()
+        transport.send.side_effect = IOError('Connection refused')
+        scheduler = PriorityScheduler(slots=1)
+        client = Client('http://no.com', transport=transport,
+                        scheduler=scheduler)
+
+        self.assertRaises(IOError, client.end.point)
+        self.assertTrue(scheduler.acquire(timeout=0))
+
+    def test_waiting_past_the_deadline(self):
+        transport = mock.Mock()
+        scheduler = PriorityScheduler(slots=1)
+        scheduler.acquire()
+        client = Client('http://no.com', transport=transport,
+                        scheduler=scheduler)
+
+        self.assertRaises(DeadlineExceeded, client.end.point,
+                          http_deadline=0.01)
+        self.assertFalse(transport.send.called)
@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+import httpretty
+import mock
+from requests.exceptions import ConnectionError
+
+import rest_client
+from rest_client.client import Client
+from rest_client.transport import (
+    build_response, fixed_latency, RecordingTransport, ReplayMiss,
+    ReplayTransport
+)
+
+
+class RecordReplayTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(RecordReplayTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'end__point': 'end/point/',
+            'end__binary': 'end/binary/',
+        }
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'records.jsonl.gz')
+        self.record()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @httpretty.activate
+    def record(self):
+        httpretty.register_uri(
+            httpretty.GET, 'http://no.com/end/point/',
+            responses=[
+                httpretty.Response(body='{"page": 1}'),
+                httpretty.Response(body='{"page": 2}'),
+            ],
+            content_type='application/json'
+        )
+        httpretty.register_uri(
+            httpretty.POST, 'http://no.com/end/point/',
+            body='{"name": "created"}',
+            status=201,
+            content_type='application/json'
+        )
+        with RecordingTransport(self.path) as transport:
+            client = Client('http://no.com', transport=transport)
+            client.end.point(a=1, b=2)
+            client.end.point(a=1, b=2)
+            client.end.point(http_method='post',
+                             http_body={'name': 'created'})
+
+    def test_records_are_compressed_together(self):
+        with RecordingTransport(self.path, transport=mock.Mock(**{
+            'send.return_value': build_response(
+                'http://no.com/end/point/', 200, {}, '{"page": 1}')
+        })) as transport:
+            for index in range(1000):
+                transport.send('get',
+                               'http://no.com/end/point/?a={}'.format(index))
+
+        # A gzip member per record would take over 100 KB
+        self.assertLess(os.path.getsize(self.path), 20000)
+        replay = ReplayTransport(self.path)
+        self.assertEqual(
+            replay.send('get', 'http://no.com/end/point/?a=999').content,
+            '{"page": 1}')
+
+    def test_replay_without_network(self):
+        client = Client('http://no.com',
+                        transport=ReplayTransport(self.path))
+
+        # Query string order does not matter
+        self.assertEquals(client.end.point(b=2, a=1), {'page': 1})
+        self.assertEquals(client.end.point(a=1, b=2), {'page': 2})
+        self.assertEquals(
+            client.end.point(http_method='post',
+                             http_body={'name': 'created'}),
+            {'name': 'created'}
+        )
+
+    def test_unknown_request_raises(self):
+        client = Client('http://no.com',
+                        transport=ReplayTransport(self.path))
+
+        self.assertRaises(ReplayMiss, client.end.point, a=3)
+
+    def test_latency_injection(self):
+        client = Client('http://no.com', transport=ReplayTransport(
+            self.path, latency=fixed_latency(0.05)))
+
+        started = time.time()
+        client.end.point(a=1, b=2)
+
+        self.assertTrue(time.time() - started >= 0.05)
+
+    def test_error_injection(self):
+        transport = ReplayTransport(self.path, error_rate=1, error=503)
+        client = Client('http://no.com', transport=transport)
+
+        self.assertRaises(ValueError, client.end.point, a=1, b=2)
+
+        transport.error = ConnectionError('Connection refused')
+        self.assertRaises(ConnectionError, client.end.point, a=1, b=2)
+
+    def test_failover_with_injected_errors(self):
+        transport = ReplayTransport(self.path, error_rate=1, error=503)
+        client = Client(['http://no.com', 'http://no.com/'],
+                        transport=transport)
+
+        self.assertRaises(ValueError, client.end.point, a=1, b=2)
+        self.assertEqual(transport._positions.values(), [2])
+
+    def test_error_injection_is_repeatable(self):
+        def outcomes():
+            transport = ReplayTransport(self.path, error_rate=0.5, seed=42)
+            return [transport.send('get', 'http://no.com/end/point/?a=1&b=2')
+                    .status_code for _ in range(20)]
+
+        self.assertEquals(outcomes(), outcomes())
+        self.assertEquals(set(outcomes()), set([200, 503]))
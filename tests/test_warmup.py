@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+import rest_client
+from rest_client.client import Client
+
+from .http_server import Server
+
+
+class WarmupTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(WarmupTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'end__point': 'end/point/',
+            'end__detail': 'end/{pk}/',
+        }
+
+    def setUp(self):
+        self.server = Server()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def test_warmup_opens_pooled_connections(self):
+        client = Client(self.server.url)
+
+        client.warmup(connections=3)
+        for _ in range(3):
+            client.end.point()
+
+        self.assertEquals(len(self.server.connections), 3)
+        self.assertEquals(len(self.server.requests), 3)
+
+    def test_warmup_in_background_with_probes(self):
+        client = Client(self.server.url)
+
+        thread = client.warmup(probes=['end__point'], background=True)
+        thread.join()
+        client.end.point()
+
+        self.assertEquals(len(self.server.connections), 1)
+        self.assertEquals(
+            [request[:2] for request in self.server.requests],
+            [('OPTIONS', '/end/point/'), ('GET', '/end/point/')]
+        )
+
+    def test_endpoints_with_arguments_can_not_be_probed(self):
+        client = Client(self.server.url)
+
+        self.assertRaises(ValueError, client.warmup, probes=['end__detail'])
+
+    def test_unreachable_host_is_ignored(self):
+        client = Client(['http://127.0.0.1:1/', self.server.url])
+
+        client.warmup(connections=2)
+
+        self.assertEquals(self.server.wait_for_connections(2), 2)
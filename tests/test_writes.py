@@ -0,0 +1,118 @@
+import threading
+import time
+from unittest import TestCase
+
+import mock
+
+import rest_client
+from rest_client.client import ApiError, Client
+from rest_client.writes import WriteBehindQueue, WriteQueueFull
+
+
+class WriteBehindQueueTest(TestCase):
+
+    def test_flush_waits_for_every_write(self):
+        queue = WriteBehindQueue(workers=2)
+        sent = []
+
+        for index in range(10):
+            queue.submit('end__point', index,
+                         lambda index=index: sent.append(index))
+
+        self.assertTrue(queue.flush(timeout=1))
+        self.assertEqual(sorted(sent), range(10))
+        self.assertEqual(queue.sent, 10)
+        queue.close()
+
+    def test_full_queue_applies_backpressure(self):
+        release = threading.Event()
+        queue = WriteBehindQueue(workers=1, max_pending=1, put_timeout=0.05)
+
+        queue.submit('end__point', 1, release.wait)
+        time.sleep(0.05)  # Taken by the worker, which waits
+        queue.submit('end__point', 2, release.wait)
+
+        self.assertRaises(WriteQueueFull, queue.submit, 'end__point', 3,
+                          release.wait)
+        release.set()
+        self.assertTrue(queue.close(timeout=1))
+
+    def test_close_gives_up_after_the_timeout(self):
+        release = threading.Event()
+        queue = WriteBehindQueue(workers=1, max_pending=1)
+        queue.submit('end__point', 1, release.wait)
+        time.sleep(0.05)  # Taken by the worker, which waits
+        queue.submit('end__point', 2, release.wait)
+
+        started = time.time()
+        self.assertFalse(queue.close(timeout=0.1))
+        self.assertLess(time.time() - started, 0.5)
+
+        # The workers stop once the pending writes are sent
+        release.set()
+        time.sleep(0.05)
+        self.assertEqual(queue.sent, 2)
+        self.assertEqual(queue.pending(), 0)
+
+    def test_counts_from_several_workers_add_up(self):
+        queue = WriteBehindQueue(workers=8)
+
+        def fail():
+            raise IOError('Connection reset')
+
+        for index in range(1000):
+            queue.submit('end__point', index,
+                         fail if index % 2 else (lambda: None))
+        queue.close()
+
+        self.assertEqual((queue.sent, queue.failures), (500, 500))
+
+    def test_failures_are_reported(self):
+        on_failure = mock.Mock()
+        queue = WriteBehindQueue(on_failure=on_failure)
+        error = IOError('Connection reset')
+
+        def fail():
+            raise error
+
+        queue.submit('end__point', {'a': 1}, fail)
+        queue.flush()
+
+        on_failure.assert_called_once_with('end__point', {'a': 1}, error)
+        self.assertEqual(queue.failures, 1)
+        queue.close()
+
+    def test_closed_queue_rejects_writes(self):
+        queue = WriteBehindQueue()
+        queue.close()
+
+        self.assertRaises(ValueError, queue.submit, 'end__point', 1,
+                          lambda: None)
+
+
+class ClientWriteBehindTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(ClientWriteBehindTest, cls).setUpClass()
+
+        rest_client.client.ENDPOINTS = {
+            'end__point': 'end/point/'
+        }
+
+    def test_assignments_are_sent_in_the_background(self):
+        transport = mock.Mock()
+        transport.send.return_value.status_code = 500
+        on_failure = mock.Mock()
+        queue = WriteBehindQueue(on_failure=on_failure)
+        client = Client('http://no.com', transport=transport,
+                        write_behind=queue)
+
+        client.end.point = {'a': 1}
+        queue.close()
+
+        self.assertEqual(transport.send.call_args[0][0], 'post')
+        self.assertEqual(transport.send.call_args[1]['data'], {'a': 1})
+        name, data, error = on_failure.call_args[0]
+        self.assertEqual((name, data), ('end__point', {'a': 1}))
+        self.assertIsInstance(error, ApiError)